@@ -0,0 +1,199 @@
+"""
+Background AI generation jobs.
+
+POST /api/ai-generate/ with {"prompt": ..., "async": true} stores a
+GenerationJob and returns 202 with its id straight away. `manage.py
+ai_worker` (no broker: the jobs table is the queue) claims queued jobs and
+runs them through gemini_service.astream_diagram(), writing each component /
+connection to job.partial as soon as it is parsed. Clients either poll
+
+    GET /api/ai-generate/jobs/<id>/
+
+or follow the server-sent events stream
+
+    GET /api/ai-generate/jobs/<id>/events/
+
+    event: state       {"state": "running"}
+    event: component   {"id": "c1", ...}
+    event: connection  {"from": "c1", "to": "c2"}
+    event: done        <job>            (or "failed" / "timeout", then EOF)
+
+Only ASGI servers stream. Under WSGI the response holds the events so far
+and, for a job still running, ends with "poll" {"state", "status_url"}, so a
+client never ties up a worker thread. Jobs stay queued until an ai_worker
+process is running.
+
+The finished job's result carries "canvas_state", the diagram matched onto
+catalog components (api/component_matcher.py).
+"""
+import asyncio
+import json
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from core.diagram_parser import SECTIONS
+from core.gemini_service import astream_diagram
+from .component_matcher import match_diagram
+from .models import GenerationJob
+
+# Running jobs older than this belong to a worker that died; requeue them
+STALE_GRACE = 60
+# Seconds without events before the stream sends an SSE comment
+KEEP_ALIVE = 15
+
+
+def enqueue(prompt):
+    return GenerationJob.objects.create(prompt=prompt)
+
+
+def job_payload(job):
+    return {
+        "id": str(job.id),
+        "state": job.state,
+        "partial": job.partial or {},
+        "result": job.result,
+        "error": job.error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+def requeue_stale():
+    limit = settings.LLM_QUEUE_TIMEOUT + settings.LLM_TIMEOUT + STALE_GRACE
+    return GenerationJob.objects.filter(
+        state=GenerationJob.RUNNING,
+        started_at__lt=timezone.now() - timedelta(seconds=limit),
+    ).update(state=GenerationJob.QUEUED, partial={}, started_at=None)
+
+
+def claim_next():
+    """Atomically move the oldest queued job to running; None if there is none."""
+    candidates = (
+        GenerationJob.objects.filter(state=GenerationJob.QUEUED)
+        .order_by("created_at").values_list("pk", flat=True)[:10]
+    )
+    for pk in candidates:
+        # Conditional UPDATE: only one worker wins a job, on any database
+        claimed = GenerationJob.objects.filter(pk=pk, state=GenerationJob.QUEUED).update(
+            state=GenerationJob.RUNNING, started_at=timezone.now()
+        )
+        if claimed:
+            return GenerationJob.objects.get(pk=pk)
+    return None
+
+
+async def run_job(job):
+    partial = {section: [] for section in SECTIONS}
+    jobs = GenerationJob.objects.filter(pk=job.pk)
+
+    async def on_item(section, item):
+        partial[section].append(item)
+        await jobs.aupdate(partial=partial)
+
+    try:
+        result = await astream_diagram(job.prompt, on_item)
+    except Exception as e:
+        result = {"error": str(e) or e.__class__.__name__}
+
+    if "error" in result:
+        await jobs.aupdate(state=GenerationJob.FAILED, error=result["error"], finished_at=timezone.now())
+    else:
+        result = dict(result, canvas_state=await sync_to_async(match_diagram)(result))
+        await jobs.aupdate(
+            state=GenerationJob.DONE,
+            result=result,
+            partial={section: result.get(section, []) for section in SECTIONS},
+            finished_at=timezone.now(),
+        )
+
+
+async def arun_pending(concurrency=1, max_jobs=None):
+    """Run queued jobs, `concurrency` at a time, until none are left; returns the count."""
+    await sync_to_async(requeue_stale)()
+    running = set()
+    processed = 0
+    while True:
+        while len(running) < concurrency and (max_jobs is None or processed < max_jobs):
+            job = await sync_to_async(claim_next)()
+            if job is None:
+                break
+            processed += 1
+            running.add(asyncio.create_task(run_job(job)))
+        if not running:
+            return processed
+        _, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+
+
+def _event(name, data):
+    return f"event: {name}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class _JobEvents:
+    """SSE chunks for successive reads of one job; shared by both streams below."""
+
+    def __init__(self, now):
+        self.sent = {section: 0 for section in SECTIONS}
+        self.state = None
+        self.deadline = now + settings.AI_JOB_STREAM_TIMEOUT
+        self.last_event = now
+        self.finished = False
+
+    def poll(self, job, now):
+        """Chunks for what changed since the last read; sets `finished` after the final one."""
+        chunks = []
+        if job.state != self.state:
+            self.state = job.state
+            chunks.append(_event("state", {"state": job.state}))
+
+        items = job.partial or {}
+        for section in SECTIONS:
+            for item in items.get(section, [])[self.sent[section]:]:
+                chunks.append(_event(section[:-1], item))
+            self.sent[section] = max(self.sent[section], len(items.get(section, [])))
+
+        if job.state == GenerationJob.DONE:
+            chunks.append(_event("done", job_payload(job)))
+            self.finished = True
+        elif job.state == GenerationJob.FAILED:
+            chunks.append(_event("failed", {"error": job.error}))
+            self.finished = True
+        elif now >= self.deadline:
+            # The client can reconnect or fall back to polling
+            chunks.append(_event("timeout", {"state": job.state}))
+            self.finished = True
+        elif chunks:
+            self.last_event = now
+        elif now - self.last_event >= KEEP_ALIVE:
+            self.last_event = now
+            chunks.append(": keep-alive\n\n")
+        return chunks
+
+
+async def event_stream(job_id):
+    """SSE for one job under ASGI: new items as they appear, then a final event."""
+    events = _JobEvents(time.monotonic())
+    while True:
+        job = await GenerationJob.objects.aget(pk=job_id)
+        for chunk in events.poll(job, time.monotonic()):
+            yield chunk
+        if events.finished:
+            return
+        await asyncio.sleep(settings.AI_JOB_POLL_INTERVAL)
+
+
+def event_snapshot(job, status_url):
+    """
+    The events for `job` so far, for WSGI: a stream there would hold a worker
+    thread for the whole job. Unless the job has ended, the last event is
+    "poll", telling the client to follow status_url instead.
+    """
+    events = _JobEvents(time.monotonic())
+    chunks = events.poll(job, time.monotonic())
+    if not events.finished:
+        chunks.append(_event("poll", {"state": job.state, "status_url": status_url}))
+    return "".join(chunks)
@@ -0,0 +1,410 @@
+"""
+Canvas saves.
+
+Canvas items and connections carry a client-generated `uid` that is stable
+across saves, so both save paths upsert rows instead of recreating them:
+
+* replace_canvas_state() backs the full PUT /api/project/<id>/: rows whose
+  uid is in the payload are updated, new ones created, the rest deleted.
+* apply_canvas_delta() backs PATCH /api/project/<id>/canvas/ and only
+  touches the rows a delta names:
+
+    {
+        "items": {"added": [...], "updated": [...], "removed": [<key>, ...]},
+        "connections": {"added": [...], "updated": [...], "removed": [<key>, ...]}
+    }
+
+Existing rows are addressed by "uid" (or by server "id" for older clients).
+Added entries may carry a temporary client "id" which connections in the
+same payload can reference; the temporary-to-real ID map is returned.
+
+Field values are coerced to their column types (_clean()) before anything is
+written, so a malformed value is a CanvasDeltaError naming the field rather
+than a database error halfway through a save.
+"""
+import math
+import uuid
+
+from django.db import transaction
+from django.db.models import Q
+
+from .conditional import bump_revision
+from .models import CanvasState, Component, Connection
+
+ITEM_FIELDS = ("label", "x", "y", "width", "height", "rotation", "scaleX", "scaleY", "sequence")
+CONNECTION_FIELDS = ("sourceGripIndex", "targetGripIndex", "waypoints")
+
+ITEM_DEFAULTS = {
+    "label": "", "x": 0, "y": 0, "width": 50, "height": 50,
+    "rotation": 0, "scaleX": 1, "scaleY": 1, "sequence": 0,
+}
+CONNECTION_DEFAULTS = {"sourceGripIndex": 0, "targetGripIndex": 0, "waypoints": []}
+
+
+class CanvasDeltaError(ValueError):
+    """The payload references rows that don't exist or is malformed."""
+
+
+def _float(value):
+    if isinstance(value, bool):
+        raise TypeError(value)
+    value = float(value)
+    if not math.isfinite(value):
+        raise ValueError(value)
+    return value
+
+
+def _int(value):
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        raise TypeError(value)
+    return int(value)
+
+
+def _label(value):
+    if value is None:
+        return ""
+    if not isinstance(value, str):
+        raise TypeError(value)
+    if len(value) > CanvasState._meta.get_field("label").max_length:
+        raise ValueError(value)
+    return value
+
+
+def _list(value):
+    if not isinstance(value, list):
+        raise TypeError(value)
+    return value
+
+
+FIELD_TYPES = {
+    "label": _label,
+    "x": _float, "y": _float, "width": _float, "height": _float,
+    "rotation": _float, "scaleX": _float, "scaleY": _float,
+    "sequence": _int,
+    "sourceGripIndex": _int, "targetGripIndex": _int,
+    "waypoints": _list,
+}
+
+
+def _clean(field, value):
+    """`value` as the type of column `field`; CanvasDeltaError if it can't be."""
+    try:
+        return FIELD_TYPES[field](value)
+    except (TypeError, ValueError, OverflowError):
+        raise CanvasDeltaError(f"Invalid {field}: {value!r}")
+
+
+def _set_fields(obj, entry, defaults):
+    for field, default in defaults.items():
+        setattr(obj, field, _clean(field, entry.get(field, default)))
+
+
+def _is_pk(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _as_uuid(value):
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        return None
+
+
+def _key(entry):
+    """How an existing row is addressed: ("uid", UUID) or ("id", int)."""
+    uid = _as_uuid(entry.get("uid"))
+    if uid is not None:
+        return "uid", uid
+    if _is_pk(entry.get("id")):
+        return "id", entry["id"]
+    return None
+
+
+def _ref_key(value):
+    """Same as _key() for a bare reference (removed list, connection endpoint)."""
+    if _is_pk(value):
+        return "id", value
+    uid = _as_uuid(value)
+    return ("uid", uid) if uid is not None else None
+
+
+def _key_filter(keys):
+    """Q selecting rows by a list of ("id"|"uid", value) keys."""
+    ids = [value for kind, value in keys if kind == "id"]
+    uids = [value for kind, value in keys if kind == "uid"]
+    return Q(id__in=ids) | Q(uid__in=uids)
+
+
+def _save_rows(model, rows, fields):
+    """bulk_update rows that already exist and bulk_create the rest."""
+    to_update = [obj for obj in rows if obj.pk is not None]
+    to_create = [obj for obj in rows if obj.pk is None]
+    _check_uids(model, rows, to_create)
+    if to_update:
+        model.objects.bulk_update(to_update, fields, batch_size=500)
+    if to_create:
+        model.objects.bulk_create(to_create, batch_size=500)
+
+
+def _check_uids(model, rows, to_create):
+    """
+    CanvasDeltaError if two rows share a uid or a new row reuses a stored
+    one, checked up front rather than read out of the (project, uid)
+    IntegrityError, whose text differs between databases.
+    """
+    uids = [obj.uid for obj in rows]
+    duplicate = len(set(uids)) != len(uids)
+    if not duplicate and to_create:
+        duplicate = model.objects.filter(
+            project_id=to_create[0].project_id, uid__in=[obj.uid for obj in to_create]
+        ).exists()
+    if duplicate:
+        raise CanvasDeltaError(f"Duplicate {model.__name__} uid in payload.")
+
+
+def _check_component_ids(items):
+    """CanvasDeltaError unless every item's component_id is an existing component."""
+    bad = [item.get("component_id") for item in items if not _is_pk(item.get("component_id"))]
+    if bad:
+        raise CanvasDeltaError(f"Invalid component_id: {bad[0]!r}")
+    component_ids = {item["component_id"] for item in items}
+    known = set(Component.objects.filter(id__in=component_ids).values_list("id", flat=True))
+    unknown = component_ids - known
+    if unknown:
+        raise CanvasDeltaError(f"Unknown component_id: {min(unknown)}")
+
+
+# ---------------------------------------------------------------------------
+# Full save
+# ---------------------------------------------------------------------------
+
+def replace_canvas_state(project, canvas_data):
+    """
+    Make the project's canvas match `canvas_data` ({"items", "connections"}).
+    Rows are matched by uid and updated in place; unmatched rows are deleted.
+    Items without a component_id are skipped.
+    """
+    items_data = [item for item in canvas_data.get("items", []) if item.get("component_id")]
+    connections_data = canvas_data.get("connections", [])
+    # An unknown id would only fail the foreign key, on Postgres at commit
+    _check_component_ids(items_data)
+
+    with transaction.atomic():
+        existing = {obj.uid: obj for obj in CanvasState.objects.filter(project=project)}
+        item_rows = []
+        for item in items_data:
+            uid = _as_uuid(item.get("uid"))
+            obj = existing.pop(uid, None)
+            if obj is None:
+                obj = CanvasState(project=project, uid=uid or uuid.uuid4())
+            obj.component_id = item.get("component_id")
+            _set_fields(obj, item, ITEM_DEFAULTS)
+            item_rows.append((item, obj))
+
+        # Whatever wasn't matched is gone (cascades its connections)
+        if existing:
+            CanvasState.objects.filter(id__in=[obj.id for obj in existing.values()]).delete()
+
+        _save_rows(CanvasState, [obj for _, obj in item_rows], ITEM_FIELDS + ("component",))
+
+        # Connections may point at items by payload id, uid or row id
+        id_map = {}
+        for item, obj in item_rows:
+            id_map[obj.id] = obj.id
+            for ref in (item.get("id"), item.get("uid")):
+                if ref is not None:
+                    id_map[str(ref)] = obj.id
+
+        existing = {
+            obj.uid: obj for obj in Connection.objects.filter(project=project)
+        }
+        conn_rows = []
+        for conn in connections_data:
+            source_id = _lookup(conn.get("sourceItemId"), id_map)
+            target_id = _lookup(conn.get("targetItemId"), id_map)
+            if not (source_id and target_id):
+                continue
+            uid = _as_uuid(conn.get("uid"))
+            obj = existing.pop(uid, None)
+            if obj is None:
+                obj = Connection(project=project, uid=uid or uuid.uuid4())
+            obj.sourceItemId_id = source_id
+            obj.targetItemId_id = target_id
+            _set_fields(obj, conn, CONNECTION_DEFAULTS)
+            conn_rows.append(obj)
+
+        if existing:
+            Connection.objects.filter(id__in=[obj.id for obj in existing.values()]).delete()
+
+        _save_rows(Connection, conn_rows, CONNECTION_FIELDS + ("sourceItemId", "targetItemId"))
+
+
+def _lookup(ref, id_map):
+    if ref is None:
+        return None
+    # Payload ids/uids first; a bare int is only trusted if it's one of ours
+    return id_map.get(str(ref)) or (id_map.get(ref) if _is_pk(ref) else None)
+
+
+# ---------------------------------------------------------------------------
+# Incremental save
+# ---------------------------------------------------------------------------
+
+def _section(delta, name):
+    section = delta.get(name) or {}
+    if not isinstance(section, dict):
+        raise CanvasDeltaError(f"'{name}' must be an object with added/updated/removed lists.")
+    added = list(section.get("added") or [])
+    updated = list(section.get("updated") or [])
+    removed = list(section.get("removed") or [])
+
+    if not all(isinstance(entry, dict) for entry in added + updated):
+        raise CanvasDeltaError(f"'{name}' entries must be objects.")
+    bad = [entry.get("uid", entry.get("id")) for entry in updated if _key(entry) is None]
+    bad += [ref for ref in removed if _ref_key(ref) is None]
+    if bad:
+        raise CanvasDeltaError(f"Invalid {name} keys: {bad}")
+    return added, updated, [_ref_key(ref) for ref in removed]
+
+
+def apply_canvas_delta(project, delta):
+    """
+    Apply a canvas delta to `project` in one transaction, touching only the
+    rows it names. Returns {"items": {tmp: id}, "connections": {tmp: id}}.
+    """
+    if not isinstance(delta, dict):
+        raise CanvasDeltaError("Canvas delta must be an object.")
+
+    items_added, items_updated, items_removed = _section(delta, "items")
+    conns_added, conns_updated, conns_removed = _section(delta, "connections")
+
+    item_map = {}
+    conn_map = {}
+
+    with transaction.atomic():
+        # Removals first so re-added rows never collide with stale ones
+        if conns_removed:
+            Connection.objects.filter(
+                _key_filter(conns_removed), project=project
+            ).delete()
+        if items_removed:
+            # Cascades to any connection still attached to these items
+            CanvasState.objects.filter(_key_filter(items_removed), project=project).delete()
+
+        if items_added:
+            item_map = _create_items(project, items_added)
+        if items_updated:
+            _update_rows(
+                CanvasState.objects.filter(project=project),
+                items_updated, ITEM_FIELDS, "Canvas item",
+            )
+
+        if conns_added:
+            conn_map = _create_connections(project, conns_added, item_map)
+        if conns_updated:
+            _update_rows(
+                Connection.objects.filter(project=project),
+                conns_updated, CONNECTION_FIELDS, "Connection",
+            )
+
+        bump_revision([project.pk])
+
+    return {"items": item_map, "connections": conn_map}
+
+
+def _create_items(project, items):
+    _check_component_ids(items)
+
+    new_items = []
+    for item in items:
+        obj = CanvasState(
+            project=project,
+            component_id=item["component_id"],
+            uid=_as_uuid(item.get("uid")) or uuid.uuid4(),
+        )
+        _set_fields(obj, item, ITEM_DEFAULTS)
+        new_items.append(obj)
+
+    _save_rows(CanvasState, new_items, ITEM_FIELDS)
+    return {
+        str(item["id"]): obj.id
+        for item, obj in zip(items, new_items)
+        if item.get("id") is not None
+    }
+
+
+def _update_rows(queryset, entries, fields, label):
+    keys = [_key(entry) for entry in entries]
+    rows = list(queryset.filter(_key_filter(keys)))
+    by_key = {("id", obj.id): obj for obj in rows}
+    by_key.update({("uid", obj.uid): obj for obj in rows})
+
+    changed_fields = set()
+    for key, entry in zip(keys, entries):
+        obj = by_key.get(key)
+        if obj is None:
+            raise CanvasDeltaError(f"{label} {key[1]} does not exist in this project.")
+        for field in fields:
+            if field in entry:
+                setattr(obj, field, _clean(field, entry[field]))
+                changed_fields.add(field)
+
+    if changed_fields:
+        queryset.model.objects.bulk_update(rows, sorted(changed_fields))
+
+
+def _resolve_item_ids(project, conns, item_map):
+    """Map every sourceItemId/targetItemId (temporary id, uid or row id) to a row id."""
+    refs = set()
+    for conn in conns:
+        refs.add(conn.get("sourceItemId"))
+        refs.add(conn.get("targetItemId"))
+
+    resolved = {}
+    lookups = []
+    for ref in refs:
+        if ref is not None and str(ref) in item_map:
+            resolved[ref] = item_map[str(ref)]
+        elif _ref_key(ref) is not None:
+            lookups.append((ref, _ref_key(ref)))
+
+    if lookups:
+        owned = CanvasState.objects.filter(
+            _key_filter([key for _, key in lookups]), project=project
+        ).values_list("id", "uid")
+        by_key = {}
+        for pk, uid in owned:
+            by_key[("id", pk)] = pk
+            by_key[("uid", uid)] = pk
+        for ref, key in lookups:
+            if key in by_key:
+                resolved[ref] = by_key[key]
+
+    missing = refs - set(resolved)
+    if missing:
+        raise CanvasDeltaError(f"Connections reference unknown canvas items: {sorted(map(str, missing))}")
+    return resolved
+
+
+def _create_connections(project, conns, item_map):
+    resolved = _resolve_item_ids(project, conns, item_map)
+
+    new_conns = []
+    for conn in conns:
+        obj = Connection(
+            project=project,
+            sourceItemId_id=resolved[conn.get("sourceItemId")],
+            targetItemId_id=resolved[conn.get("targetItemId")],
+            uid=_as_uuid(conn.get("uid")) or uuid.uuid4(),
+        )
+        _set_fields(obj, conn, CONNECTION_DEFAULTS)
+        new_conns.append(obj)
+
+    _save_rows(Connection, new_conns, CONNECTION_FIELDS)
+    return {
+        str(conn["id"]): obj.id
+        for conn, obj in zip(conns, new_conns)
+        if conn.get("id") is not None
+    }
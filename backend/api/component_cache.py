@@ -0,0 +1,75 @@
+"""
+Cached component list for the shared default components.
+
+Default components (created_by=None) are the same for every user and make up
+nearly all of the catalog, so their serialized form is cached instead of being
+re-queried and re-serialized (file URLs included) on every list request. Each
+request then only queries the user's own components and merges the two.
+
+The cache key carries:
+* a generation counter, bumped by invalidate() on every component save or
+  delete (signals.py) and by the bulk writers that skip signals: the ZIP
+  import (component_import.py) and seed_components;
+* a fingerprint (count + newest updated_at) of the default rows, so other
+  processes with their own local-memory cache see rows that were added,
+  removed or saved with a new updated_at;
+* the request origin, since file URLs are absolute.
+
+A queryset.update() leaves updated_at alone and sends no signal, so call
+invalidate() after one; otherwise the old list is served until
+COMPONENT_CACHE_TIMEOUT.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from .models import Component
+from .serializers import requested_fields, serialize_components
+
+GENERATION_KEY = "components:defaults:generation"
+
+
+def listable(queryset):
+    """Components the list endpoint shows: both files present."""
+    return queryset.filter(svg__isnull=False, png__isnull=False).exclude(svg="", png="")
+
+
+def default_components(request):
+    """Serialized default components, from the cache when possible."""
+    defaults = listable(Component.objects.filter(created_by__isnull=True))
+    agg = defaults.aggregate(count=Count("id"), latest=Max("updated_at"))
+    latest = agg["latest"].isoformat() if agg["latest"] else ""
+
+    key = ":".join([
+        "components:defaults",
+        str(cache.get_or_set(GENERATION_KEY, 0, timeout=None)),
+        f"{agg['count']}@{latest}",
+        request.build_absolute_uri("/"),
+    ])
+    data = cache.get(key)
+    if data is None:
+        # Always cache every field; ?fields= is applied per request
+        data = serialize_components(defaults.order_by("s_no"), request)
+        cache.set(key, data, timeout=settings.COMPONENT_CACHE_TIMEOUT)
+    return data
+
+
+def component_list(request):
+    """Default components (cached) merged with the user's own, by s_no."""
+    own = listable(Component.objects.filter(created_by=request.user))
+    own_data = serialize_components(own, request)
+    components = sorted([*default_components(request), *own_data], key=lambda c: c["s_no"])
+
+    fields = requested_fields(request)
+    if fields is not None:
+        components = [{k: v for k, v in c.items() if k in fields} for c in components]
+    return components
+
+
+def invalidate():
+    """Drop the cached default component list."""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        # Not set yet (or evicted): nothing cached under the current key
+        cache.set(GENERATION_KEY, 1, timeout=None)
@@ -0,0 +1,93 @@
+"""
+Component changes feed: GET /api/components/changes/?since=<token>
+
+Lets a client that already holds the component list catch up with one small
+request instead of downloading the whole catalog:
+
+    {
+        "token": "<pass as ?since= next time>",
+        "full": false,
+        "created": [<component>, ...],
+        "updated": [<component>, ...],
+        "deleted": [<component id>, ...]
+    }
+
+Changes come from Component.updated_at / created_at and, for deletions,
+ComponentTombstone rows written by signals.py. A token is the server time the
+previous response was built at, minus SAFETY_MARGIN so rows saved by
+transactions still open at that moment are picked up next time; clients must
+therefore apply changes idempotently. Without a token, or with one older than
+the tombstone retention window, the response is "full": every visible
+component under "created" and nothing under "deleted".
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .component_cache import listable
+from .models import Component, ComponentTombstone
+from .serializers import ComponentSerializer
+
+SAFETY_MARGIN = timedelta(seconds=5)
+
+
+def retention():
+    return timedelta(days=settings.COMPONENT_TOMBSTONE_DAYS)
+
+
+def make_token(moment):
+    return str(int(moment.timestamp() * 1_000_000))
+
+
+def parse_token(token):
+    try:
+        return datetime.fromtimestamp(int(token) / 1_000_000, tz=dt_timezone.utc)
+    except (TypeError, ValueError, OverflowError, OSError):
+        raise ValidationError({"since": "Invalid sync token."})
+
+
+def changes_since(request, token=None):
+    """Build the changes payload for request.user."""
+    now = timezone.now()
+    since = parse_token(token) if token else None
+    full = since is None or since < now - retention()
+
+    visible = Q(created_by=request.user) | Q(created_by__isnull=True)
+    components = listable(Component.objects.filter(visible)).order_by("s_no")
+    if not full:
+        components = components.filter(updated_at__gte=since)
+
+    created, updated = [], []
+    data = ComponentSerializer(components, many=True, context={"request": request}).data
+    for obj, item in zip(components, data):
+        is_new = full or (obj.created_at is not None and obj.created_at >= since)
+        (created if is_new else updated).append(item)
+
+    deleted = []
+    if not full:
+        deleted = list(
+            ComponentTombstone.objects.filter(visible, deleted_at__gte=since)
+            .values_list("component_id", flat=True).distinct()
+        )
+
+    return {
+        "token": make_token(now - SAFETY_MARGIN),
+        "full": full,
+        "created": created,
+        "updated": updated,
+        "deleted": deleted,
+    }
+
+
+def record_deletion(component):
+    """Write a tombstone for a deleted component and drop expired ones."""
+    now = timezone.now()
+    ComponentTombstone.objects.filter(deleted_at__lt=now - retention()).delete()
+    ComponentTombstone.objects.create(
+        component_id=component.pk,
+        s_no=component.s_no,
+        created_by_id=component.created_by_id,
+    )
@@ -0,0 +1,272 @@
+"""
+Bulk component import from a ZIP archive.
+
+Used by the admin "Upload ZIP" page, POST /api/components/import/ and
+`manage.py import_components`. The archive layout is the one the admin page
+has always accepted:
+
+    components/
+        <anything>.csv      s_no,name,parent,legend,suffix,object,grips
+        svg/<name>.svg
+        png/<name>.png
+
+Folder names are matched case-insensitively. Members are read straight from
+the archive (nothing is extracted to disk), existing components are fetched
+by s_no once per batch, assets are only rewritten when their sha256 differs
+from the stored one, and rows are written with bulk_create / bulk_update.
+Assets go to the content-addressed storage (see storage.py), so identical
+files are stored once and replaced ones are released after the write.
+"""
+import csv
+import hashlib
+import io
+import json
+import zipfile
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+
+from . import component_cache, snapshots, storage
+from .conditional import bump_revision
+from .models import CanvasState, Component
+
+BATCH_SIZE = 200
+
+# Optional CSV columns; a missing column keeps the current value
+OPTIONAL_COLUMNS = ("parent", "legend", "suffix", "object")
+ASSETS = ("svg", "png")
+
+
+class ComponentImportError(ValueError):
+    """The archive can't be imported at all (bad ZIP, missing CSV/folders)."""
+
+
+class ImportReport:
+    def __init__(self):
+        self.created = []   # s_no
+        self.updated = []
+        self.skipped = []   # unchanged rows
+        self.errors = []    # (s_no or row number, message); the row is not imported
+        self.warnings = []  # (s_no, message); the row is imported anyway
+
+    def as_dict(self):
+        return {
+            "created": len(self.created),
+            "updated": len(self.updated),
+            "skipped": len(self.skipped),
+            "errors": [{"row": row, "message": message} for row, message in self.errors],
+            "warnings": [{"row": row, "message": message} for row, message in self.warnings],
+            "created_s_nos": self.created,
+            "updated_s_nos": self.updated,
+        }
+
+    def summary(self):
+        return (
+            f"Created {len(self.created)}, updated {len(self.updated)}, "
+            f"skipped {len(self.skipped)} unchanged, {len(self.errors)} errors, "
+            f"{len(self.warnings)} warnings"
+        )
+
+
+class _Archive:
+    """Index of the members under components/ in an open ZipFile."""
+
+    def __init__(self, zf):
+        self.zf = zf
+        self.csv = None
+        self.assets = {}   # (folder, filename) -> ZipInfo
+
+        for info in zf.infolist():
+            if info.is_dir():
+                continue
+            parts = info.filename.split("/")
+            if len(parts) < 2 or parts[0].lower() != "components":
+                continue
+            if len(parts) == 2 and parts[1].lower().endswith(".csv"):
+                self.csv = self.csv or info
+            elif len(parts) == 3:
+                self.assets[(parts[1].lower(), parts[2])] = info
+
+        if not any(name.split("/")[0].lower() == "components" for name in zf.namelist()):
+            raise ComponentImportError("Components folder not found in ZIP.")
+        if self.csv is None:
+            raise ComponentImportError("CSV file not found in components folder.")
+        folders = {folder for folder, _ in self.assets}
+        missing = [f for f in ASSETS if f not in folders]
+        if missing:
+            raise ComponentImportError(f"Missing folders: {', '.join(missing)}")
+
+    def rows(self):
+        with self.zf.open(self.csv) as raw:
+            yield from csv.DictReader(io.TextIOWrapper(raw, encoding="utf-8-sig", newline=""))
+
+    def asset(self, kind, name):
+        info = self.assets.get((kind, f"{name}.{kind}"))
+        return self.zf.read(info) if info else None
+
+
+def import_components_zip(fileobj, batch_size=BATCH_SIZE, created_by=None):
+    """Import every row of the archive; returns an ImportReport."""
+    try:
+        zf = zipfile.ZipFile(fileobj)
+    except zipfile.BadZipFile:
+        raise ComponentImportError("Please upload a valid ZIP file.")
+
+    report = ImportReport()
+    with zf:
+        archive = _Archive(zf)
+        seen = set()
+        batch = []
+        for number, row in enumerate(archive.rows(), start=2):  # row 1 is the header
+            parsed = _parse_row(row, number, report, seen)
+            if parsed is not None:
+                batch.append(parsed)
+            if len(batch) >= batch_size:
+                _import_batch(archive, batch, report, created_by)
+                batch = []
+        if batch:
+            _import_batch(archive, batch, report, created_by)
+
+    if report.created or report.updated:
+        component_cache.invalidate()
+    return report
+
+
+def _parse_row(row, number, report, seen):
+    s_no = (row.get("s_no") or "").strip()
+    name = (row.get("name") or "").strip()
+    if not s_no or not name:
+        report.errors.append((number, "Missing name or s_no"))
+        return None
+
+    values = {"name": name}
+    for column in OPTIONAL_COLUMNS:
+        if row.get(column) is not None:
+            values[column] = row[column]
+    # bulk_create / bulk_update don't validate, and not every database
+    # enforces max_length
+    for field, value in (("s_no", s_no), *values.items()):
+        max_length = Component._meta.get_field(field).max_length
+        if len(value) > max_length:
+            report.errors.append((s_no, f"{field} is longer than {max_length} characters"))
+            return None
+
+    if s_no in seen:
+        report.errors.append((s_no, "Duplicate s_no in CSV"))
+        return None
+    seen.add(s_no)
+
+    grips = row.get("grips")
+    try:
+        values["grips"] = json.loads(grips) if grips else []
+    except json.JSONDecodeError:
+        report.warnings.append((s_no, "Invalid JSON in grips, imported without grips"))
+        values["grips"] = []
+    return s_no, values
+
+
+def stored_hash(component, kind):
+    """sha256 of the stored asset, computing it for rows imported before hashing."""
+    stored = getattr(component, f"{kind}_hash")
+    field = getattr(component, kind)
+    if stored or not field:
+        return stored
+    if storage.content_hash(field.name):
+        return storage.content_hash(field.name)
+    try:
+        with field.open("rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except (OSError, ValueError):
+        return ""
+
+
+def apply_asset(component, kind, filename, data, replaced):
+    """
+    Point component.<kind> at `data`, writing the file only if its sha256
+    differs from the stored one. Returns the set of changed fields; the
+    replaced file name is appended to `replaced` for storage.release_on_commit().
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    if component.pk is not None and digest == stored_hash(component, kind):
+        if getattr(component, f"{kind}_hash"):
+            return set()
+        setattr(component, f"{kind}_hash", digest)
+        return {f"{kind}_hash"}
+
+    field = getattr(component, kind)
+    if field:
+        replaced.append(field.name)
+    field.save(filename, ContentFile(data), save=False)
+    setattr(component, f"{kind}_hash", digest)
+    return {kind, f"{kind}_hash"}
+
+
+def write_components(to_create=(), to_update=(), fields=(), hash_only=(), replaced=()):
+    """
+    Write a batch in one transaction: bulk_create `to_create`, bulk_update
+    `fields` of `to_update` and the hashes of `hash_only`. Projects embedding
+    updated components are refreshed (bulk_update skips signals) and
+    replaced asset files released afterwards.
+    """
+    if not (to_create or to_update or hash_only):
+        return
+    with transaction.atomic():
+        if hash_only:
+            Component.objects.bulk_update(hash_only, ["svg_hash", "png_hash"], batch_size=BATCH_SIZE)
+        if to_create:
+            Component.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+        if to_update:
+            Component.objects.bulk_update(
+                to_update, sorted(set(fields) | {"updated_at"}), batch_size=BATCH_SIZE
+            )
+            project_ids = list(
+                CanvasState.objects.filter(component__in=to_update)
+                .values_list("project_id", flat=True).distinct()
+            )
+            if project_ids:
+                bump_revision(project_ids)
+                snapshots.projects_changed(project_ids)
+
+    # Old files may still be shared with other components
+    storage.release_on_commit(*replaced)
+
+
+def _import_batch(archive, batch, report, created_by):
+    existing = Component.objects.in_bulk([s_no for s_no, _ in batch], field_name="s_no")
+    now = timezone.now()
+    to_create, to_update, hash_only, changed_fields = [], [], [], set()
+    replaced = []
+
+    for s_no, values in batch:
+        component = existing.get(s_no)
+        is_new = component is None
+        if is_new:
+            component = Component(s_no=s_no, created_by=created_by)
+
+        dirty = set()
+        for field, value in values.items():
+            if getattr(component, field) != value:
+                setattr(component, field, value)
+                dirty.add(field)
+
+        for kind in ASSETS:
+            data = archive.asset(kind, values["name"])
+            if data is not None:
+                dirty |= apply_asset(component, kind, f"{values['name']}.{kind}", data, replaced)
+
+        if is_new:
+            to_create.append(component)
+            report.created.append(s_no)
+        elif dirty - {"svg_hash", "png_hash"}:
+            component.updated_at = now
+            to_update.append(component)
+            changed_fields |= dirty
+            report.updated.append(s_no)
+        else:
+            if dirty:
+                # Only backfilled hashes of rows imported before hashing
+                hash_only.append(component)
+            report.skipped.append(s_no)
+
+    write_components(to_create, to_update, changed_fields, hash_only, replaced)
@@ -0,0 +1,281 @@
+"""
+Match AI-generated diagrams onto the component catalog.
+
+The LLM answers with free-form components ({"id": "c1", "type": "pump",
+"variant": "centrifugal pump", "label": "Feed Pump"}). match_diagram() resolves
+each one to a default Component and returns a canvas delta the editor can
+PATCH to /api/project/<id>/canvas/ as is:
+
+    {
+        "items": {"added": [{"id": "c1", "component_id": 12, "x": 40, ...}]},
+        "connections": {"added": [{"sourceItemId": "c1", "targetItemId": "c2", ...}]},
+        "unmatched": [{"id": "c5", "type": ..., "variant": ..., "label": ...}]
+    }
+
+Lookups go through a CatalogIndex built once from the default components:
+
+* a token index over name (weight 3), object (2, CamelCase split), parent and
+  legend (1 each), for whole-word hits;
+* a trigram index over name, for spelling variants ("centrifugal pumps",
+  "heatexchanger").
+
+The index is process-local and rebuilt when its version changes: the
+component_cache generation (bumped on every component write and ZIP upload)
+plus a count/newest updated_at fingerprint of the defaults, so writes that
+bypass signals are picked up too.
+
+Items are laid out in layers by longest path from the sources (cycles are
+broken at the earliest item still waiting), left to right, one row per item
+in a layer.
+"""
+import re
+import threading
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from .canvas_sync import CONNECTION_DEFAULTS, ITEM_DEFAULTS
+from .component_cache import GENERATION_KEY
+from .models import Component
+
+FIELD_WEIGHTS = {"name": 3, "object": 2, "parent": 1, "legend": 1}
+STOPWORDS = {"and", "or", "of", "for", "the", "with", "to", "a", "an"}
+TOKEN_WEIGHT = 0.6
+TRIGRAM_WEIGHT = 0.4
+# A variant must score at least this to count as a match
+MIN_SCORE = 0.3
+# Falling back from variant to type costs a little confidence
+TYPE_PENALTY = 0.9
+
+LAYER_GAP = 150
+ROW_GAP = 120
+ORIGIN = (40, 40)
+
+
+def _split_camel(text):
+    return re.sub(r"(?<=[a-z0-9])(?=[A-Z])", " ", text or "")
+
+
+def _singular(token):
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text):
+    words = re.findall(r"[a-z0-9]+", (text or "").lower())
+    return [_singular(w) for w in words if len(w) > 1 and w not in STOPWORDS]
+
+
+def trigrams(text):
+    compact = " ".join(tokenize(text))
+    if not compact:
+        return set()
+    padded = f"  {compact} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class CatalogIndex:
+    """Token and trigram lookups over the default components."""
+
+    def __init__(self, rows):
+        # rows: (id, s_no, name, object, parent, legend, grips)
+        self.components = {}
+        self.tokens = defaultdict(dict)      # token -> {component id: best field weight}
+        self.trigrams = defaultdict(set)     # trigram -> {component id}
+        self.trigram_counts = {}
+
+        for pk, s_no, name, object_name, parent, legend, grips in rows:
+            self.components[pk] = {"s_no": s_no, "name": name, "object": object_name, "grips": grips or []}
+            fields = {
+                "name": name,
+                "object": _split_camel(object_name),
+                "parent": parent,
+                "legend": legend,
+            }
+            for field, text in fields.items():
+                weight = FIELD_WEIGHTS[field]
+                for token in tokenize(text):
+                    postings = self.tokens[token]
+                    if postings.get(pk, 0) < weight:
+                        postings[pk] = weight
+            grams = trigrams(name)
+            self.trigram_counts[pk] = len(grams)
+            for gram in grams:
+                self.trigrams[gram].add(pk)
+
+    def search(self, text):
+        """Best (component id, score) for `text`, or (None, 0.0)."""
+        query_tokens = list(dict.fromkeys(tokenize(text)))
+        query_grams = trigrams(text)
+        if not query_tokens and not query_grams:
+            return None, 0.0
+
+        token_hits = defaultdict(int)
+        for token in query_tokens:
+            for pk, weight in self.tokens.get(token, {}).items():
+                token_hits[pk] += weight
+        gram_hits = defaultdict(int)
+        for gram in query_grams:
+            for pk in self.trigrams.get(gram, ()):
+                gram_hits[pk] += 1
+
+        best, best_score = None, 0.0
+        token_total = FIELD_WEIGHTS["name"] * len(query_tokens) or 1
+        for pk in token_hits.keys() | gram_hits.keys():
+            dice = 2 * gram_hits[pk] / ((len(query_grams) + self.trigram_counts[pk]) or 1)
+            score = TOKEN_WEIGHT * token_hits[pk] / token_total + TRIGRAM_WEIGHT * dice
+            # Ties go to the lowest s_no, so results are stable
+            if score > best_score or (
+                score == best_score and best is not None
+                and self.components[pk]["s_no"] < self.components[best]["s_no"]
+            ):
+                best, best_score = pk, score
+        return best, round(best_score, 4)
+
+    def match(self, component):
+        """Resolve one LLM component by variant, then type, then label."""
+        candidates = [
+            (component.get("variant"), 1.0),
+            (component.get("type"), TYPE_PENALTY),
+            (component.get("label"), TYPE_PENALTY),
+        ]
+        for text, factor in candidates:
+            if not isinstance(text, str):
+                continue
+            pk, score = self.search(text.replace("_", " "))
+            score = round(score * factor, 4)
+            if pk is not None and score >= MIN_SCORE:
+                return pk, score
+        return None, 0.0
+
+
+_lock = threading.Lock()
+_index = {"version": None, "index": None}
+
+
+def _version():
+    defaults = Component.objects.filter(created_by__isnull=True)
+    agg = defaults.aggregate(count=Count("id"), latest=Max("updated_at"))
+    latest = agg["latest"].isoformat() if agg["latest"] else ""
+    return f"{cache.get_or_set(GENERATION_KEY, 0, timeout=None)}:{agg['count']}@{latest}"
+
+
+def get_index():
+    """The catalog index, rebuilt only when the default components changed."""
+    version = _version()
+    with _lock:
+        if _index["version"] != version:
+            rows = Component.objects.filter(created_by__isnull=True).order_by("s_no").values_list(
+                "id", "s_no", "name", "object", "parent", "legend", "grips"
+            )
+            _index["index"] = CatalogIndex(rows)
+            _index["version"] = version
+        return _index["index"]
+
+
+def layered_layout(ids, edges):
+    """
+    {id: (layer, row)} for `ids` (in order) and `edges` [(source, target)]:
+    an item's layer is one more than the deepest item feeding it.
+    """
+    preds = {node: [] for node in ids}
+    succs = {node: [] for node in ids}
+    for source, target in edges:
+        if source in preds and target in preds and source != target:
+            succs[source].append(target)
+            preds[target].append(source)
+
+    waiting = {node: len(preds[node]) for node in ids}
+    layer = {}
+    ready = [node for node in ids if waiting[node] == 0]
+    while len(layer) < len(ids):
+        if not ready:
+            # Only cycles left: break one at the earliest item still waiting
+            ready = [next(node for node in ids if node not in layer)]
+        node = ready.pop(0)
+        if node in layer:
+            continue
+        placed = [layer[p] for p in preds[node] if p in layer]
+        layer[node] = max(placed) + 1 if placed else 0
+        for succ in succs[node]:
+            waiting[succ] -= 1
+            if waiting[succ] == 0 and succ not in layer:
+                ready.append(succ)
+
+    rows = defaultdict(int)
+    positions = {}
+    for node in ids:
+        positions[node] = (layer[node], rows[layer[node]])
+        rows[layer[node]] += 1
+    return positions
+
+
+def _grip(grips, sides):
+    for side in sides:
+        for i, grip in enumerate(grips):
+            if isinstance(grip, dict) and grip.get("side") == side:
+                return i
+    return 0
+
+
+def match_diagram(diagram, index=None):
+    """Turn an LLM diagram into a canvas delta of catalog components (see module doc)."""
+    index = index or get_index()
+    components = [c for c in diagram.get("components", []) if isinstance(c, dict)]
+
+    matched = {}
+    unmatched = []
+    for component in components:
+        pk, score = index.match(component)
+        if pk is None or str(component.get("id")) in matched:
+            unmatched.append(component)
+        else:
+            matched[str(component.get("id"))] = (component, pk, score)
+
+    edges = []
+    for conn in diagram.get("connections", []):
+        if not isinstance(conn, dict):
+            continue
+        source, target = str(conn.get("from")), str(conn.get("to"))
+        if source in matched and target in matched:
+            edges.append((source, target))
+
+    positions = layered_layout(list(matched), edges)
+    items = []
+    for sequence, (temp_id, (component, pk, score)) in enumerate(matched.items()):
+        entry = index.components[pk]
+        layer, row = positions[temp_id]
+        item = dict(ITEM_DEFAULTS)
+        item.update({
+            "id": temp_id,
+            "component_id": pk,
+            "s_no": entry["s_no"],
+            "name": entry["name"],
+            "object": entry["object"],
+            "grips": entry["grips"],
+            "label": component.get("label") or entry["name"],
+            "x": ORIGIN[0] + layer * LAYER_GAP,
+            "y": ORIGIN[1] + row * ROW_GAP,
+            "sequence": sequence,
+            "score": score,
+        })
+        items.append(item)
+
+    connections = []
+    for source, target in edges:
+        connection = dict(CONNECTION_DEFAULTS, waypoints=[])
+        connection.update({
+            "sourceItemId": source,
+            "targetItemId": target,
+            "sourceGripIndex": _grip(index.components[matched[source][1]]["grips"], ("right", "bottom")),
+            "targetGripIndex": _grip(index.components[matched[target][1]]["grips"], ("left", "top")),
+        })
+        connections.append(connection)
+
+    return {
+        "items": {"added": items},
+        "connections": {"added": connections},
+        "unmatched": unmatched,
+    }
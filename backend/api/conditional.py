@@ -0,0 +1,71 @@
+"""
+Conditional GET for the component list and project detail.
+
+Both endpoints send an ETag and Last-Modified, and answer 304 Not Modified
+when the client's If-None-Match / If-Modified-Since still match:
+
+* Components: derived from the row count and newest updated_at of the
+  components the user can see (plus the query string), so adds, edits and
+  deletes all change the ETag. Last-Modified can't see deletions, so clients
+  should prefer the ETag; Django only falls back to If-Modified-Since when no
+  If-None-Match is sent.
+* Projects: derived from Project.revision, which every project or canvas
+  write bumps (bump_revision), and from component edits that change what
+  the project embeds (signals.py).
+"""
+import hashlib
+
+from django.db.models import Count, F, Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .models import Project
+
+
+def component_validators(request, queryset):
+    """(etag, last_modified) for a component list queryset."""
+    agg = queryset.order_by().aggregate(count=Count("id"), latest=Max("updated_at"))
+    latest = agg["latest"]
+    key = "|".join([
+        str(request.user.pk),
+        str(agg["count"]),
+        latest.isoformat() if latest else "",
+        request.META.get("QUERY_STRING", ""),
+    ])
+    etag = '"c-%s"' % hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]
+    return etag, latest
+
+
+def project_validators(project, variant=""):
+    """
+    (etag, last_modified) for a project's retrieve payload. `variant` tells
+    apart other representations of the same revision (e.g. normalized).
+    """
+    suffix = f"-{variant}" if variant else ""
+    return f'"p-{project.pk}-{project.revision}{suffix}"', project.updated_at
+
+
+def not_modified(request, etag, last_modified):
+    """A 304 response if the request's validators still match, else None."""
+    return get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+
+
+def set_validators(response, etag, last_modified):
+    response["ETag"] = etag
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    # Per-user payloads: never share between clients, always revalidate
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def bump_revision(project_ids):
+    """Record a change to these projects (one UPDATE)."""
+    Project.objects.filter(pk__in=project_ids).update(
+        revision=F("revision") + 1, updated_at=timezone.now()
+    )
@@ -0,0 +1,50 @@
+"""
+Query-string filters for list endpoints.
+
+* ?parent=<category>[,<category>...]  components in these categories
+* ?updated_since=<ISO 8601 or HTTP date>  rows changed at or after that
+  moment, for incremental syncs (inclusive, so a client passing the newest
+  timestamp it has seen never misses a same-second change)
+"""
+from email.utils import parsedate_to_datetime
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+
+def parse_timestamp(value):
+    """ISO 8601 or HTTP date -> aware datetime; ValidationError otherwise."""
+    if "T" in value:
+        # An unencoded "+00:00" offset arrives as " 00:00"
+        value = value.replace(" ", "+")
+    try:
+        parsed = parse_datetime(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        try:
+            parsed = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            raise ValidationError({"updated_since": f"Invalid timestamp: {value!r}"})
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, timezone.utc)
+    return parsed
+
+
+class ParentFilter(BaseFilterBackend):
+    def filter_queryset(self, request, queryset, view):
+        value = request.query_params.get("parent")
+        if not value:
+            return queryset
+        parents = [p.strip() for p in value.split(",") if p.strip()]
+        return queryset.filter(parent__in=parents)
+
+
+class UpdatedSinceFilter(BaseFilterBackend):
+    def filter_queryset(self, request, queryset, view):
+        value = request.query_params.get("updated_since")
+        if not value:
+            return queryset
+        return queryset.filter(updated_at__gte=parse_timestamp(value))
@@ -0,0 +1,32 @@
+import time
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.ai_jobs import arun_pending
+
+
+class Command(BaseCommand):
+    help = "Run queued AI generation jobs (POST /api/ai-generate/ with \"async\": true)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=settings.LLM_MAX_CONCURRENCY,
+                            help="Jobs run at the same time")
+        parser.add_argument("--poll", type=float, default=1.0,
+                            help="Seconds between checks for new jobs when idle")
+        parser.add_argument("--once", action="store_true",
+                            help="Run what is queued now, then exit")
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"AI worker started (concurrency {options['concurrency']})")
+        while True:
+            started = time.perf_counter()
+            count = async_to_sync(arun_pending)(concurrency=options["concurrency"])
+            if count:
+                elapsed = time.perf_counter() - started
+                self.stdout.write(self.style.SUCCESS(f"Ran {count} job(s) in {elapsed:.2f}s"))
+            if options["once"]:
+                return
+            if not count:
+                time.sleep(options["poll"])
@@ -0,0 +1,125 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.models import CanvasState, Component, Connection, Project
+from api.views import ProjectDetailView
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed throwaway projects and time ProjectDetailView GET. "
+        "Everything runs in a transaction that is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--projects", type=int, default=2000)
+        parser.add_argument("--items", type=int, default=40, help="Canvas items per project")
+        parser.add_argument("--samples", type=int, default=200, help="Retrieves to time")
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        try:
+            # The view is called directly, so the SSL redirect and the
+            # throttles (20/min would stop the run) never apply
+            with override_settings(ALLOWED_HOSTS=["testserver"]), transaction.atomic():
+                self._run(options)
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+    def _run(self, options):
+        rng = random.Random(options["seed"])
+        n_projects = options["projects"]
+        n_items = options["items"]
+
+        t0 = time.perf_counter()
+        user = get_user_model().objects.create_user(username="__bench_retrieve__")
+        components = [
+            Component.objects.create(s_no=f"BENCH{i}", parent="Bench", name=f"Bench {i}", svg="x.svg", png="x.png")
+            for i in range(20)
+        ]
+        projects = Project.objects.bulk_create(
+            [Project(name=f"Bench {i}", user=user) for i in range(n_projects)], batch_size=1000
+        )
+
+        items = CanvasState.objects.bulk_create(
+            [
+                CanvasState(
+                    project=project,
+                    component=rng.choice(components),
+                    label=f"I{j}",
+                    x=rng.random() * 2000, y=rng.random() * 2000,
+                    width=50, height=50, sequence=j,
+                )
+                for project in projects
+                for j in range(n_items)
+            ],
+            batch_size=2000,
+        )
+
+        conns = []
+        for p_index, project in enumerate(projects):
+            row = items[p_index * n_items:(p_index + 1) * n_items]
+            for a, b in zip(row, row[1:]):
+                conn = Connection(
+                    sourceItemId=a, targetItemId=b,
+                    sourceGripIndex=0, targetGripIndex=1, waypoints=[],
+                )
+                if hasattr(conn, "project_id"):
+                    conn.project_id = project.id
+                conns.append(conn)
+        Connection.objects.bulk_create(conns, batch_size=2000)
+        self.stdout.write(
+            f"Seeded {n_projects} projects, {len(items)} items, {len(conns)} connections "
+            f"in {time.perf_counter() - t0:.1f}s ({connection.vendor})"
+        )
+
+        factory = APIRequestFactory()
+        view = ProjectDetailView.as_view(throttle_classes=())
+        sample = rng.sample(projects, min(options["samples"], n_projects))
+
+        def timed(fn):
+            times = []
+            for project in sample:
+                start = time.perf_counter()
+                fn(project)
+                times.append((time.perf_counter() - start) * 1000)
+            times.sort()
+            return statistics.median(times), times[int(len(times) * 0.95) - 1]
+
+        def retrieve(project):
+            request = factory.get(f"/api/project/{project.id}/")
+            force_authenticate(request, user=user)
+            response = view(request, id=project.id)
+            response.render()
+            if response.status_code != 200:
+                raise CommandError(f"Retrieve returned {response.status_code}: {response.content[:200]!r}")
+
+        self._report("ProjectDetailView GET", *timed(retrieve))
+        self._report(
+            "connections via item join",
+            *timed(lambda p: list(Connection.objects.filter(sourceItemId__project=p).values_list("id"))),
+        )
+        if hasattr(Connection, "project"):
+            self._report(
+                "connections via project column",
+                *timed(lambda p: list(Connection.objects.filter(project=p).values_list("id"))),
+            )
+        self._report(
+            "items ordered by sequence",
+            *timed(lambda p: list(CanvasState.objects.filter(project=p).order_by("sequence").values_list("id"))),
+        )
+
+    def _report(self, label, p50, p95):
+        self.stdout.write(f"{label:<34} p50 {p50:7.2f}ms   p95 {p95:7.2f}ms")
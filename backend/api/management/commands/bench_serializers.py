@@ -0,0 +1,115 @@
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.models import CanvasState, Component, Project
+from api.renderers import ORJSONRenderer
+from api.serializers import (
+    CanvasStateSerializer,
+    ComponentSerializer,
+    serialize_canvas_items,
+    serialize_components,
+)
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare DRF serializers with the .values() read paths (rows/second) "
+        "and JSONRenderer with ORJSONRenderer. Everything runs in a "
+        "transaction that is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--components", type=int, default=2000)
+        parser.add_argument("--items", type=int, default=5000, help="Canvas items in the project")
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (best is kept)")
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        try:
+            # Component URLs are built with request.build_absolute_uri
+            with override_settings(ALLOWED_HOSTS=["localhost"]), transaction.atomic():
+                self._run(options)
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+    def _run(self, options):
+        rng = random.Random(options["seed"])
+        repeat = options["repeat"]
+        grips = [{"x": 0, "y": 50, "side": "left"}, {"x": 100, "y": 50, "side": "right"}]
+
+        t0 = time.perf_counter()
+        user = get_user_model().objects.create_user(username="__bench_serializers__")
+        components = Component.objects.bulk_create(
+            [
+                Component(
+                    s_no=f"BENCH{i:05d}", parent="Bench", name=f"Bench {i}", object=f"Bench{i}",
+                    legend="B", svg=f"components/bench/{i}.svg", png=f"components/bench/{i}.png",
+                    grips=grips,
+                )
+                for i in range(options["components"])
+            ],
+            batch_size=1000,
+        )
+        project = Project.objects.create(name="Bench", user=user)
+        CanvasState.objects.bulk_create(
+            [
+                CanvasState(
+                    project=project, component=rng.choice(components), label=f"I{j}",
+                    x=rng.random() * 2000, y=rng.random() * 2000, width=50, height=50, sequence=j,
+                )
+                for j in range(options["items"])
+            ],
+            batch_size=2000,
+        )
+        self.stdout.write(
+            f"Seeded {len(components)} components and {options['items']} canvas items "
+            f"in {time.perf_counter() - t0:.1f}s ({connection.vendor})"
+        )
+
+        request = Request(APIRequestFactory().get("/api/components/", HTTP_HOST="localhost"))
+        bench_components = Component.objects.filter(s_no__startswith="BENCH").order_by("s_no")
+        items = CanvasState.objects.filter(project=project).order_by("sequence")
+
+        def best(fn):
+            times = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                result = fn()
+                times.append(time.perf_counter() - start)
+            return min(times), result
+
+        self.stdout.write("\nComponent list")
+        before, _ = best(lambda: ComponentSerializer(
+            bench_components, many=True, context={"request": request, "fields": None}
+        ).data)
+        after, component_data = best(lambda: serialize_components(bench_components, request))
+        self._compare(len(component_data), before, after)
+
+        self.stdout.write("\nProject canvas items")
+        before, _ = best(lambda: CanvasStateSerializer(items.select_related("component"), many=True).data)
+        after, item_data = best(lambda: serialize_canvas_items(items))
+        self._compare(len(item_data), before, after)
+
+        self.stdout.write("\nRendering the project payload")
+        payload = {"canvas_state": {"items": item_data}}
+        before, body = best(lambda: JSONRenderer().render(payload))
+        after, _ = best(lambda: ORJSONRenderer().render(payload))
+        self._compare(len(item_data), before, after)
+        self.stdout.write(f"  ({len(body) / 1024:.0f} KiB)")
+
+    def _compare(self, rows, before, after):
+        self.stdout.write(f"  before {rows / before:12,.0f} rows/s   ({before * 1000:8.1f}ms)")
+        self.stdout.write(f"  after  {rows / after:12,.0f} rows/s   ({after * 1000:8.1f}ms)   x{before / after:.1f}")
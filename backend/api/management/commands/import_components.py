@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.component_import import BATCH_SIZE, ComponentImportError, import_components_zip
+
+
+class Command(BaseCommand):
+    help = "Bulk import default components from a ZIP (same layout as the admin upload)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("zip_path", help="Path to the components ZIP")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            with open(options["zip_path"], "rb") as f:
+                report = import_components_zip(f, batch_size=options["batch_size"])
+        except OSError as e:
+            raise CommandError(f"Could not open {options['zip_path']}: {e}")
+        except ComponentImportError as e:
+            raise CommandError(str(e))
+
+        for row, message in report.errors + report.warnings:
+            self.stdout.write(self.style.WARNING(f"Row {row}: {message}"))
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"{report.summary()} in {elapsed:.2f}s"))
@@ -1,22 +1,37 @@
+import hashlib
 import os
 import json
+import time
 from django.core.management.base import BaseCommand
-from django.core.files import File
+from django.utils import timezone
+from api import component_cache
+from api.component_import import apply_asset, stored_hash, write_components
 from api.models import Component
 from django.conf import settings
 
+# Fields the seed owns; anything else on an existing component is left alone
+SEEDED_FIELDS = ("parent", "object", "grips", "legend", "suffix")
+
+
 class Command(BaseCommand):
     help = 'Seeds the database with default components from frontend config'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Print what would be created/updated without writing anything",
+        )
+
     def handle(self, *args, **options):
+        started = time.perf_counter()
+        dry_run = options["dry_run"]
+
         # Determine paths
         # backend/api/management/commands/seed_components.py
         # root is backend/
-        
         base_dir = settings.BASE_DIR # backend/
-        frontend_dir = os.path.abspath(os.path.join(base_dir, '..', 'web-frontend'))
-        config_dir = os.path.join(frontend_dir, 'src', 'assets', 'config')
-        assets_dir = os.path.join(frontend_dir, 'src', 'assets')
+        self.frontend_dir = os.path.abspath(os.path.join(base_dir, '..', 'web-frontend'))
+        config_dir = os.path.join(self.frontend_dir, 'src', 'assets', 'config')
 
         items_path = os.path.join(config_dir, 'items.json')
         grips_path = os.path.join(config_dir, 'grips.json')
@@ -38,86 +53,106 @@ class Command(BaseCommand):
                     key = (g.get('category'), g.get('component'))
                     grips_map[key] = g
 
-        # Counter for s_no generation if needed
-        # We try to maintain stable s_no if possible, or just generate new ones
-        
+        # Every component in one query, matched by name AND category (parent);
+        # a default component wins over a user's custom one of the same name
+        existing = {}
+        taken_s_nos = set()
+        for component in Component.objects.all():
+            taken_s_nos.add(component.s_no)
+            key = (component.name, component.parent)
+            if key not in existing or component.created_by_id is None:
+                existing[key] = component
+
+        now = timezone.now()
+        to_create, to_update, hash_only, changed_fields = [], [], [], set()
+        replaced = []
         count = 0
-        
+
         for category, components in items_data.items():
             for comp_name, comp_data in components.items():
                 count += 1
-                
-                # Prepare s_no
-                # Ideally check if exists
-                # We use specific format e.g. CAT-001
-                # But to avoid collision let's use a systematic approach or slug
-                s_no_candidate = f"{category[:3].upper()}-{count:03d}"
-                
-                # Check if component exists by Name AND Category (parent)
-                existing = Component.objects.filter(name=comp_name, parent=category).first()
-                
-                if existing:
-                    component = existing
-                    self.stdout.write(f"Updating {comp_name}...")
-                else:
-                    component = Component(name=comp_name, parent=category)
-                    component.s_no = s_no_candidate # Set initial s_no
-                
-                # Update fields
-                component.parent = category # Ensure correct
-                component.object = comp_data.get('object', '')
-                
-                # Grips
-                grip_entry = grips_map.get((category, comp_name))
-                if grip_entry:
-                    component.grips = grip_entry.get('grips', [])
-                    component.legend = grip_entry.get('default_label', '').split('-')[0] if grip_entry.get('default_label') else comp_data.get('legend', '')
-                    # Extract suffix if possible from default_label e.g. C-01-A/B
-                    # comp_data might not have suffix in items.json based on view, but let's check
-                    # items.json didn't show suffix field. grips.json has default_label "C-01-A/B"
-                    # So suffix is "A/B" if present
-                    
-                    lbl = grip_entry.get('default_label', '')
-                    parts = lbl.split('-')
-                    if len(parts) > 2:
-                        component.suffix = parts[-1]
+
+                component = existing.get((comp_name, category))
+                is_new = component is None
+                if is_new:
+                    # Stable-ish s_no from the position in items.json, e.g. COM-001
+                    s_no = f"{category[:3].upper()}-{count:03d}"
+                    if s_no in taken_s_nos:
+                        self.stdout.write(self.style.WARNING(
+                            f"Skipping {comp_name}: s_no {s_no} already belongs to another component"
+                        ))
+                        continue
+                    taken_s_nos.add(s_no)
+                    component = Component(name=comp_name, parent=category, s_no=s_no)
+
+                values = self.seeded_values(category, comp_data, grips_map.get((category, comp_name)))
+                dirty = set()
+                for field in SEEDED_FIELDS:
+                    if getattr(component, field) != values[field]:
+                        if not dry_run:
+                            setattr(component, field, values[field])
+                        dirty.add(field)
+
+                for kind, rel_path in (("png", comp_data.get('icon', '')), ("svg", comp_data.get('svg', ''))):
+                    path = self.get_real_path(rel_path)
+                    if not path or not os.path.exists(path):
+                        continue
+                    with open(path, 'rb') as f:
+                        data = f.read()
+                    if dry_run:
+                        if is_new or stored_hash(component, kind) != hashlib.sha256(data).hexdigest():
+                            dirty.add(kind)
                     else:
-                        component.suffix = ""
-                        
-                    # Legend is usually the first part
-                    if len(parts) > 0:
-                        component.legend = parts[0]
-
-                else:
-                    # Fallback if no grips entry
-                    component.grips = comp_data.get('grips', [])
-                    component.legend = comp_data.get('legend', '')
-                    component.suffix = comp_data.get('suffix', '')
-
-                # Handle Images
-                # Path in json: "./assets/toolbar/..."
-                # Real path: src/assets/toolbar/...
-                
-                icon_rel = comp_data.get('icon', '')
-                svg_rel = comp_data.get('svg', '')
-                
-                def get_real_path(rel_path):
-                    if rel_path.startswith('./assets/'):
-                        return os.path.join(frontend_dir, 'src', rel_path[2:]) # remove ./
-                    return None
-
-                icon_path = get_real_path(icon_rel)
-                svg_path = get_real_path(svg_rel)
-
-                if icon_path and os.path.exists(icon_path):
-                    with open(icon_path, 'rb') as f:
-                        component.png.save(os.path.basename(icon_path), File(f), save=False)
-                
-                if svg_path and os.path.exists(svg_path):
-                    with open(svg_path, 'rb') as f:
-                        component.svg.save(os.path.basename(svg_path), File(f), save=False)
-
-                component.save()
-                self.stdout.write(self.style.SUCCESS(f"Saved {comp_name}"))
-
-        self.stdout.write(self.style.SUCCESS(f"Successfully seeded {count} components"))
+                        dirty |= apply_asset(component, kind, os.path.basename(path), data, replaced)
+
+                if is_new:
+                    to_create.append(component)
+                    self.stdout.write(f"+ {component.s_no} {comp_name}")
+                elif dirty - {"svg_hash", "png_hash"}:
+                    component.updated_at = now
+                    to_update.append(component)
+                    changed_fields |= dirty
+                    self.stdout.write(f"~ {component.s_no} {comp_name}: {', '.join(sorted(dirty))}")
+                elif dirty:
+                    # Only backfilled hashes of components seeded before hashing
+                    hash_only.append(component)
+
+        if not dry_run:
+            write_components(to_create, to_update, changed_fields, hash_only, replaced)
+            if to_create or to_update:
+                component_cache.invalidate()
+
+        elapsed = time.perf_counter() - started
+        unchanged = count - len(to_create) - len(to_update)
+        summary = (
+            f"{len(to_create)} created, {len(to_update)} updated, "
+            f"{unchanged} unchanged of {count} components in {elapsed:.2f}s"
+        )
+        if dry_run:
+            self.stdout.write(self.style.WARNING(f"Dry run, nothing written: {summary}"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Successfully seeded {summary}"))
+
+    def get_real_path(self, rel_path):
+        # Path in json: "./assets/toolbar/..."
+        # Real path: src/assets/toolbar/...
+        if rel_path.startswith('./assets/'):
+            return os.path.join(self.frontend_dir, 'src', rel_path[2:]) # remove ./
+        return None
+
+    def seeded_values(self, category, comp_data, grip_entry):
+        values = {"parent": category, "object": comp_data.get('object', '')}
+        if grip_entry:
+            values["grips"] = grip_entry.get('grips', [])
+            # default_label e.g. "C-01-A/B": legend is the first part,
+            # suffix ("A/B") the last when there are more than two
+            parts = grip_entry.get('default_label', '').split('-')
+            values["legend"] = parts[0]
+            values["suffix"] = parts[-1] if len(parts) > 2 else ""
+        else:
+            # Fallback if no grips entry
+            values["grips"] = comp_data.get('grips', [])
+            values["legend"] = comp_data.get('legend', '')
+            values["suffix"] = comp_data.get('suffix', '')
+        return values
+
@@ -0,0 +1,49 @@
+import uuid
+
+from django.db import migrations, models
+
+
+def populate_uids(apps, schema_editor):
+    # A callable default is evaluated once for AddField, so give every
+    # existing row its own UUID before the unique constraints go on.
+    for model_name in ("CanvasState", "Connection"):
+        model = apps.get_model("api", model_name)
+        rows = list(model.objects.only("id"))
+        for row in rows:
+            row.uid = uuid.uuid4()
+        model.objects.bulk_update(rows, ["uid"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_alter_component_grips_alter_component_object'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='canvasstate',
+            name='uid',
+            field=models.UUIDField(null=True),
+        ),
+        migrations.AddField(
+            model_name='connection',
+            name='uid',
+            field=models.UUIDField(null=True),
+        ),
+        migrations.RunPython(populate_uids, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='canvasstate',
+            name='uid',
+            field=models.UUIDField(default=uuid.uuid4),
+        ),
+        migrations.AlterField(
+            model_name='connection',
+            name='uid',
+            field=models.UUIDField(default=uuid.uuid4, unique=True),
+        ),
+        migrations.AddConstraint(
+            model_name='canvasstate',
+            constraint=models.UniqueConstraint(fields=('project', 'uid'), name='canvasstate_project_uid_unique'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_canvas_item_uid'),
+    ]
+
+    operations = [
+        # Nullable first; 0006 backfills it and 0007 makes it required
+        migrations.AddField(
+            model_name='connection',
+            name='project',
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name='connections',
+                to='api.project',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='canvasstate',
+            index=models.Index(fields=['project', 'sequence'], name='canvasstate_project_seq_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_connection_project(apps, schema_editor):
+    CanvasState = apps.get_model("api", "CanvasState")
+    Connection = apps.get_model("api", "Connection")
+    Connection.objects.filter(project__isnull=True).update(
+        project_id=Subquery(
+            CanvasState.objects.filter(pk=OuterRef("sourceItemId")).values("project_id")[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_connection_project'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_connection_project, migrations.RunPython.noop),
+    ]
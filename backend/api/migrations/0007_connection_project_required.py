@@ -0,0 +1,32 @@
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_backfill_connection_project'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='connection',
+            name='project',
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name='connections',
+                to='api.project',
+            ),
+        ),
+        # uids only need to be unique within a project now that edges carry one
+        migrations.AlterField(
+            model_name='connection',
+            name='uid',
+            field=models.UUIDField(default=uuid.uuid4),
+        ),
+        migrations.AddConstraint(
+            model_name='connection',
+            constraint=models.UniqueConstraint(fields=('project', 'uid'), name='connection_project_uid_unique'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_componenttombstone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='component',
+            name='png_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='component',
+            name='svg_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
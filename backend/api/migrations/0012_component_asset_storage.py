@@ -0,0 +1,22 @@
+import api.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_component_asset_hashes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='component',
+            name='png',
+            field=models.ImageField(blank=True, max_length=255, null=True, storage=api.storage.ContentAddressedStorage(), upload_to='components/'),
+        ),
+        migrations.AlterField(
+            model_name='component',
+            name='svg',
+            field=models.FileField(blank=True, max_length=255, null=True, storage=api.storage.ContentAddressedStorage(), upload_to='components/'),
+        ),
+    ]
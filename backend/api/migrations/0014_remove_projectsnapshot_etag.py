@@ -0,0 +1,15 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_generationjob'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='projectsnapshot',
+            name='etag',
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_remove_projectsnapshot_etag'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='projectsnapshot',
+            name='normalized_body',
+            field=models.BinaryField(null=True),
+        ),
+    ]
@@ -1,11 +1,17 @@
+import uuid
+
 from django.db import models
 
+from .storage import component_storage
+
 class Project(models.Model):
     name = models.CharField(max_length=100)
     description = models.CharField(max_length=2000, default=None, null=True, blank=True)
     user = models.ForeignKey('auth.User', on_delete=models.CASCADE, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField( auto_now=True)
+    # Bumped on every change to the project or its canvas (see conditional.py)
+    revision = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return self.name
@@ -17,8 +23,12 @@ class Component(models.Model):
     legend = models.CharField(max_length=100, blank=True)
     suffix = models.CharField(max_length=10, blank=True)
     object = models.CharField(max_length=100, blank=True)
-    svg = models.FileField(upload_to='components/', null=True, blank=True)
-    png = models.ImageField(upload_to='components/', null=True, blank=True)
+    # Content-addressed, shared between components (see storage.py)
+    svg = models.FileField(upload_to='components/', storage=component_storage, max_length=255, null=True, blank=True)
+    png = models.ImageField(upload_to='components/', storage=component_storage, max_length=255, null=True, blank=True)
+    # sha256 of the stored files, so imports can skip unchanged assets
+    svg_hash = models.CharField(max_length=64, blank=True, default="")
+    png_hash = models.CharField(max_length=64, blank=True, default="")
     grips = models.JSONField(default=list, blank=True)
     created_by = models.ForeignKey('auth.User', on_delete=models.CASCADE, null=True, blank=True, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True, null=True)
@@ -27,6 +37,14 @@ class Component(models.Model):
     def __str__(self):
         return self.name
 
+class ComponentTombstone(models.Model):
+    """Record of a deleted component, for /components/changes/ (see component_changes.py)."""
+    component_id = models.BigIntegerField()
+    s_no = models.CharField(max_length=10)
+    # Who could see the component (None = default, everyone); the user may be gone
+    created_by = models.ForeignKey('auth.User', on_delete=models.DO_NOTHING, null=True, blank=True, db_constraint=False)
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
 class CanvasState(models.Model):
     project = models.ForeignKey(Project, on_delete=models.CASCADE)
     component = models.ForeignKey(Component, on_delete=models.CASCADE)
@@ -39,10 +57,70 @@ class CanvasState(models.Model):
     scaleX = models.FloatField(default=1)
     scaleY = models.FloatField(default=1)
     sequence = models.IntegerField()
+    # Client-generated identity that survives saves (unlike the row id)
+    uid = models.UUIDField(default=uuid.uuid4)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["project", "uid"], name="canvasstate_project_uid_unique"),
+        ]
+        indexes = [
+            # Project retrieve: filter(project=...).order_by("sequence")
+            models.Index(fields=["project", "sequence"], name="canvasstate_project_seq_idx"),
+        ]
 
 class Connection(models.Model):
+    # Denormalized from sourceItemId so a project's edges are one indexed lookup
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name="connections")
     sourceItemId = models.ForeignKey(CanvasState, on_delete=models.CASCADE, related_name="sources")
     sourceGripIndex = models.IntegerField()
     targetItemId = models.ForeignKey(CanvasState, on_delete=models.CASCADE, related_name="targets")
     targetGripIndex = models.IntegerField()
-    waypoints = models.JSONField()
\ No newline at end of file
+    waypoints = models.JSONField()
+    uid = models.UUIDField(default=uuid.uuid4)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["project", "uid"], name="connection_project_uid_unique"),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.project_id is None and self.sourceItemId_id is not None:
+            self.project_id = self.sourceItemId.project_id
+        super().save(*args, **kwargs)
+
+class ProjectSnapshot(models.Model):
+    """
+    Materialized retrieve payload for a project (settings.PROJECT_SNAPSHOTS).
+    Rows above stay the source of truth; this is rebuilt on every write.
+    """
+    project = models.OneToOneField(Project, on_delete=models.CASCADE, primary_key=True, related_name="snapshot")
+    body = models.BinaryField()  # gzip-compressed JSON
+    normalized_body = models.BinaryField(null=True)  # the same, for ?normalized=1
+    catalog_version = models.CharField(max_length=64, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+class GenerationJob(models.Model):
+    """Queued /api/ai-generate/ request, run by `manage.py ai_worker` (see ai_jobs.py)."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATES = [(QUEUED, "Queued"), (RUNNING, "Running"), (DONE, "Done"), (FAILED, "Failed")]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    prompt = models.TextField()
+    state = models.CharField(max_length=10, choices=STATES, default=QUEUED)
+    # Components / connections parsed so far, while running
+    partial = models.JSONField(default=dict, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The worker's claim query: filter(state=...).order_by("created_at")
+            models.Index(fields=["state", "created_at"], name="generationjob_state_idx"),
+        ]
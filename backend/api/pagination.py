@@ -0,0 +1,54 @@
+"""
+Cursor pagination for list endpoints.
+
+Pagination is opt-in so existing clients keep getting the full list: a
+request is only paginated when it sends ?cursor= or ?page_size=. Pages keep
+the endpoint's usual list key and add "next"/"previous" cursor links:
+
+    {"components": [...], "next": "<url>?cursor=...", "previous": null}
+"""
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+
+class OptionalCursorPagination(CursorPagination):
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    results_key = "results"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return Response({
+            self.results_key: data,
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+        })
+
+    def get_paginated_response_schema(self, schema):
+        response = super().get_paginated_response_schema(schema)
+        response["properties"][self.results_key] = response["properties"].pop("results")
+        return response
+
+
+class ComponentCursorPagination(OptionalCursorPagination):
+    # s_no is unique, so the cursor position alone identifies the row
+    ordering = ("s_no",)
+    results_key = "components"
+
+
+class ProjectCursorPagination(OptionalCursorPagination):
+    # Newest first by creation: a cursor over updated_at would skip or repeat
+    # projects saved while a client is paging
+    ordering = ("-created_at", "-id")
+    results_key = "projects"
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        response.data = {"status": "success", **response.data}
+        return response
@@ -0,0 +1,32 @@
+"""
+JSON renderer backed by orjson.
+
+Used by the large read endpoints (component list, project retrieve), where
+encoding the response with the standard json module is a noticeable part of
+the request. The output is the same JSON as DRF's JSONRenderer (compact,
+UTF-8); anything orjson can't encode natively goes through DRF's encoder.
+Without orjson installed it is plain JSONRenderer.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+_encoder = JSONEncoder()
+
+
+class ORJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b""
+        # OPT_UTC_Z: "Z" instead of "+00:00", as DRF writes it
+        return orjson.dumps(
+            data,
+            default=_encoder.default,
+            option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS,
+        )
@@ -1,8 +1,38 @@
 from rest_framework import serializers
+from django.core.files.storage import FileSystemStorage
+from django.utils.encoding import filepath_to_uri
 from .models import Component, Project, CanvasState, Connection
 import json
 
-class ProjectSerializer(serializers.ModelSerializer):
+
+def requested_fields(request):
+    """Field names from ?fields=a,b,c, or None when the client wants them all."""
+    if request is None or request.method not in ("GET", "HEAD"):
+        return None
+    value = request.query_params.get("fields")
+    if not value:
+        return None
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+class SparseFieldsMixin:
+    """
+    Only serialize the fields named in ?fields= (unknown names are ignored).
+    A "fields" context entry overrides the query string; None means all.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if "fields" in self.context:
+            fields = self.context["fields"]
+        else:
+            fields = requested_fields(self.context.get("request"))
+        if fields is not None:
+            for name in set(self.fields) - fields:
+                self.fields.pop(name)
+
+
+class ProjectSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     thumbnail = serializers.ImageField(
         required=False,
         allow_null=True
@@ -15,6 +45,7 @@ class ProjectSerializer(serializers.ModelSerializer):
             "user",
             "created_at",
             "updated_at",
+            "revision",
         )
 
 
@@ -28,7 +59,7 @@ class ProjectSerializer(serializers.ModelSerializer):
     # def update(self) removed - logic moved to View
 
 
-class ComponentSerializer(serializers.ModelSerializer):
+class ComponentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     svg_url = serializers.FileField(source='svg', read_only=True)
     png_url = serializers.FileField(source='png', read_only=True)
 
@@ -67,6 +98,7 @@ class CanvasStateSerializer(serializers.ModelSerializer):
         model = CanvasState
         fields = [
             "id",
+            "uid",
             "project",
             "component_id",
             "label",
@@ -118,6 +150,7 @@ class ConnectionSerializer(serializers.ModelSerializer):
         model = Connection
         fields = [
             "id",
+            "uid",
             "sourceItemId",
             "sourceGripIndex",
             "targetItemId",
@@ -125,3 +158,208 @@ class ConnectionSerializer(serializers.ModelSerializer):
             "waypoints",
         ]
 
+
+
+# ---------------------------------------------------------------------------
+# Fast read paths
+#
+# Project retrieve and the component list are the hottest endpoints;
+# building nested DRF field instances (and a storage URL) per row dominates
+# their cost. These produce the same payloads as CanvasStateSerializer /
+# ConnectionSerializer / ComponentSerializer straight from .values() rows.
+# The serializers are still used for every write.
+# ---------------------------------------------------------------------------
+
+CANVAS_ITEM_VALUES = {
+    "id": "id",
+    "uid": "uid",
+    "project": "project_id",
+    "component_id": "component_id",
+    "label": "label",
+    "x": "x",
+    "y": "y",
+    "width": "width",
+    "height": "height",
+    "rotation": "rotation",
+    "scaleX": "scaleX",
+    "scaleY": "scaleY",
+    "sequence": "sequence",
+    "s_no": "component__s_no",
+    "parent": "component__parent",
+    "name": "component__name",
+    "svg": "component__svg",
+    "png": "component__png",
+    "object": "component__object",
+    "legend": "component__legend",
+    "suffix": "component__suffix",
+    "grips": "component__grips",
+}
+
+CONNECTION_VALUES = {
+    "id": "id",
+    "uid": "uid",
+    "sourceItemId": "sourceItemId_id",
+    "sourceGripIndex": "sourceGripIndex",
+    "targetItemId": "targetItemId_id",
+    "targetGripIndex": "targetGripIndex",
+    "waypoints": "waypoints",
+}
+
+# Item rows of the normalized payload: the component is only referenced
+CANVAS_ITEM_ONLY_VALUES = {
+    key: column for key, column in CANVAS_ITEM_VALUES.items()
+    if not column.startswith("component__")
+}
+
+# Per-component data the full payload repeats on every item
+ITEM_COMPONENT_VALUES = {
+    key: column[len("component__"):] for key, column in CANVAS_ITEM_VALUES.items()
+    if column.startswith("component__")
+}
+
+COMPONENT_VALUES = (
+    "id", "s_no", "name", "legend", "parent", "suffix", "object",
+    "svg", "png", "grips", "created_by_id",
+)
+
+
+def file_url_builder(request=None):
+    """
+    name -> URL function matching a FileField serialized with (or without)
+    `request`. For filesystem storage the URL prefix is computed once, so a
+    row only costs a string join.
+    """
+    storage = Component._meta.get_field("svg").storage
+    if isinstance(storage, FileSystemStorage):
+        prefix = storage.base_url
+        if request is not None:
+            prefix = request.build_absolute_uri(prefix)
+
+        def url(name):
+            return prefix + filepath_to_uri(name).lstrip("/") if name else None
+        return url
+
+    urls = {}
+
+    def url(name):
+        if not name:
+            return None
+        if name not in urls:
+            urls[name] = storage.url(name)
+            if request is not None:
+                urls[name] = request.build_absolute_uri(urls[name])
+        return urls[name]
+    return url
+
+
+def serialize_canvas_items(queryset):
+    """CanvasStateSerializer(many=True) equivalent in one .values() query."""
+    url = file_url_builder()
+    items = []
+    for row in queryset.values(*CANVAS_ITEM_VALUES.values()):
+        item = {key: row[column] for key, column in CANVAS_ITEM_VALUES.items()}
+        item["uid"] = str(item["uid"])
+        item["svg"] = url(item["svg"])
+        item["png"] = url(item["png"])
+        items.append(item)
+    return items
+
+
+def serialize_canvas_items_normalized(queryset):
+    """
+    (items, components): items without the component fields, and those
+    fields once per component in {"<component_id>": {...}}. Two queries.
+    """
+    items = []
+    component_ids = set()
+    for row in queryset.values(*CANVAS_ITEM_ONLY_VALUES.values()):
+        item = {key: row[column] for key, column in CANVAS_ITEM_ONLY_VALUES.items()}
+        item["uid"] = str(item["uid"])
+        component_ids.add(item["component_id"])
+        items.append(item)
+
+    url = file_url_builder()
+    components = {}
+    rows = Component.objects.filter(id__in=component_ids).values("id", *ITEM_COMPONENT_VALUES.values())
+    for row in rows:
+        component = {key: row[column] for key, column in ITEM_COMPONENT_VALUES.items()}
+        component["svg"] = url(component["svg"])
+        component["png"] = url(component["png"])
+        components[str(row["id"])] = component
+    return items, components
+
+
+def serialize_connections(queryset):
+    """ConnectionSerializer(many=True) equivalent in one .values() query."""
+    connections = []
+    for row in queryset.values(*CONNECTION_VALUES.values()):
+        conn = {key: row[column] for key, column in CONNECTION_VALUES.items()}
+        conn["uid"] = str(conn["uid"])
+        connections.append(conn)
+    return connections
+
+
+def serialize_components(queryset, request=None, fields=None):
+    """
+    ComponentSerializer(many=True) equivalent in one .values() query; file
+    URLs are absolute when `request` is given. `fields` limits the keys.
+    """
+    url = file_url_builder(request)
+    components = []
+    for row in queryset.values(*COMPONENT_VALUES):
+        svg, png = url(row["svg"]), url(row["png"])
+        # Same keys, in the same order, as ComponentSerializer
+        component = {
+            "id": row["id"],
+            "s_no": row["s_no"],
+            "name": row["name"],
+            "legend": row["legend"],
+            "parent": row["parent"],
+            "suffix": row["suffix"],
+            "object": row["object"],
+            "svg": svg,
+            "png": png,
+            "svg_url": svg,
+            "png_url": png,
+            "grips": row["grips"],
+            "created_by": row["created_by_id"],
+        }
+        if fields is not None:
+            component = {k: v for k, v in component.items() if k in fields}
+        components.append(component)
+    return components
+
+
+def serialize_project_detail(project, normalized=False):
+    """
+    Full project retrieve payload: project fields plus canvas_state. With
+    `normalized`, items only carry component_id and the component data is
+    in a top-level "components" dictionary keyed by that id.
+    """
+    # Canvas items (nodes) and connections (edges): one query each
+    items = CanvasState.objects.filter(project=project).order_by("sequence")
+    if normalized:
+        items_data, components = serialize_canvas_items_normalized(items)
+    else:
+        items_data = serialize_canvas_items(items)
+    connections_data = serialize_connections(
+        Connection.objects.filter(project=project).order_by("id")
+    )
+
+    # Sequence counter (next available), from the rows already fetched
+    sequence_counter = (
+        max(item["sequence"] for item in items_data) + 1
+        if items_data
+        else 0
+    )
+
+    data = ProjectSerializer(project).data
+    data["status"] = "success"
+    data["canvas_state"] = {
+        "items": items_data,
+        "connections": connections_data,
+        "sequence_counter": sequence_counter
+    }
+    if normalized:
+        data["components"] = components
+    return data
@@ -0,0 +1,31 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import component_cache, component_changes, snapshots, storage
+from .conditional import bump_revision
+from .models import CanvasState, Component
+
+
+# pre_delete: by post_delete the cascade has already removed the canvas rows
+# that tell us which projects used the component.
+@receiver(post_save, sender=Component)
+@receiver(pre_delete, sender=Component)
+def component_changed(sender, instance, **kwargs):
+    if instance.created_by_id is None:
+        component_cache.invalidate()
+
+    # Project payloads embed component data
+    project_ids = list(
+        CanvasState.objects.filter(component_id=instance.pk)
+        .values_list("project_id", flat=True).distinct()
+    )
+    if project_ids:
+        bump_revision(project_ids)
+        snapshots.projects_changed(project_ids)
+
+
+@receiver(post_delete, sender=Component)
+def component_deleted(sender, instance, **kwargs):
+    component_changes.record_deletion(instance)
+    # Asset files are shared between components; drop them once unused
+    storage.release_on_commit(instance.svg.name, instance.png.name)
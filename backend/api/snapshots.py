@@ -0,0 +1,110 @@
+"""
+Whole-document project storage (settings.PROJECT_SNAPSHOTS).
+
+Normalized CanvasState/Connection rows stay the source of truth, but every
+write also materializes the retrieve payload as gzip-compressed JSON in
+ProjectSnapshot, in both forms: `body` for the plain retrieve and
+`normalized_body` for ?normalized=1, which is what the desktop and web
+clients request. Retrieve then reads one row and streams the stored bytes.
+
+The ETag still comes from the project revision (conditional.py), so a 304
+never needs the snapshot. Clients that accept gzip get the stored bytes as
+they are and the others a decompressed copy: two encodings of one revision,
+told apart by a "-gz" ETag suffix (see etag_variant()) plus Vary:
+Accept-Encoding.
+
+Snapshots embed component data (names, files, grips), so they are dropped
+whenever a component used by the project changes (see signals.py).
+"""
+import gzip
+import json
+import re
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Max
+from django.http import HttpResponse
+
+from .models import Component, ProjectSnapshot
+from .serializers import serialize_project_detail
+
+_accepts_gzip = re.compile(r"\bgzip\b")
+
+
+def catalog_version():
+    """Cheap fingerprint of the component table, stored with each snapshot."""
+    agg = Component.objects.aggregate(count=Count("id"), latest=Max("updated_at"))
+    latest = agg["latest"].isoformat() if agg["latest"] else ""
+    return f"{agg['count']}:{latest}"
+
+
+def _compress(payload):
+    raw = json.dumps(
+        payload, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+    return gzip.compress(raw, compresslevel=6)
+
+
+def build_snapshot(project):
+    """Serialize the project from its rows, in both forms, and store the result."""
+    snapshot, _ = ProjectSnapshot.objects.update_or_create(
+        project=project,
+        defaults={
+            "body": _compress(serialize_project_detail(project)),
+            "normalized_body": _compress(serialize_project_detail(project, normalized=True)),
+            "catalog_version": catalog_version(),
+        },
+    )
+    return snapshot
+
+
+def project_changed(project):
+    """
+    Call after any write to a project or its canvas. Rebuilds the snapshot
+    when the mode is on; otherwise drops any old one so it can't go stale.
+    """
+    if settings.PROJECT_SNAPSHOTS:
+        # Canvas saves bump updated_at with a queryset update
+        project.refresh_from_db()
+        build_snapshot(project)
+    else:
+        ProjectSnapshot.objects.filter(project=project).delete()
+
+
+def projects_changed(project_ids):
+    """Drop snapshots of these projects, e.g. after a component they use changed."""
+    ProjectSnapshot.objects.filter(project_id__in=project_ids).delete()
+
+
+def accepts_gzip(request):
+    return bool(_accepts_gzip.search(request.META.get("HTTP_ACCEPT_ENCODING", "")))
+
+
+def etag_variant(request, normalized=False):
+    """project_validators() variant for the document snapshot_response() will pick."""
+    parts = ["n"] if normalized else []
+    if accepts_gzip(request):
+        parts.append("gz")
+    return "-".join(parts)
+
+
+def snapshot_response(request, project, normalized=False):
+    """
+    Serve the stored document, building it first if it's missing.
+    Validators (ETag / 304) are handled by the view, see conditional.py.
+    """
+    try:
+        snapshot = project.snapshot
+    except ProjectSnapshot.DoesNotExist:
+        snapshot = build_snapshot(project)
+    if normalized and snapshot.normalized_body is None:
+        # Stored before snapshots carried the normalized form
+        snapshot = build_snapshot(project)
+
+    body = bytes(snapshot.normalized_body if normalized else snapshot.body)
+    if accepts_gzip(request):
+        response = HttpResponse(body, content_type="application/json")
+        response["Content-Encoding"] = "gzip"
+    else:
+        response = HttpResponse(gzip.decompress(body), content_type="application/json")
+    return response
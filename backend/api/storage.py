@@ -0,0 +1,106 @@
+"""
+Content-addressed storage for component assets.
+
+Component.svg / Component.png are saved under the sha256 of their content:
+
+    components/<sha[:2]>/<sha[2:]><extension>
+
+so an upload whose bytes are already stored, under whatever file name,
+reuses the existing file instead of writing `Pump_a8Xk2.svg` next to
+`Pump.svg`, and a URL never changes meaning: new content means a new URL.
+That is what lets /media/ answer with `Cache-Control: immutable`: core/urls.py
+when DEBUG, the web server in production (see "Serving media in production"
+in readme.md). Only the lowercased extension of the uploaded name is kept.
+
+Files can be shared by several components, so they are never deleted by the
+row that stops using them; release() removes a file once no component refers
+to it any more, and release_on_commit() waits until the transaction that
+dropped the reference has committed. Names stored before this scheme
+(`components/Pump.svg`) keep working and are released the same way.
+"""
+import hashlib
+import os
+import posixpath
+import re
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import Q
+from django.utils.deconstruct import deconstructible
+
+CHUNK_SIZE = 64 * 1024
+
+# Also matches the earlier <sha[:2]>/<sha[2:]>/<file name> layout
+_HASHED = re.compile(r"(?:^|/)([0-9a-f]{2})/([0-9a-f]{62})(?:\.[^./]+|/[^/]+)?$")
+
+
+def content_hash(name):
+    """sha256 encoded in a content-addressed name, or "" for older names."""
+    match = _HASHED.search(name or "")
+    return match.group(1) + match.group(2) if match else ""
+
+
+def is_content_addressed(path):
+    return bool(_HASHED.search(path or ""))
+
+
+@deconstructible(path="api.storage.ContentAddressedStorage")
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage that names files by the sha256 of their content."""
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+
+        digest = hashlib.sha256()
+        for chunk in content.chunks(CHUNK_SIZE):
+            digest.update(chunk)
+        content.seek(0)
+        sha = digest.hexdigest()
+
+        directory, filename = posixpath.split(name.replace("\\", "/"))
+        extension = posixpath.splitext(filename)[1].lower()
+        name = posixpath.join(directory, sha[:2], sha[2:] + extension)
+        if self.exists(name):
+            # Same bytes: share the stored file
+            return name
+        return super().save(name, content, max_length=max_length)
+
+
+def release(*names):
+    """Delete stored asset files that no component references any more."""
+    from .models import Component
+
+    names = {name for name in names if name}
+    if not names:
+        return
+    in_use = set()
+    for svg, png in Component.objects.filter(Q(svg__in=names) | Q(png__in=names)).values_list("svg", "png"):
+        in_use.update((svg, png))
+
+    storage = Component._meta.get_field("svg").storage
+    for name in names - in_use:
+        storage.delete(name)
+        if is_content_addressed(name):
+            # Drop the containing directory too once it is empty
+            try:
+                os.rmdir(os.path.dirname(storage.path(name)))
+            except OSError:
+                pass
+
+
+def release_on_commit(*names):
+    """
+    release() once the current transaction commits (right away outside one),
+    so a rolled back delete or update never leaves rows pointing at files
+    that are gone.
+    """
+    names = [name for name in names if name]
+    if names:
+        transaction.on_commit(lambda: release(*names))
+
+
+component_storage = ContentAddressedStorage()
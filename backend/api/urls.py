@@ -13,13 +13,20 @@ urlpatterns = [
     # Component endpoints
     path('components/', views.ComponentListView.as_view(), name='component-list'),
     path('components/<int:id>/', views.ComponentDetailView.as_view(), name='component-detail'),
+    path('components/changes/', views.ComponentChangesView.as_view(), name='component-changes'),
+    path('components/import/', views.ComponentImportView.as_view(), name='component-import'),
 
   
     # Project endpoints
     path('project/', views.ProjectListCreateView.as_view(), name='project-list'),
     path('project/<int:id>/', views.ProjectDetailView.as_view(), name='project-detail'),
+    path('project/<int:id>/canvas/', views.ProjectCanvasDeltaView.as_view(), name='project-canvas'),
+    path('project/<int:id>/validate/', views.ProjectValidateView.as_view(), name='project-validate'),
     
     # ============= AI Endpoints =============
     path('ai-generate/', views.ai_generate, name='ai-generate'),
+    path('ai-generate/metrics/', views.ai_generate_metrics, name='ai-generate-metrics'),
+    path('ai-generate/jobs/<uuid:job_id>/', views.ai_job_status, name='ai-job-status'),
+    path('ai-generate/jobs/<uuid:job_id>/events/', views.ai_job_events, name='ai-job-events'),
   ]
 
@@ -1,11 +1,22 @@
+import json
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import render
-from django.http import Http404
-from .models import Component, Project, CanvasState, Connection
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from .models import Component, Project, CanvasState, Connection, GenerationJob
 from .serializers import ComponentSerializer, ProjectSerializer,CanvasStateSerializer, ConnectionSerializer
+from .serializers import requested_fields, serialize_components, serialize_project_detail
+from .renderers import ORJSONRenderer
+from . import ai_jobs, component_cache, component_changes, snapshots, storage
+from .conditional import (
+    bump_revision, component_validators, not_modified, project_validators, set_validators,
+)
+from django.conf import settings
 from rest_framework.response import Response
 from rest_framework.decorators import api_view
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework import generics, status
 from rest_framework.response import Response
 from django.contrib.auth.models import User
@@ -14,9 +25,19 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from rest_framework.permissions import AllowAny
 from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.renderers import BrowsableAPIRenderer
 from django.db import transaction
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
 
-from core.gemini_service import generate_diagram
+from core import prompt_cache
+from core.gemini_service import LLMBusyError, LLMTimeoutError, agenerate_diagram
+from .component_import import ComponentImportError, import_components_zip
+from .filters import ParentFilter, UpdatedSinceFilter
+from .pagination import ComponentCursorPagination, ProjectCursorPagination
+from .canvas_sync import apply_canvas_delta, replace_canvas_state, CanvasDeltaError
+from .component_matcher import match_diagram
+from .graph_validation import validate_project
 
 
 @api_view(['GET'])
@@ -67,6 +88,9 @@ class ComponentListView(generics.ListCreateAPIView):
 
     ordering_fields = ['s_no', 'name', 'legend']
     ordering = ['s_no']
+    filter_backends = [ParentFilter, UpdatedSinceFilter]
+    pagination_class = ComponentCursorPagination
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
 
     def get_queryset(self):
         return (
@@ -80,16 +104,29 @@ class ComponentListView(generics.ListCreateAPIView):
 
     def list(self, request, *args, **kwargs):
         # ... (list method remains same) ...
-        queryset = self.filter_queryset(self.get_queryset())
-        queryset = queryset.filter(
-        svg__isnull=False,
-        png__isnull=False,
-        ).exclude(
-        svg='',
-        png='',
-        )
-        serializer = self.get_serializer(queryset, many=True, context={'request': request})
-        return Response({"components": serializer.data}, status=status.HTTP_200_OK)
+        sync_token = component_changes.make_token(timezone.now() - component_changes.SAFETY_MARGIN)
+        queryset = component_cache.listable(self.filter_queryset(self.get_queryset()))
+
+        etag, last_modified = component_validators(request, queryset)
+        response = not_modified(request, etag, last_modified)
+        if response is None:
+            page = self.paginate_queryset(queryset)
+            if page is not None:
+                serializer = self.get_serializer(page, many=True)
+                response = self.get_paginated_response(serializer.data)
+            elif set(request.query_params) - {"fields"}:
+                # Filtered: query directly, the cache only holds the full list
+                components = serialize_components(
+                    queryset.order_by("s_no"), request, requested_fields(request)
+                )
+                response = Response({"components": components}, status=status.HTTP_200_OK)
+            else:
+                # Shared defaults come from the cache; only the user's own are queried
+                components = component_cache.component_list(request)
+                response = Response({"components": components}, status=status.HTTP_200_OK)
+        # Lets a client that just downloaded the list continue with /components/changes/
+        response["X-Sync-Token"] = sync_token
+        return set_validators(response, etag, last_modified)
 
     def create(self, request, *args, **kwargs):
         # ... (create method remains same) ...
@@ -103,6 +140,46 @@ class ComponentListView(generics.ListCreateAPIView):
             status=status.HTTP_201_CREATED
         )
 
+class ComponentChangesView(generics.GenericAPIView):
+    """
+    GET /api/components/changes/?since=<token>
+    Components created/updated/deleted since a sync token, see
+    api/component_changes.py.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        payload = component_changes.changes_since(request, request.query_params.get("since"))
+        return Response(payload, status=status.HTTP_200_OK)
+
+
+class ComponentImportView(generics.GenericAPIView):
+    """
+    POST /api/components/import/  (multipart, field "zip_file"; staff only)
+    Bulk import of default components, see api/component_import.py.
+    """
+    permission_classes = [IsAdminUser]
+    parser_classes = [MultiPartParser, FormParser]
+
+    def post(self, request, *args, **kwargs):
+        zip_file = request.FILES.get("zip_file")
+        if not zip_file:
+            return Response({
+                "status": "error",
+                "message": "zip_file is required"
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            report = import_components_zip(zip_file)
+        except ComponentImportError as e:
+            return Response({
+                "status": "error",
+                "message": str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({"status": "success", **report.as_dict()}, status=status.HTTP_200_OK)
+
+
 class ComponentDetailView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = ComponentSerializer
     permission_classes = [IsAuthenticated]
@@ -124,7 +201,10 @@ class ComponentDetailView(generics.RetrieveUpdateDestroyAPIView):
         
         serializer = self.get_serializer(instance, data=request.data, partial=partial, context={'request': request})
         serializer.is_valid(raise_exception=True)
+        previous = (instance.svg.name, instance.png.name)
         serializer.save()
+        # Replaced assets may still be shared with other components
+        storage.release_on_commit(*(name for name in previous if name not in (instance.svg.name, instance.png.name)))
         return Response(serializer.data)
 
     def destroy(self, request, *args, **kwargs):
@@ -149,6 +229,8 @@ class ComponentByNameView(generics.RetrieveAPIView):
 class ProjectListCreateView(generics.ListCreateAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = ProjectSerializer
+    filter_backends = [UpdatedSinceFilter]
+    pagination_class = ProjectCursorPagination
 
     def get_queryset(self):
         return Project.objects.select_related("user").filter(
@@ -156,7 +238,12 @@ class ProjectListCreateView(generics.ListCreateAPIView):
         )
 
     def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
         serializer = self.get_serializer(queryset, many=True)
         return Response({
             "status": "success",
@@ -177,9 +264,13 @@ class ProjectDetailView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = ProjectSerializer
     permission_classes = [IsAuthenticated]
     lookup_field = "id"
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
 
     def get_queryset(self):
-        return Project.objects.filter(user=self.request.user)
+        queryset = Project.objects.filter(user=self.request.user)
+        if settings.PROJECT_SNAPSHOTS and self.request.method == "GET":
+            queryset = queryset.select_related("snapshot")
+        return queryset
 
     def handle_exception(self, exc):
         if isinstance(exc, Http404):
@@ -194,42 +285,32 @@ class ProjectDetailView(generics.RetrieveUpdateDestroyAPIView):
     # -----------------------------
     def retrieve(self, request, *args, **kwargs):
         project = self.get_object()
-
-        # Project detail
-        project_data = ProjectSerializer(project).data
-
-        # Canvas items (nodes)
-        canvas_items = (
-            CanvasState.objects
-            .filter(project=project)
-            .select_related("component")
-            .order_by("sequence")
-        )
-
-        items_data = CanvasStateSerializer(canvas_items, many=True).data
-
-        # Connections (edges)
-        connections = Connection.objects.filter(
-            sourceItemId__project=project
-        )
-
-        connections_data = ConnectionSerializer(connections, many=True).data
-
-        # Sequence counter (next available)
-        sequence_counter = (
-            canvas_items.last().sequence + 1
-            if canvas_items.exists()
-            else 0
-        )
-        response_data = project_data
-        response_data["status"] = "success"
-        response_data["canvas_state"] = {
-                "items": items_data,
-                "connections": connections_data,
-                "sequence_counter": sequence_counter
-            }
-
-        return Response(response_data, status=status.HTTP_200_OK)
+        # ?normalized=1: component data once in "components", not per item
+        normalized = request.query_params.get("normalized") in ("1", "true")
+
+        from_snapshot = settings.PROJECT_SNAPSHOTS
+
+        if from_snapshot:
+            # gzip and identity bodies are different representations
+            variant = snapshots.etag_variant(request, normalized)
+        else:
+            variant = "n" if normalized else ""
+        etag, last_modified = project_validators(project, variant)
+        response = None
+        if request.method in ("GET", "HEAD"):
+            response = not_modified(request, etag, last_modified)
+
+        if response is None:
+            if from_snapshot:
+                response = snapshots.snapshot_response(request, project, normalized)
+            else:
+                response = Response(
+                    serialize_project_detail(project, normalized=normalized),
+                    status=status.HTTP_200_OK,
+                )
+        if from_snapshot:
+            patch_vary_headers(response, ("Accept-Encoding",))
+        return set_validators(response, etag, last_modified)
 
     # UPDATE (project only)
 
@@ -244,75 +325,18 @@ class ProjectDetailView(generics.RetrieveUpdateDestroyAPIView):
         canvas_data = request.data.get("canvas_state")
 
         if canvas_data:
-            items_data = canvas_data.get("items", [])
-            connections_data = canvas_data.get("connections", [])
-
-            from .models import CanvasState, Connection
-
-            with transaction.atomic():
-
-                # Delete existing state
-                CanvasState.objects.filter(project=project).delete()
-
-                # Bulk create CanvasState
-                new_items = []
-                old_id_order = []
-
-                for item in items_data:
-                    comp_id = item.get("component_id")
-                    if not comp_id:
-                        continue
-
-                    new_items.append(
-                        CanvasState(
-                            project=project,
-                            component_id=comp_id,
-                            label=item.get("label", ""),
-                            x=item.get("x", 0),
-                            y=item.get("y", 0),
-                            width=item.get("width", 50),
-                            height=item.get("height", 50),
-                            rotation=item.get("rotation", 0),
-                            scaleX=item.get("scaleX", 1),
-                            scaleY=item.get("scaleY", 1),
-                            sequence=item.get("sequence", 0),
-                        )
-                    )
-
-                    old_id_order.append(item.get("id"))
-
-                created_items = CanvasState.objects.bulk_create(new_items)
-
-                # Build ID map (old_id -> new_id)
-                id_map = {}
-                for old_id, new_instance in zip(old_id_order, created_items):
-                    if old_id is not None:
-                        id_map[old_id] = new_instance.id
-
-                # Bulk create Connections
-                new_connections = []
-
-                for conn in connections_data:
-                    source_old_id = conn.get("sourceItemId")
-                    target_old_id = conn.get("targetItemId")
-
-                    real_source_id = id_map.get(source_old_id)
-                    real_target_id = id_map.get(target_old_id)
-
-                    if real_source_id and real_target_id:
-                        new_connections.append(
-                            Connection(
-                                sourceItemId_id=real_source_id,
-                                targetItemId_id=real_target_id,
-                                sourceGripIndex=conn.get("sourceGripIndex", 0),
-                                targetGripIndex=conn.get("targetGripIndex", 0),
-                                waypoints=conn.get("waypoints", []),
-                            )
-                        )
-
-                if new_connections:
-                    Connection.objects.bulk_create(new_connections)
-
+            try:
+                replace_canvas_state(project, canvas_data)
+            except CanvasDeltaError as e:
+                bump_revision([project.pk])
+                snapshots.project_changed(project)
+                return Response({
+                    "status": "error",
+                    "message": str(e)
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+        bump_revision([project.pk])
+        snapshots.project_changed(project)
         return self.retrieve(request, *args, **kwargs)
 
     # DELETE
@@ -326,44 +350,243 @@ class ProjectDetailView(generics.RetrieveUpdateDestroyAPIView):
         }, status=status.HTTP_200_OK)
 
 
+class ProjectCanvasDeltaView(generics.GenericAPIView):
+    """
+    PATCH /api/project/<id>/canvas/
+    Incremental canvas save: only the items/connections named in the delta
+    are written. See api/canvas_sync.py for the payload format.
+    """
+    permission_classes = [IsAuthenticated]
+    lookup_field = "id"
+
+    def get_queryset(self):
+        return Project.objects.filter(user=self.request.user)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, Http404):
+            return Response({
+                "status": "error",
+                "message": "Project not found"
+            }, status=status.HTTP_404_NOT_FOUND)
+        return super().handle_exception(exc)
+
+    def patch(self, request, *args, **kwargs):
+        project = self.get_object()
+
+        try:
+            id_map = apply_canvas_delta(project, request.data)
+        except CanvasDeltaError as e:
+            return Response({
+                "status": "error",
+                "message": str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        snapshots.project_changed(project)
+        payload = {
+            "status": "success",
+            "id_map": id_map
+        }
+        # ?validate=1 checks the saved graph in the same round trip
+        if request.query_params.get("validate") in ("1", "true"):
+            payload["validation"] = validate_project(project)
+        return Response(payload, status=status.HTTP_200_OK)
+
+
+class ProjectValidateView(generics.GenericAPIView):
+    """
+    GET /api/project/<id>/validate/
+    Graph checks on the stored canvas (isolated items, loops, inlet/outlet
+    reachability), see api/graph_validation.py.
+    """
+    permission_classes = [IsAuthenticated]
+    lookup_field = "id"
+
+    def get_queryset(self):
+        return Project.objects.filter(user=self.request.user)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, Http404):
+            return Response({
+                "status": "error",
+                "message": "Project not found"
+            }, status=status.HTTP_404_NOT_FOUND)
+        return super().handle_exception(exc)
+
+    def get(self, request, *args, **kwargs):
+        project = self.get_object()
+        return Response({
+            "status": "success",
+            **validate_project(project)
+        }, status=status.HTTP_200_OK)
+
+
 # ============= AI Endpoints =============
-@api_view(["POST"])
-@permission_classes([AllowAny]) # No login required for now to facilitate easy frontend testing
-def ai_generate(request):
+def _authenticate_and_throttle(request):
+    """
+    Run the DRF default authenticators, then the default throttles (this view
+    is a plain async Django view, so DRF does neither). Authenticating first
+    lets UserRateThrottle key JWT users by user instead of by IP. Returns an
+    error JsonResponse, or None if the request may go on.
+    """
+    from rest_framework.exceptions import APIException
+    from rest_framework.request import Request
+    from rest_framework.settings import api_settings
+
+    drf_request = Request(
+        request,
+        authenticators=[cls() for cls in api_settings.DEFAULT_AUTHENTICATION_CLASSES],
+    )
+    try:
+        request.user = drf_request.user
+    except APIException as e:
+        # A bad or expired token: reject it rather than serve it as anonymous
+        detail = e.detail if isinstance(e.detail, dict) else {"detail": e.detail}
+        return JsonResponse(detail, status=e.status_code)
+
+    for throttle_class in api_settings.DEFAULT_THROTTLE_CLASSES:
+        throttle = throttle_class()
+        if not throttle.allow_request(drf_request, None):
+            wait = throttle.wait()
+            return JsonResponse(
+                {"detail": f"Request was throttled. Expected available in {int(wait or 0)} seconds."},
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+            )
+    return None
+
+
+async def ai_generate(request):
     """
     POST /api/ai-generate/
     Accepts: { "prompt": "Pump connected to tank..." }
     Returns: Structured JSON for the Canvas UI or an Error message.
+
+    Async so a slow LLM call only parks a coroutine (under core/asgi.py);
+    see core/gemini_service.py for the timeout and concurrency limit. With
+    "async": true the prompt is queued as a job and 202 returned at once.
     """
-    prompt = request.data.get("prompt")
-    
+    if request.method != "POST":
+        return JsonResponse({"detail": f'Method "{request.method}" not allowed.'}, status=405)
+
+    rejected = await sync_to_async(_authenticate_and_throttle)(request)
+    if rejected is not None:
+        return rejected
+
+    if request.content_type == "application/json":
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            data = {}
+    else:
+        data = request.POST
+    prompt = data.get("prompt")
+
     # 1. Basic validation
     if not prompt or not isinstance(prompt, str):
-        return Response(
+        return JsonResponse(
             {"error": "Prompt string is required."}, 
             status=status.HTTP_400_BAD_REQUEST
         )
 
+    # "async": true (or ?async=1) queues a job instead of waiting, see api/ai_jobs.py
+    if data.get("async") in (True, "1", "true") or request.GET.get("async") in ("1", "true"):
+        job = await sync_to_async(ai_jobs.enqueue)(prompt)
+        base = f"/api/ai-generate/jobs/{job.id}/"
+        return JsonResponse({
+            "status": "queued",
+            "job_id": str(job.id),
+            "status_url": base,
+            "events_url": f"{base}events/",
+        }, status=status.HTTP_202_ACCEPTED)
+
     try:
-        # 2. Call the dedicated Gemini service
-        result = generate_diagram(prompt)
+        # 2. Call the configured LLM backend
+        result = await agenerate_diagram(prompt)
         
         # 3. Handle graceful LLM rejections
         if "error" in result:
-            return Response(result, status=status.HTTP_400_BAD_REQUEST)
+            return JsonResponse(result, status=status.HTTP_400_BAD_REQUEST)
             
-        # 4. Return success data
-        return Response(result, status=status.HTTP_200_OK)
-
+        # 4. Resolve the components to catalog items the editor can place
+        result = dict(result, canvas_state=await sync_to_async(match_diagram)(result))
+        return JsonResponse(result, status=status.HTTP_200_OK)
+
+    except LLMBusyError as e:
+        return JsonResponse({"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    except LLMTimeoutError as e:
+        return JsonResponse({"error": str(e)}, status=status.HTTP_504_GATEWAY_TIMEOUT)
     except ValueError as ve:
         # Configuration errors (like missing API key)
-        return Response(
+        return JsonResponse(
             {"error": str(ve)}, 
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
     except Exception as e:
         # General LLM or runtime errors
-        return Response(
+        return JsonResponse(
             {"error": str(e)}, 
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
+
+# No login required for now to facilitate easy frontend testing; token
+# clients don't send a CSRF token (csrf_exempt() can't wrap async views in
+# Django 4.2, hence the attribute)
+ai_generate.csrf_exempt = True
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def ai_generate_metrics(request):
+    """
+    GET /api/ai-generate/metrics/
+    Prompt cache counters (hits, misses, coalesced) and hit rate.
+    """
+    return Response({
+        "status": "success",
+        **prompt_cache.metrics()
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(["GET"])
+@permission_classes([AllowAny])
+def ai_job_status(request, job_id):
+    """
+    GET /api/ai-generate/jobs/<id>/
+    State of a queued generation plus whatever has been parsed so far.
+    """
+    job = GenerationJob.objects.filter(pk=job_id).first()
+    if job is None:
+        return Response({
+            "status": "error",
+            "message": "Job not found"
+        }, status=status.HTTP_404_NOT_FOUND)
+    return Response({
+        "status": "success",
+        "job": ai_jobs.job_payload(job)
+    }, status=status.HTTP_200_OK)
+
+
+async def ai_job_events(request, job_id):
+    """
+    GET /api/ai-generate/jobs/<id>/events/
+    Server-sent events for a generation job (format in api/ai_jobs.py).
+    Only streamed under ASGI; under WSGI it answers once with the events so
+    far and points the client to the status URL.
+    """
+    job = await GenerationJob.objects.filter(pk=job_id).afirst()
+    if job is None:
+        return JsonResponse({
+            "status": "error",
+            "message": "Job not found"
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    if isinstance(request, ASGIRequest):
+        response = StreamingHttpResponse(ai_jobs.event_stream(job_id), content_type="text/event-stream")
+    else:
+        status_url = f"/api/ai-generate/jobs/{job.id}/"
+        response = HttpResponse(ai_jobs.event_snapshot(job, status_url), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Don't let a proxy buffer the stream
+    response["X-Accel-Buffering"] = "no"
+    return response
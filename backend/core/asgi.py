@@ -3,6 +3,14 @@ ASGI config for core project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve it with uvicorn (in requirements.txt; see "Running in production" in
+the readme) to get the async request path: /api/ai-generate/ is an async
+view, so a slow LLM call waits on the event loop instead of holding a worker
+the rest of the API needs, and the job events stream is only streamed here.
+Under WSGI it still works, one request per worker thread: the LLM concurrency
+limit and client (core/gemini_service.py, core/llm_backends.py) are
+process-wide, so they hold either way.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
@@ -0,0 +1,69 @@
+"""
+Incremental parser for a streamed diagram answer.
+
+The model streams text like
+
+    {"components": [{"id": "c1", ...}, {"id": "c2", ...}], "connections": [...]}
+
+in arbitrary chunks. feed() returns every component / connection object
+that became complete with the new chunk, so generation jobs can publish
+them before the whole answer has arrived. It only tracks nesting and
+strings; the final text is still validated with json.loads().
+"""
+import json
+
+SECTIONS = ("components", "connections")
+
+
+class PartialDiagramParser:
+    def __init__(self):
+        self.text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._last_key = None      # last string seen at depth 1 (the top-level object)
+        self._section = None       # section whose array we're in
+        self._item_start = None
+
+    def feed(self, chunk):
+        """Consume `chunk`; returns [(section, item), ...] completed by it."""
+        self.text += chunk
+        done = []
+        text = self.text
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_key = text[self._string_start + 1:i]
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch in "{[":
+                self._depth += 1
+                if ch == "[" and self._depth == 2 and self._last_key in SECTIONS:
+                    self._section = self._last_key
+                elif ch == "{" and self._depth == 3 and self._section:
+                    self._item_start = i
+            elif ch in "}]":
+                if ch == "}" and self._depth == 3 and self._item_start is not None:
+                    try:
+                        done.append((self._section, json.loads(text[self._item_start:i + 1])))
+                    except ValueError:
+                        pass
+                    self._item_start = None
+                elif ch == "]" and self._depth == 2:
+                    self._section = None
+                self._depth -= 1
+
+        self._pos = len(text)
+        return done
@@ -1,24 +1,42 @@
+"""
+AI diagram generation.
+
+agenerate_diagram() is what the async /api/ai-generate/ view awaits: the
+prompt is looked up in the result cache (core/prompt_cache.py), then goes to
+the configured LLM backend (core/llm_backends.py) with a timeout, and at most
+settings.LLM_MAX_CONCURRENCY calls run at once per process, so slow model
+calls queue here instead of tying up workers that serve the rest of the API.
+
+The limit is a threading semaphore rather than an asyncio one: under WSGI
+(gunicorn) every request to an async view runs on its own event loop, so a
+per-loop semaphore would never see two calls at once.
+
+astream_diagram() does the same but reports each component / connection as
+it is parsed (generation jobs, api/ai_jobs.py); generate_diagram() is the
+blocking wrapper for sync callers.
+"""
+import asyncio
 import json
-from google import genai
-from google.genai import types
+import threading
+import time
+
+from asgiref.sync import async_to_sync
 from django.conf import settings
 
+from . import prompt_cache
+from .diagram_parser import PartialDiagramParser
+from .llm_backends import get_backend
+
+
+class LLMBusyError(RuntimeError):
+    """Every generation slot stayed taken for LLM_QUEUE_TIMEOUT seconds."""
 
-def generate_diagram(user_input: str) -> dict:
-    """
-    Takes a natural language prompt and returns a structured JSON dictionary
-    representing the components and connections for a Chemical PFD.
-    """
 
-    # ✅ 1. Validate API Key
-    api_key = getattr(settings, "GEMINI_API_KEY", None)
-    if not api_key:
-        raise ValueError("LLM API key is not configured.")
+class LLMTimeoutError(RuntimeError):
+    """The backend took longer than LLM_TIMEOUT seconds."""
 
-    client = genai.Client(api_key=api_key)
 
-    # ✅ 2. IMPROVED SYSTEM PROMPT (CRITICAL FIX)
-    system_prompt = """
+SYSTEM_PROMPT = """
     You are an expert chemical engineering assistant.
 
     Your task is to convert a user’s process description into a structured
@@ -85,33 +103,96 @@ def generate_diagram(user_input: str) -> dict:
     { "error": "Invalid input. Please describe a process flow involving industrial components." }
     """
 
-    try:
-        # ✅ 3. Generate structured JSON response
-        response = client.models.generate_content(
-            model="gemini-3-flash-preview",
-            contents=user_input,
-            config=types.GenerateContentConfig(
-                system_instruction=system_prompt,
-                response_mime_type="application/json",
-                temperature=0.3  # 🔥 more consistent output
-            )
-        )
 
-        output_text = response.text.strip()
+_limiters = {}   # LLM_MAX_CONCURRENCY -> threading.BoundedSemaphore
+_limiters_lock = threading.Lock()
+# How often a queued call checks for a free slot
+LIMITER_POLL_INTERVAL = 0.05
+
 
-        # ✅ 4. Parse JSON safely
-        parsed_data = json.loads(output_text)
+def _limiter():
+    size = settings.LLM_MAX_CONCURRENCY
+    with _limiters_lock:
+        limiter = _limiters.get(size)
+        if limiter is None:
+            limiter = _limiters[size] = threading.BoundedSemaphore(size)
+        return limiter
 
-        # ✅ 5. VALIDATION (IMPORTANT FIX)
-        if "components" not in parsed_data or "connections" not in parsed_data:
-            raise ValueError("Invalid AI response structure")
 
-        return parsed_data
+async def _acquire(limiter, timeout):
+    """Take a slot without blocking the event loop; False after `timeout` seconds."""
+    deadline = time.monotonic() + timeout
+    while not limiter.acquire(blocking=False):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        await asyncio.sleep(min(LIMITER_POLL_INTERVAL, remaining))
+    return True
 
+
+def parse_diagram(output_text: str) -> dict:
+    """Parse and sanity check the model's JSON answer."""
+    try:
+        parsed_data = json.loads(output_text.strip())
     except json.JSONDecodeError:
         raise RuntimeError("LLM returned malformed JSON")
 
-    except Exception as e:
-        return {
-            "error": str(e)
-        }
\ No newline at end of file
+    if "error" in parsed_data:
+        return {"error": parsed_data["error"]}
+    if "components" not in parsed_data or "connections" not in parsed_data:
+        return {"error": "Invalid AI response structure"}
+    return parsed_data
+
+
+async def agenerate_diagram(user_input: str) -> dict:
+    """
+    Takes a natural language prompt and returns a structured JSON dictionary
+    representing the components and connections for a Chemical PFD.
+    Repeated prompts are answered from core/prompt_cache.py.
+    """
+    return await prompt_cache.cached_generate(
+        user_input, SYSTEM_PROMPT, lambda: _generate(user_input)
+    )
+
+
+async def astream_diagram(user_input: str, on_item) -> dict:
+    """
+    agenerate_diagram() that streams: `await on_item(section, item)` runs for
+    every component / connection as soon as it has been parsed. Cached and
+    coalesced answers arrive whole, without on_item calls.
+    """
+    return await prompt_cache.cached_generate(
+        user_input, SYSTEM_PROMPT, lambda: _generate(user_input, on_item)
+    )
+
+
+async def _consume_stream(user_input, on_item):
+    parser = PartialDiagramParser()
+    async for chunk in get_backend().stream(user_input, SYSTEM_PROMPT):
+        for section, item in parser.feed(chunk):
+            await on_item(section, item)
+    return parser.text
+
+
+async def _generate(user_input, on_item=None):
+    limiter = _limiter()
+    if not await _acquire(limiter, settings.LLM_QUEUE_TIMEOUT):
+        raise LLMBusyError("AI generation is busy, please try again shortly.")
+
+    if on_item is None:
+        call = get_backend().generate(user_input, SYSTEM_PROMPT)
+    else:
+        call = _consume_stream(user_input, on_item)
+    try:
+        output_text = await asyncio.wait_for(call, settings.LLM_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise LLMTimeoutError("AI generation timed out.")
+    finally:
+        limiter.release()
+
+    return parse_diagram(output_text)
+
+
+def generate_diagram(user_input: str) -> dict:
+    """Blocking agenerate_diagram() for sync code."""
+    return async_to_sync(agenerate_diagram)(user_input)
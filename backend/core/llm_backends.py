@@ -0,0 +1,183 @@
+"""
+LLM backends for AI diagram generation.
+
+gemini_service talks to whatever settings.LLM_BACKEND (a dotted class path)
+names. A backend only has to turn a prompt into the model's raw JSON text:
+
+    class MyBackend(LLMBackend):
+        async def generate(self, prompt, system_prompt):
+            return '{"components": [...], "connections": [...]}'
+
+and may override stream() to yield that text in chunks as it arrives (used
+by generation jobs to publish partial diagrams).
+
+GeminiBackend is the production one. StubBackend answers locally without a
+network call, for tests and offline development
+(LLM_BACKEND=core.llm_backends.StubBackend).
+"""
+import asyncio
+import json
+import re
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class LLMBackend:
+    async def generate(self, prompt, system_prompt):
+        """Return the model's raw response text for `prompt`."""
+        raise NotImplementedError
+
+    async def stream(self, prompt, system_prompt):
+        """Yield the response text in chunks; backends that can't stream yield it whole."""
+        yield await self.generate(prompt, system_prompt)
+
+
+class GeminiBackend(LLMBackend):
+    """
+    Google Gemini through google-genai. One client (and its connection pool)
+    is shared by the whole process instead of being created per request.
+
+    The blocking client is called on a worker thread: under WSGI every
+    request to an async view runs on its own short-lived event loop, and an
+    async client bound to one loop can't be reused from the next.
+    """
+
+    _DONE = object()
+
+    def __init__(self):
+        self._client = None
+        self._lock = threading.Lock()
+
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                from google import genai
+                from google.genai import types
+
+                api_key = getattr(settings, "GEMINI_API_KEY", None)
+                if not api_key:
+                    raise ValueError("LLM API key is not configured.")
+                self._client = genai.Client(
+                    api_key=api_key,
+                    # google-genai takes the timeout in milliseconds
+                    http_options=types.HttpOptions(timeout=int(settings.LLM_TIMEOUT * 1000)),
+                )
+            return self._client
+
+    def _config(self, system_prompt):
+        from google.genai import types
+
+        return types.GenerateContentConfig(
+            system_instruction=system_prompt,
+            response_mime_type="application/json",
+            temperature=0.3  # 🔥 more consistent output
+        )
+
+    async def generate(self, prompt, system_prompt):
+        def call():
+            return self.client().models.generate_content(
+                model=settings.GEMINI_MODEL,
+                contents=prompt,
+                config=self._config(system_prompt),
+            ).text
+
+        return await sync_to_async(call, thread_sensitive=False)()
+
+    async def stream(self, prompt, system_prompt):
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+
+        def put(value):
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, value)
+            except RuntimeError:
+                # The consumer's loop is gone (request cancelled)
+                pass
+
+        def produce():
+            try:
+                chunks = self.client().models.generate_content_stream(
+                    model=settings.GEMINI_MODEL,
+                    contents=prompt,
+                    config=self._config(system_prompt),
+                )
+                for chunk in chunks:
+                    if chunk.text:
+                        put(chunk.text)
+            except Exception as e:
+                put(e)
+            finally:
+                put(self._DONE)
+
+        producer = loop.run_in_executor(None, produce)
+        while True:
+            item = await queue.get()
+            if item is self._DONE:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+        await producer
+
+
+class StubBackend(LLMBackend):
+    """
+    Local generator: picks known equipment words out of the prompt, in
+    order, and chains them c1 -> c2 -> ... Empty prompts get the error
+    payload the real system prompt asks for.
+    """
+
+    CHUNK_SIZE = 24
+
+    EQUIPMENT = {
+        "pump": ("pump", "centrifugal pump", "Pump"),
+        "compressor": ("compressor", "centrifugal compressor", "Compressor"),
+        "valve": ("valve", "gate valve", "Valve"),
+        "tank": ("tank", "storage tank", "Storage Tank"),
+        "vessel": ("vessel", "vertical vessel", "Vessel"),
+        "exchanger": ("heat_exchanger", "shell and tube heat exchanger", "Heat Exchanger"),
+        "heater": ("heat_exchanger", "fired heater", "Heater"),
+        "cooler": ("heat_exchanger", "air cooler", "Cooler"),
+        "dryer": ("dryer", "rotary dryer", "Dryer"),
+        "separator": ("separator", "two phase separator", "Separator"),
+        "reactor": ("reactor", "stirred tank reactor", "Reactor"),
+        "column": ("column", "distillation column", "Column"),
+    }
+
+    async def generate(self, prompt, system_prompt):
+        words = re.findall(r"[a-z]+", prompt.lower())
+        found = [self.EQUIPMENT[w.rstrip("s")] for w in words if w.rstrip("s") in self.EQUIPMENT]
+        if not found:
+            return json.dumps({
+                "error": "Invalid input. Please describe a process flow involving industrial components."
+            })
+
+        components = [
+            {"id": f"c{i}", "type": kind, "variant": variant, "label": f"{label} {i}"}
+            for i, (kind, variant, label) in enumerate(found, start=1)
+        ]
+        connections = [
+            {"from": f"c{i}", "to": f"c{i + 1}"} for i in range(1, len(components))
+        ]
+        return json.dumps({"components": components, "connections": connections})
+
+    async def stream(self, prompt, system_prompt):
+        # Small chunks, like a model streaming tokens
+        text = await self.generate(prompt, system_prompt)
+        for start in range(0, len(text), self.CHUNK_SIZE):
+            yield text[start:start + self.CHUNK_SIZE]
+
+
+_backends = {}
+
+
+def get_backend():
+    """The configured backend instance (one per dotted path, shared)."""
+    path = settings.LLM_BACKEND
+    backend = _backends.get(path)
+    if backend is None:
+        backend = _backends[path] = import_string(path)()
+    return backend
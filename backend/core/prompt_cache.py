@@ -0,0 +1,174 @@
+"""
+Result cache for AI diagram generation.
+
+Successful diagrams are stored in the "ai" cache (settings.CACHES, file based
+with a TTL and MAX_ENTRIES by default) under a key made of
+
+    normalized prompt + backend + model + system prompt version
+
+Normalizing lowercases, collapses whitespace and drops trailing punctuation,
+so "Pump to tank." and "pump  to tank" share an entry; the system prompt
+version is a hash of its text, so editing the prompt retires old results.
+
+Concurrent requests for the same key are coalesced: the first one calls the
+LLM, the others wait for its result (and if the first is cancelled, one of
+them takes over). Within a process that is a shared map
+of futures, so it holds under WSGI too, where every request to an async view
+runs on its own event loop. Across processes the first caller also takes a
+lock in the default cache and the others poll the "ai" cache for its result;
+that needs a default cache shared by the workers (CACHE_BACKEND in
+settings); with the per-process LocMemCache each worker generates alone.
+
+Hits, misses and coalesced requests are counted in the default cache (see
+metrics()), where cache culling of the "ai" entries can't reset them.
+"""
+import asyncio
+import concurrent.futures
+import hashlib
+import re
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache, caches
+
+CACHE_ALIAS = "ai"
+METRICS = ("hits", "misses", "coalesced")
+# How often a request waiting on another worker's call checks for its result
+LOCK_POLL_INTERVAL = 0.2
+
+_inflight = {}   # key -> concurrent.futures.Future, shared by every event loop
+_inflight_lock = threading.Lock()
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def normalize(prompt):
+    text = re.sub(r"\s+", " ", prompt).strip().lower()
+    return text.rstrip(" .!?")
+
+
+def cache_key(prompt, system_prompt):
+    version = hashlib.sha256(system_prompt.encode()).hexdigest()[:12]
+    raw = "\n".join([normalize(prompt), settings.LLM_BACKEND, settings.GEMINI_MODEL, version])
+    return "ai:diagram:" + hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _metric_key(metric):
+    return f"ai:metrics:{metric}"
+
+
+def _count_sync(metric):
+    key = _metric_key(metric)
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add and incr; losing one count is fine
+        pass
+
+
+# One sync call, so coroutines can't interleave inside the read-modify-write
+# (the cache's own aincr() awaits between its get and set)
+_count = sync_to_async(_count_sync)
+
+
+def _claim(key):
+    """(future, leader): the in-flight future for `key`, and whether the caller runs it."""
+    with _inflight_lock:
+        future = _inflight.get(key)
+        if future is not None:
+            return future, False
+        future = _inflight[key] = concurrent.futures.Future()
+        return future, True
+
+
+def _release(key):
+    # Before the future resolves, so a waiter that retries claims a new one
+    with _inflight_lock:
+        _inflight.pop(key, None)
+
+
+async def cached_generate(prompt, system_prompt, generate):
+    """
+    Return the cached diagram for `prompt`, or await generate() (once per
+    key, however many requests arrive meanwhile) and cache its result.
+    Results carrying an "error" are returned but not cached.
+    """
+    key = cache_key(prompt, system_prompt)
+    result = await _cache().aget(key)
+    if result is not None:
+        await _count("hits")
+        return result
+
+    while True:
+        future, leader = _claim(key)
+        if leader:
+            break
+        try:
+            result = await asyncio.shield(asyncio.wrap_future(future))
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                raise
+            # The leader's request went away (a client disconnect under
+            # ASGI), not this one: claim the key again
+            continue
+        await _count("coalesced")
+        return result
+
+    try:
+        result = await _generate_once(key, generate)
+    except asyncio.CancelledError:
+        _release(key)
+        future.cancel()
+        raise
+    except Exception as e:
+        _release(key)
+        future.set_exception(e)
+        raise
+    _release(key)
+    future.set_result(result)
+    return result
+
+
+async def _generate_once(key, generate):
+    """generate() and cache the result, unless another worker is already on `key`."""
+    lock_key = f"{key}:lock"
+    lock_timeout = settings.LLM_QUEUE_TIMEOUT + settings.LLM_TIMEOUT
+    deadline = time.monotonic() + lock_timeout
+    locked = await cache.aadd(lock_key, 1, timeout=lock_timeout)
+    while not locked and time.monotonic() < deadline:
+        await asyncio.sleep(LOCK_POLL_INTERVAL)
+        result = await _cache().aget(key)
+        if result is not None:
+            await _count("coalesced")
+            return result
+        # Gone without a result (an error or a rejection): take over
+        locked = await cache.aadd(lock_key, 1, timeout=lock_timeout)
+
+    try:
+        await _count("misses")
+        result = await generate()
+        if "error" not in result:
+            # Before the lock goes, so waiting workers find it
+            await _cache().aset(key, result)
+        return result
+    finally:
+        if locked:
+            await cache.adelete(lock_key)
+
+
+def metrics():
+    counts = cache.get_many([_metric_key(m) for m in METRICS])
+    data = {m: counts.get(_metric_key(m), 0) for m in METRICS}
+    served = data["hits"] + data["misses"] + data["coalesced"]
+    data["hit_rate"] = round((data["hits"] + data["coalesced"]) / served, 4) if served else 0.0
+    return data
+
+
+def clear():
+    _cache().clear()
+    cache.delete_many([_metric_key(m) for m in METRICS])
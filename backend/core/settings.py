@@ -187,6 +187,65 @@ SIMPLE_JWT = {
 }
 
 
+# ===============================
+# CACHE
+# ===============================
+
+# Local memory by default so no Redis is needed; set CACHE_BACKEND to
+# django.core.cache.backends.filebased.FileBasedCache (and CACHE_LOCATION to
+# a directory) to share the cache between worker processes.
+CACHES = {
+    "default": {
+        "BACKEND": env("CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": env("CACHE_LOCATION", default="chemical-pfd"),
+    },
+    # AI generation results (see core/prompt_cache.py); file backed so the
+    # cache survives restarts and is shared by every worker on the host
+    "ai": {
+        "BACKEND": env("AI_CACHE_BACKEND", default="django.core.cache.backends.filebased.FileBasedCache"),
+        "LOCATION": env("AI_CACHE_LOCATION", default=str(BASE_DIR / "cache" / "ai")),
+        "TIMEOUT": env.int("AI_CACHE_TTL", default=7 * 24 * 3600),
+        "OPTIONS": {"MAX_ENTRIES": env.int("AI_CACHE_MAX_ENTRIES", default=1000)},
+    },
+}
+
+# Seconds a serialized default component list is kept (see api/component_cache.py)
+COMPONENT_CACHE_TIMEOUT = env.int("COMPONENT_CACHE_TIMEOUT", default=3600)
+
+# Days deleted components are remembered for /api/components/changes/;
+# clients with an older sync token get a full list instead
+COMPONENT_TOMBSTONE_DAYS = env.int("COMPONENT_TOMBSTONE_DAYS", default=90)
+
+
+# ===============================
+# PROJECT SNAPSHOTS
+# ===============================
+
+# Serve project retrieve from a gzip-compressed JSON document materialized
+# on every canvas write (rows stay the source of truth)
+PROJECT_SNAPSHOTS = env.bool("PROJECT_SNAPSHOTS", default=False)
+
+
+# ===============================
+# AI GENERATION
+# ===============================
+
+# Dotted path of the LLM backend (core/llm_backends.py); use
+# core.llm_backends.StubBackend to work without an API key
+LLM_BACKEND = env("LLM_BACKEND", default="core.llm_backends.GeminiBackend")
+GEMINI_MODEL = env("GEMINI_MODEL", default="gemini-3-flash-preview")
+# Seconds one generation may take
+LLM_TIMEOUT = env.float("LLM_TIMEOUT", default=60)
+# Generations running at once per process (shared by every event loop and
+# thread), and how long a request waits for a free slot before getting 503
+LLM_MAX_CONCURRENCY = env.int("LLM_MAX_CONCURRENCY", default=4)
+LLM_QUEUE_TIMEOUT = env.float("LLM_QUEUE_TIMEOUT", default=10)
+# Generation jobs ("async": true, run by `manage.py ai_worker`): how often
+# the events stream checks the job, and how long one stream stays open
+AI_JOB_POLL_INTERVAL = env.float("AI_JOB_POLL_INTERVAL", default=0.5)
+AI_JOB_STREAM_TIMEOUT = env.float("AI_JOB_STREAM_TIMEOUT", default=300)
+
+
 # ===============================
 # INTERNATIONALIZATION
 # ===============================
@@ -1,14 +1,27 @@
+import re
+
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.http import HttpResponse
+from django.views.static import serve
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from django.conf import settings
-from django.conf.urls.static import static
+
+from api.storage import is_content_addressed
 
 
 def home(request):
     return HttpResponse("Backend is running 🚀--")
 
+
+def media(request, path):
+    response = serve(request, path, document_root=settings.MEDIA_ROOT)
+    # Content-addressed assets never change under the same URL (api/storage.py)
+    if is_content_addressed(path):
+        response["Cache-Control"] = "public, max-age=31536000, immutable"
+    return response
+
+
 urlpatterns = [
     path('', home),
     path('admin/', admin.site.urls),
@@ -22,4 +35,6 @@ urlpatterns = [
 ]
 
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    urlpatterns += [
+        re_path(r"^%s(?P<path>.*)$" % re.escape(settings.MEDIA_URL.lstrip("/")), media),
+    ]
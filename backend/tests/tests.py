@@ -1,14 +1,21 @@
-from django.test import TestCase
+from django.conf import settings
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.utils import timezone
 from django.core.files.uploadedfile import SimpleUploadedFile
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from unittest.mock import patch, MagicMock
 import unittest
+import gzip
 import json
+import tempfile
+import uuid
 
-from api.models import Component, Project, CanvasState, Connection
+from api.models import Component, Project, CanvasState, Connection, ProjectSnapshot
+from api.serializers import ComponentSerializer
 
 
 # ---------------------------------------------------------------------------
@@ -186,6 +193,33 @@ class ComponentListViewTests(APITestCase):
         names = [c["name"] for c in response.data["components"]]
         self.assertNotIn("NoFiles", names)
 
+    def test_values_serialization_matches_component_serializer(self):
+        from rest_framework.request import Request
+        from rest_framework.test import APIRequestFactory
+        from api.serializers import serialize_components
+        make_component(self.user, s_no="C001", name="Own")
+        make_component(None, s_no="C002", name="Default")
+        request = Request(APIRequestFactory().get(self.url))
+        queryset = Component.objects.order_by("s_no")
+
+        expected = ComponentSerializer(queryset, many=True, context={"request": request, "fields": None}).data
+        self.assertEqual(serialize_components(queryset, request), [dict(c) for c in expected])
+        self.assertEqual(
+            serialize_components(queryset, request, {"id", "svg_url"}),
+            [{"id": c["id"], "svg_url": c["svg_url"]} for c in expected],
+        )
+
+    def test_orjson_renderer_matches_json_renderer(self):
+        from rest_framework.renderers import JSONRenderer
+        from api.renderers import ORJSONRenderer
+        data = {"name": "Pompe é", "when": timezone.now(), "uid": uuid.uuid4(), "items": [1.5, None, True]}
+        self.assertEqual(json.loads(ORJSONRenderer().render(data)), json.loads(JSONRenderer().render(data)))
+
+        make_component(None, s_no="C002", name="Default")
+        response = self.client.get(self.url)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(json.loads(response.content)["components"][0]["name"], "Default")
+
     def test_create_component(self):
         data = {
             "s_no": "C010",
@@ -205,6 +239,420 @@ class ComponentListViewTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
+# ---------------------------------------------------------------------------
+# Components – Cached default list
+# ---------------------------------------------------------------------------
+
+class ComponentListCacheTests(APITestCase):
+    url = "/api/components/"
+
+    def setUp(self):
+        cache.clear()
+        self.user = make_user()
+        self.client.force_authenticate(user=self.user)
+        self.default = make_component(None, s_no="C001", name="Default1")
+
+    def names(self):
+        return [c["name"] for c in self.client.get(self.url).data["components"]]
+
+    def test_default_components_are_serialized_once(self):
+        self.names()
+        from api.serializers import serialize_components
+        with patch("api.component_cache.serialize_components", wraps=serialize_components) as serializer:
+            self.names()
+        # Only the user's own components were serialized
+        self.assertEqual(serializer.call_count, 1)
+        self.assertEqual(serializer.call_args.args[0].model, Component)
+        self.assertFalse(serializer.call_args.args[0].filter(created_by__isnull=True).exists())
+
+    def test_own_components_are_merged_by_s_no(self):
+        make_component(self.user, s_no="C000", name="Own0")
+        make_component(make_user("other"), s_no="C002", name="Other")
+        self.assertEqual(self.names(), ["Own0", "Default1"])
+
+    def test_cache_is_invalidated_on_create_update_and_delete(self):
+        self.assertEqual(self.names(), ["Default1"])
+
+        added = make_component(None, s_no="C002", name="Default2")
+        self.assertEqual(self.names(), ["Default1", "Default2"])
+
+        added.name = "Renamed"
+        added.save()
+        self.assertEqual(self.names(), ["Default1", "Renamed"])
+
+        added.delete()
+        self.assertEqual(self.names(), ["Default1"])
+
+    def test_writes_that_bypass_signals_are_still_picked_up(self):
+        self.names()
+        Component.objects.filter(id=self.default.id).update(name="Bulk", updated_at=timezone.now())
+        self.assertEqual(self.names(), ["Bulk"])
+
+
+# ---------------------------------------------------------------------------
+# Components / Projects – Pagination, sparse fields and filters
+# ---------------------------------------------------------------------------
+
+class ListQueryParamTests(APITestCase):
+    url = "/api/components/"
+
+    def setUp(self):
+        cache.clear()
+        self.user = make_user()
+        self.client.force_authenticate(user=self.user)
+        for i in range(5):
+            make_component(None, s_no=f"C00{i}", name=f"Comp{i}")
+
+    def test_unpaginated_by_default(self):
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.data["components"]), 5)
+        self.assertNotIn("next", response.data)
+
+    def test_cursor_pages_walk_the_whole_list(self):
+        names = []
+        url = self.url + "?page_size=2"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data["components"]), 2)
+            names += [c["name"] for c in response.data["components"]]
+            url = response.data["next"]
+        self.assertEqual(names, [f"Comp{i}" for i in range(5)])
+
+    def test_fields_limits_serialized_fields(self):
+        for query in ("?fields=id,s_no,name", "?fields=id,s_no,name&page_size=10"):
+            response = self.client.get(self.url + query)
+            self.assertEqual(set(response.data["components"][0]), {"id", "s_no", "name"})
+
+    def test_filter_by_parent(self):
+        Component.objects.filter(s_no="C001").update(parent="Valves")
+        response = self.client.get(self.url + "?parent=Valves,Pumps")
+        self.assertEqual([c["s_no"] for c in response.data["components"]], ["C001"])
+
+    def test_filter_by_updated_since(self):
+        old = timezone.now() - timezone.timedelta(days=1)
+        Component.objects.exclude(s_no="C004").update(updated_at=old)
+        since = (old + timezone.timedelta(hours=1)).isoformat()
+        response = self.client.get(self.url, {"updated_since": since})
+        self.assertEqual([c["s_no"] for c in response.data["components"]], ["C004"])
+
+    def test_invalid_updated_since_returns_400(self):
+        response = self.client.get(self.url + "?updated_since=yesterday")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_project_list_pagination_and_fields(self):
+        for i in range(3):
+            make_project(self.user, f"P{i}")
+        response = self.client.get("/api/project/?page_size=2&fields=id,name")
+        self.assertEqual(response.data["status"], "success")
+        self.assertEqual(len(response.data["projects"]), 2)
+        self.assertEqual(set(response.data["projects"][0]), {"id", "name"})
+        self.assertIsNotNone(response.data["next"])
+
+    def test_project_saved_while_paging_is_not_skipped(self):
+        from api.conditional import bump_revision
+        projects = [make_project(self.user, f"P{i}") for i in range(3)]
+        first = self.client.get("/api/project/?page_size=2&fields=id")
+
+        # The project due on the next page is saved in between
+        bump_revision([projects[0].id])
+        second = self.client.get(first.data["next"])
+
+        ids = [p["id"] for p in first.data["projects"] + second.data["projects"]]
+        self.assertEqual(ids, [p.id for p in reversed(projects)])
+
+
+# ---------------------------------------------------------------------------
+# Components – Changes feed
+# ---------------------------------------------------------------------------
+
+class ComponentChangesViewTests(APITestCase):
+    url = "/api/components/changes/"
+
+    def setUp(self):
+        self.user = make_user()
+        self.client.force_authenticate(user=self.user)
+        self.kept = make_component(None, s_no="C001", name="Kept")
+        self.edited = make_component(None, s_no="C002", name="Edited")
+        self.removed = make_component(self.user, s_no="C003", name="Removed")
+
+    def backdate_everything(self):
+        old = timezone.now() - timezone.timedelta(hours=1)
+        Component.objects.update(created_at=old, updated_at=old)
+
+    def test_without_token_returns_full_list(self):
+        response = self.client.get(self.url)
+        self.assertTrue(response.data["full"])
+        self.assertEqual([c["name"] for c in response.data["created"]], ["Kept", "Edited", "Removed"])
+        self.assertEqual(response.data["deleted"], [])
+
+    def test_delta_lists_created_updated_and_deleted(self):
+        self.backdate_everything()
+        token = self.client.get(self.url).data["token"]
+
+        self.edited.refresh_from_db()
+        self.edited.name = "Edited2"
+        self.edited.save()
+        removed_id = self.removed.id
+        self.removed.delete()
+        make_component(None, s_no="C004", name="Added")
+        # Another user's private component is not this user's business
+        other = make_component(make_user("other"), s_no="C005", name="Private")
+        other.delete()
+
+        response = self.client.get(self.url, {"since": token})
+        self.assertFalse(response.data["full"])
+        self.assertEqual([c["name"] for c in response.data["created"]], ["Added"])
+        self.assertEqual([c["name"] for c in response.data["updated"]], ["Edited2"])
+        self.assertEqual(response.data["deleted"], [removed_id])
+
+    def test_nothing_changed_returns_empty_delta(self):
+        self.backdate_everything()
+        token = self.client.get(self.url).data["token"]
+        response = self.client.get(self.url, {"since": token})
+        self.assertEqual(
+            (response.data["created"], response.data["updated"], response.data["deleted"]),
+            ([], [], []),
+        )
+
+    def test_list_response_carries_a_sync_token(self):
+        self.backdate_everything()
+        token = self.client.get("/api/components/")["X-Sync-Token"]
+        kept_id = self.kept.id
+        self.kept.delete()
+        response = self.client.get(self.url, {"since": token})
+        self.assertEqual(response.data["deleted"], [kept_id])
+
+    def test_token_older_than_retention_forces_full_list(self):
+        from api.component_changes import make_token
+        token = make_token(timezone.now() - timezone.timedelta(days=365))
+        self.assertTrue(self.client.get(self.url, {"since": token}).data["full"])
+
+    def test_invalid_token_returns_400(self):
+        response = self.client.get(self.url, {"since": "not-a-token"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+# ---------------------------------------------------------------------------
+# Components – Bulk ZIP import
+# ---------------------------------------------------------------------------
+
+def make_components_zip(rows, assets=None, csv_name="components.csv"):
+    """ZIP in the admin upload layout; assets maps "svg/Name.svg" -> bytes."""
+    import csv as csv_module, io, zipfile
+    text = io.StringIO()
+    writer = csv_module.DictWriter(text, fieldnames=["s_no", "name", "parent", "legend", "suffix", "object", "grips"])
+    writer.writeheader()
+    writer.writerows(rows)
+
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        zf.writestr(f"Components/{csv_name}", text.getvalue())
+        for path, data in (assets or {}).items():
+            zf.writestr(f"Components/{path}", data)
+    buf.seek(0)
+    return buf
+
+
+class ComponentImportTests(APITestCase):
+    url = "/api/components/import/"
+
+    def setUp(self):
+        self.rows = [
+            {"s_no": "P001", "name": "Pump", "parent": "Pumps", "grips": '[{"x": 1}]'},
+            {"s_no": "V001", "name": "Valve", "parent": "Valves"},
+        ]
+        self.assets = {
+            "SVG/Pump.svg": b"<svg id='pump'/>", "PNG/Pump.png": b"pump-png",
+            "SVG/Valve.svg": b"<svg id='valve'/>", "PNG/Valve.png": b"valve-png",
+        }
+
+    def run_import(self, rows=None, assets=None, **kwargs):
+        from api.component_import import import_components_zip
+        return import_components_zip(make_components_zip(rows or self.rows, assets or self.assets), **kwargs)
+
+    def test_creates_components_with_assets(self):
+        report = self.run_import()
+        self.assertEqual(report.created, ["P001", "V001"])
+        pump = Component.objects.get(s_no="P001")
+        self.assertEqual(pump.grips, [{"x": 1}])
+        self.assertEqual(pump.svg.read(), b"<svg id='pump'/>")
+        self.assertEqual(len(pump.svg_hash), 64)
+
+    def test_reimport_of_unchanged_archive_skips_everything(self):
+        self.run_import()
+        with patch("django.db.models.fields.files.FieldFile.save") as save:
+            report = self.run_import()
+        self.assertEqual(report.skipped, ["P001", "V001"])
+        save.assert_not_called()
+
+    def test_only_changed_rows_and_assets_are_rewritten(self):
+        self.run_import()
+        self.rows[0]["legend"] = "P"
+        self.assets["SVG/Valve.svg"] = b"<svg id='valve2'/>"
+
+        # in_bulk, savepoint, one bulk_update, affected projects, release,
+        # references to the replaced svg
+        with self.assertNumQueries(6), self.captureOnCommitCallbacks(execute=True):
+            report = self.run_import(batch_size=10)
+
+        self.assertEqual(sorted(report.updated), ["P001", "V001"])
+        valve = Component.objects.get(s_no="V001")
+        self.assertEqual(valve.svg.read(), b"<svg id='valve2'/>")
+        self.assertEqual(Component.objects.get(s_no="P001").legend, "P")
+        self.assertRegex(valve.svg.name, r"^components/[0-9a-f]{2}/[0-9a-f]{62}\.svg$")
+
+    def test_bad_rows_are_reported_not_fatal(self):
+        rows = self.rows + [{"s_no": "", "name": "NoSno"}, {"s_no": "P001", "name": "Dup"}]
+        report = self.run_import(rows=rows)
+        self.assertEqual(len(report.created), 2)
+        self.assertEqual([message for _, message in report.errors], ["Missing name or s_no", "Duplicate s_no in CSV"])
+
+    def test_over_long_values_are_reported_per_row(self):
+        rows = self.rows + [
+            {"s_no": "S" * 11, "name": "Long s_no"},
+            {"s_no": "L001", "name": "Long legend", "legend": "x" * 101},
+            {"s_no": "X001", "name": "Long suffix", "suffix": "x" * 11},
+        ]
+        report = self.run_import(rows=rows)
+
+        self.assertEqual(report.created, ["P001", "V001"])
+        self.assertEqual(report.errors, [
+            ("S" * 11, "s_no is longer than 10 characters"),
+            ("L001", "legend is longer than 100 characters"),
+            ("X001", "suffix is longer than 10 characters"),
+        ])
+
+    def test_invalid_grips_json_is_a_warning(self):
+        self.rows[0]["grips"] = "{not json"
+        report = self.run_import()
+
+        self.assertEqual(report.created, ["P001", "V001"])
+        self.assertEqual(Component.objects.get(s_no="P001").grips, [])
+        self.assertEqual(report.warnings, [("P001", "Invalid JSON in grips, imported without grips")])
+        self.assertEqual(report.as_dict()["warnings"][0]["row"], "P001")
+
+    def test_endpoint_is_staff_only_and_returns_report(self):
+        user = make_user()
+        self.client.force_authenticate(user=user)
+        payload = {"zip_file": SimpleUploadedFile("c.zip", make_components_zip(self.rows, self.assets).read())}
+        self.assertEqual(self.client.post(self.url, payload).status_code, status.HTTP_403_FORBIDDEN)
+
+        user.is_staff = True
+        user.save()
+        payload = {"zip_file": SimpleUploadedFile("c.zip", make_components_zip(self.rows, self.assets).read())}
+        response = self.client.post(self.url, payload)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data["created"], response.data["skipped"]), (2, 0))
+
+    def test_archive_without_csv_returns_400(self):
+        user = User.objects.create_user("admin", password="x", is_staff=True)
+        self.client.force_authenticate(user=user)
+        payload = {"zip_file": SimpleUploadedFile("c.zip", make_components_zip([], self.assets, csv_name="x.txt").read())}
+        response = self.client.post(self.url, payload)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["message"], "CSV file not found in components folder.")
+
+
+class SeedComponentsCommandTests(TestCase):
+    def seed(self, *args):
+        from io import StringIO
+        from django.core.management import call_command
+        out = StringIO()
+        call_command("seed_components", *args, stdout=out)
+        return out.getvalue()
+
+    def test_dry_run_writes_nothing(self):
+        output = self.seed("--dry-run")
+        self.assertIn("Dry run, nothing written: 43 created", output)
+        self.assertFalse(Component.objects.exists())
+
+    def test_reseeding_unchanged_library_skips_all_writes(self):
+        self.seed()
+        self.assertEqual(Component.objects.count(), 43)
+        with patch("django.db.models.fields.files.FieldFile.save") as save:
+            # The existing-components lookup, nothing else
+            with self.assertNumQueries(1):
+                output = self.seed()
+        save.assert_not_called()
+        self.assertIn("0 created, 0 updated, 43 unchanged", output)
+
+    def test_changed_fields_are_updated(self):
+        self.seed()
+        Component.objects.filter(name="Centrifugal Compressor").update(legend="X")
+        output = self.seed()
+        self.assertIn("~ COM-001 Centrifugal Compressor: legend", output)
+        self.assertEqual(Component.objects.get(name="Centrifugal Compressor").legend, "C")
+
+
+class ComponentAssetStorageTests(APITestCase):
+    def test_identical_uploads_share_one_content_addressed_file(self):
+        first = make_component(make_user("a"), s_no="A001")
+        # Same bytes under another file name
+        second = Component.objects.create(
+            s_no="B001", parent="Passive", name="Other", created_by=make_user("b"),
+            svg=make_svg_file("Other.SVG"), png=make_png_file("other.png"),
+        )
+
+        self.assertEqual(first.svg.name, second.svg.name)
+        self.assertEqual(first.png.name, second.png.name)
+        self.assertRegex(first.svg.name, r"^components/[0-9a-f]{2}/[0-9a-f]{62}\.svg$")
+
+    def test_shared_file_is_kept_until_last_component_is_deleted(self):
+        first = make_component(None, s_no="A001")
+        second = make_component(None, s_no="B001")
+        storage = first.svg.storage
+        name = first.svg.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(storage.exists(name))
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(storage.exists(name))
+
+    def test_rolled_back_delete_keeps_the_files(self):
+        from django.db import transaction
+        comp = make_component(None)
+        name = comp.svg.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    comp.delete()
+                    raise RuntimeError("abort")
+            except RuntimeError:
+                pass
+        self.assertTrue(comp.svg.storage.exists(name))
+        self.assertTrue(Component.objects.filter(svg=name).exists())
+
+    def test_replaced_asset_is_released(self):
+        user = make_user()
+        self.client.force_authenticate(user=user)
+        comp = make_component(user)
+        old_svg, png = comp.svg.name, comp.png.name
+        replacement = SimpleUploadedFile("new.svg", b"<svg id='new'/>", content_type="image/svg+xml")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f"/api/components/{comp.id}/", {"svg": replacement}, format="multipart")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        comp.refresh_from_db()
+        self.assertNotEqual(comp.svg.name, old_svg)
+        self.assertEqual(comp.svg.read(), b"<svg id='new'/>")
+        self.assertFalse(comp.svg.storage.exists(old_svg))
+        self.assertTrue(comp.png.storage.exists(png))
+
+    def test_media_serves_content_addressed_assets_as_immutable(self):
+        from django.test import RequestFactory
+        from core.urls import media
+        comp = make_component(None)
+
+        response = media(RequestFactory().get("/media/x"), comp.svg.name)
+
+        self.assertEqual(response["Cache-Control"], "public, max-age=31536000, immutable")
+
+
 # ---------------------------------------------------------------------------
 # Components – Detail (Retrieve / Update / Destroy)
 # ---------------------------------------------------------------------------
@@ -329,6 +777,32 @@ class ProjectDetailViewTests(APITestCase):
         response = self.client.get(self.detail_url())
         self.assertEqual(len(response.data["canvas_state"]["items"]), 1)
 
+    def test_normalized_retrieve_lists_each_component_once(self):
+        other = make_component(self.user, s_no="C002", name="Comp2")
+        for i in range(20):
+            make_canvas_item(self.project, self.comp if i % 4 else other, sequence=i)
+        full = self.client.get(self.detail_url())
+        normalized = self.client.get(self.detail_url(), {"normalized": "1"})
+        self.assertEqual(normalized.status_code, status.HTTP_200_OK)
+
+        data = normalized.json()
+        self.assertEqual(set(data["components"]), {str(self.comp.id), str(other.id)})
+        self.assertNotIn("grips", data["canvas_state"]["items"][0])
+        # Expanding the references gives back the full payload
+        expanded = [
+            {**data["components"][str(item["component_id"])], **item}
+            for item in data["canvas_state"]["items"]
+        ]
+        self.assertEqual(expanded, full.json()["canvas_state"]["items"])
+        self.assertLess(len(normalized.content), len(full.content))
+
+        # Separate validators, so a cached full payload is never reused for it
+        self.assertNotEqual(normalized["ETag"], full["ETag"])
+        response = self.client.get(
+            self.detail_url(), {"normalized": "1"}, HTTP_IF_NONE_MATCH=normalized["ETag"]
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
     def test_retrieve_includes_connections(self):
         item_a = make_canvas_item(self.project, self.comp, sequence=0, x=0, y=0)
         item_b = make_canvas_item(self.project, self.comp, sequence=1, x=100, y=0)
@@ -339,6 +813,14 @@ class ProjectDetailViewTests(APITestCase):
         response = self.client.get(self.detail_url())
         self.assertEqual(len(response.data["canvas_state"]["connections"]), 1)
 
+    def test_connection_project_is_filled_from_source_item(self):
+        item_a = make_canvas_item(self.project, self.comp, sequence=0)
+        conn = Connection.objects.create(
+            sourceItemId=item_a, targetItemId=item_a,
+            sourceGripIndex=0, targetGripIndex=0, waypoints=[]
+        )
+        self.assertEqual(conn.project_id, self.project.id)
+
     def test_retrieve_sequence_counter_empty_canvas(self):
         response = self.client.get(self.detail_url())
         self.assertEqual(response.data["canvas_state"]["sequence_counter"], 0)
@@ -348,6 +830,35 @@ class ProjectDetailViewTests(APITestCase):
         response = self.client.get(self.detail_url())
         self.assertEqual(response.data["canvas_state"]["sequence_counter"], 6)
 
+    def test_retrieve_query_count_is_bounded(self):
+        """Project, items and connections: one query each, regardless of size."""
+        items = [make_canvas_item(self.project, self.comp, sequence=i) for i in range(30)]
+        for a, b in zip(items, items[1:]):
+            Connection.objects.create(
+                sourceItemId=a, targetItemId=b,
+                sourceGripIndex=0, targetGripIndex=1, waypoints=[]
+            )
+        with self.assertNumQueries(3):
+            response = self.client.get(self.detail_url())
+        self.assertEqual(len(response.data["canvas_state"]["items"]), 30)
+        self.assertEqual(len(response.data["canvas_state"]["connections"]), 29)
+        self.assertEqual(response.data["canvas_state"]["sequence_counter"], 30)
+
+    def test_retrieve_payload_matches_model_serializers(self):
+        from api.serializers import CanvasStateSerializer, ConnectionSerializer
+        item_a = make_canvas_item(self.project, self.comp, sequence=0)
+        item_b = make_canvas_item(self.project, self.comp, sequence=1)
+        conn = Connection.objects.create(
+            sourceItemId=item_a, targetItemId=item_b,
+            sourceGripIndex=0, targetGripIndex=1, waypoints=[{"x": 1, "y": 2}]
+        )
+        canvas_state = self.client.get(self.detail_url()).data["canvas_state"]
+        self.assertEqual(
+            canvas_state["items"],
+            [dict(d) for d in CanvasStateSerializer([item_a, item_b], many=True).data],
+        )
+        self.assertEqual(canvas_state["connections"], [dict(ConnectionSerializer(conn).data)])
+
     def test_retrieve_other_user_project_returns_404(self):
         other = make_user("other")
         other_proj = make_project(other, "OtherProj")
@@ -367,6 +878,14 @@ class ProjectDetailViewTests(APITestCase):
         self.project.refresh_from_db()
         self.assertEqual(self.project.name, "Renamed")
 
+    def test_update_ignores_client_revision(self):
+        before = self.project.revision
+        response = self.client.put(self.detail_url(), {"name": "Renamed", "revision": 999}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.project.refresh_from_db()
+        # Only the server's own bump
+        self.assertEqual(self.project.revision, before + 1)
+
     def test_update_replaces_canvas_state(self):
         """Saving a canvas_state should wipe old items and create new ones."""
         old_item = make_canvas_item(self.project, self.comp, sequence=0)
@@ -437,6 +956,68 @@ class ProjectDetailViewTests(APITestCase):
             sourceItemId__project=self.project
         ).count(), 1)
 
+    def test_update_upserts_items_and_connections_by_uid(self):
+        """Re-saving with the same uids keeps row IDs instead of recreating them."""
+        item_a = make_canvas_item(self.project, self.comp, sequence=0)
+        item_b = make_canvas_item(self.project, self.comp, sequence=1)
+        stale = make_canvas_item(self.project, self.comp, sequence=2)
+        conn = Connection.objects.create(
+            sourceItemId=item_a, targetItemId=item_b,
+            sourceGripIndex=0, targetGripIndex=1, waypoints=[]
+        )
+
+        def item(obj, x):
+            return {
+                "id": str(obj.uid), "uid": str(obj.uid), "component_id": self.comp.id,
+                "label": "A", "x": x, "y": 0, "width": 50, "height": 50,
+                "rotation": 0, "scaleX": 1, "scaleY": 1, "sequence": obj.sequence,
+            }
+
+        canvas = {
+            "items": [item(item_a, 300), item(item_b, 0)],
+            "connections": [{
+                "uid": str(conn.uid),
+                "sourceItemId": str(item_a.uid), "targetItemId": str(item_b.uid),
+                "sourceGripIndex": 2, "targetGripIndex": 1, "waypoints": [],
+            }],
+        }
+        response = self.client.put(
+            self.detail_url(),
+            {"name": self.project.name, "canvas_state": canvas},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        item_a.refresh_from_db()
+        conn.refresh_from_db()
+        self.assertEqual(item_a.x, 300)
+        self.assertEqual(conn.sourceGripIndex, 2)
+        self.assertFalse(CanvasState.objects.filter(id=stale.id).exists())
+        returned = {i["uid"]: i["id"] for i in response.data["canvas_state"]["items"]}
+        self.assertEqual(returned[str(item_a.uid)], item_a.id)
+
+    def test_update_never_touches_another_projects_connection_with_same_uid(self):
+        other_item = make_canvas_item(make_project(self.user, "Other"), self.comp)
+        foreign = Connection.objects.create(
+            sourceItemId=other_item, targetItemId=other_item,
+            sourceGripIndex=0, targetGripIndex=0, waypoints=[]
+        )
+        item = {"id": "a", "component_id": self.comp.id, "sequence": 0}
+        canvas = {
+            "items": [item],
+            "connections": [{"uid": str(foreign.uid), "sourceItemId": "a", "targetItemId": "a"}],
+        }
+        response = self.client.put(
+            self.detail_url(),
+            {"name": self.project.name, "canvas_state": canvas},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # uids are scoped per project: this project got its own row
+        self.assertEqual(Connection.objects.filter(project=self.project, uid=foreign.uid).count(), 1)
+        foreign.refresh_from_db()
+        self.assertEqual(foreign.sourceItemId_id, other_item.id)
+
     def test_update_without_canvas_state_only_updates_project(self):
         make_canvas_item(self.project, self.comp, sequence=0)
         response = self.client.patch(self.detail_url(), {"name": "NoCanvas"}, format="json")
@@ -459,6 +1040,19 @@ class ProjectDetailViewTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(CanvasState.objects.filter(project=self.project).count(), 0)
 
+    def test_update_with_unknown_component_id_returns_400(self):
+        make_canvas_item(self.project, self.comp, sequence=0)
+        canvas = {"items": [{"id": "a", "component_id": 99999, "sequence": 0}], "connections": []}
+        response = self.client.put(
+            self.detail_url(),
+            {"name": self.project.name, "canvas_state": canvas},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("Unknown component_id", response.data["message"])
+        # Nothing was replaced
+        self.assertEqual(CanvasState.objects.filter(project=self.project).count(), 1)
+
     # --- DESTROY ---
 
     def test_destroy_project(self):
@@ -480,6 +1074,407 @@ class ProjectDetailViewTests(APITestCase):
         self.assertTrue(Project.objects.filter(id=other_proj.id).exists())
 
 
+# ---------------------------------------------------------------------------
+# Projects – Incremental canvas save
+# ---------------------------------------------------------------------------
+
+class ProjectCanvasDeltaViewTests(APITestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client.force_authenticate(user=self.user)
+        self.project = make_project(self.user, "DeltaProject")
+        self.comp = make_component(self.user, s_no="C001", name="Comp1")
+
+    def delta_url(self, pk=None):
+        return f"/api/project/{pk or self.project.id}/canvas/"
+
+    def new_item(self, client_id, x=0, sequence=0):
+        return {
+            "id": client_id, "component_id": self.comp.id, "label": "A",
+            "x": x, "y": 0, "width": 50, "height": 50,
+            "rotation": 0, "scaleX": 1, "scaleY": 1, "sequence": sequence,
+        }
+
+    def test_added_items_and_connections_return_id_map(self):
+        delta = {
+            "items": {"added": [self.new_item("tmp-1"), self.new_item("tmp-2", x=100, sequence=1)]},
+            "connections": {"added": [{
+                "id": "tmp-c1", "sourceItemId": "tmp-1", "targetItemId": "tmp-2",
+                "sourceGripIndex": 0, "targetGripIndex": 1, "waypoints": [],
+            }]},
+        }
+        response = self.client.patch(self.delta_url(), delta, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        id_map = response.data["id_map"]
+        conn = Connection.objects.get(id=id_map["connections"]["tmp-c1"])
+        self.assertEqual(conn.sourceItemId_id, id_map["items"]["tmp-1"])
+        self.assertEqual(conn.targetItemId_id, id_map["items"]["tmp-2"])
+
+    def test_moving_one_item_only_updates_that_row(self):
+        items = [make_canvas_item(self.project, self.comp, sequence=i, x=i) for i in range(20)]
+        item_a, item_b = items[0], items[1]
+        conn = Connection.objects.create(
+            sourceItemId=item_a, targetItemId=item_b,
+            sourceGripIndex=0, targetGripIndex=1, waypoints=[]
+        )
+
+        delta = {"items": {"updated": [{"id": item_a.id, "x": 500, "y": 42}]}}
+        # project lookup, savepoint, item fetch, bulk update, project touch,
+        # release, stale snapshot cleanup
+        with self.assertNumQueries(7):
+            response = self.client.patch(self.delta_url(), delta, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        item_a.refresh_from_db()
+        self.assertEqual((item_a.x, item_a.y), (500, 42))
+        # Nothing was recreated
+        self.assertEqual(CanvasState.objects.filter(project=self.project).count(), 20)
+        self.assertTrue(Connection.objects.filter(id=conn.id).exists())
+
+    def test_rows_can_be_addressed_by_uid(self):
+        item_a = make_canvas_item(self.project, self.comp, sequence=0)
+        item_b = make_canvas_item(self.project, self.comp, sequence=1)
+        delta = {
+            "items": {
+                "updated": [{"uid": str(item_a.uid), "y": 7}],
+                "removed": [str(item_b.uid)],
+            },
+        }
+        response = self.client.patch(self.delta_url(), delta, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        item_a.refresh_from_db()
+        self.assertEqual(item_a.y, 7)
+        self.assertFalse(CanvasState.objects.filter(id=item_b.id).exists())
+
+    def test_removed_item_cascades_its_connections(self):
+        item_a = make_canvas_item(self.project, self.comp, sequence=0)
+        item_b = make_canvas_item(self.project, self.comp, sequence=1)
+        Connection.objects.create(
+            sourceItemId=item_a, targetItemId=item_b,
+            sourceGripIndex=0, targetGripIndex=1, waypoints=[]
+        )
+        response = self.client.patch(
+            self.delta_url(), {"items": {"removed": [item_a.id]}}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(CanvasState.objects.filter(id=item_a.id).exists())
+        self.assertEqual(Connection.objects.count(), 0)
+
+    def test_malformed_values_are_rejected_before_writing(self):
+        item = make_canvas_item(self.project, self.comp, sequence=0)
+        bad_deltas = [
+            {"items": {"added": [dict(self.new_item("tmp-1"), x="left")]}},
+            {"items": {"added": [dict(self.new_item("tmp-1"), component_id=[self.comp.id])]}},
+            {"items": {"updated": [{"id": item.id, "sequence": 1.5}]}},
+            {"items": {"updated": [{"id": item.id, "width": None}]}},
+            {"items": {"added": [self.new_item("tmp-1")]}, "connections": {"added": [{
+                "sourceItemId": "tmp-1", "targetItemId": item.id,
+                "sourceGripIndex": "0", "targetGripIndex": 1, "waypoints": {"x": 1},
+            }]}},
+        ]
+        for delta in bad_deltas:
+            with self.subTest(delta=delta):
+                response = self.client.patch(self.delta_url(), delta, format="json")
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn("Invalid", response.data["message"])
+        self.assertEqual(CanvasState.objects.filter(project=self.project).count(), 1)
+
+    def test_numeric_strings_are_coerced(self):
+        item = make_canvas_item(self.project, self.comp, sequence=0)
+        response = self.client.patch(
+            self.delta_url(), {"items": {"updated": [{"id": item.id, "x": "12.5", "sequence": "3"}]}}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        item.refresh_from_db()
+        self.assertEqual((item.x, item.sequence), (12.5, 3))
+
+    def test_duplicate_uid_is_reported(self):
+        item = make_canvas_item(self.project, self.comp, sequence=0)
+        delta = {"items": {"added": [dict(self.new_item("tmp-1"), uid=str(item.uid))]}}
+        response = self.client.patch(self.delta_url(), delta, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("Duplicate CanvasState uid", response.data["message"])
+
+    def test_duplicate_uid_within_a_full_save_is_reported(self):
+        uid = str(uuid.uuid4())
+        canvas = {"items": [
+            {"id": "a", "uid": uid, "component_id": self.comp.id, "sequence": 0},
+            {"id": "b", "uid": uid, "component_id": self.comp.id, "sequence": 1},
+        ], "connections": []}
+        response = self.client.put(
+            f"/api/project/{self.project.id}/", {"name": self.project.name, "canvas_state": canvas}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("Duplicate CanvasState uid", response.data["message"])
+
+    def test_connection_to_item_of_another_project_is_rejected(self):
+        other_item = make_canvas_item(make_project(self.user, "Other"), self.comp)
+        delta = {
+            "items": {"added": [self.new_item("tmp-1")]},
+            "connections": {"added": [{
+                "sourceItemId": "tmp-1", "targetItemId": other_item.id,
+                "sourceGripIndex": 0, "targetGripIndex": 0, "waypoints": [],
+            }]},
+        }
+        response = self.client.patch(self.delta_url(), delta, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        # The whole delta is rolled back
+        self.assertEqual(CanvasState.objects.filter(project=self.project).count(), 0)
+
+    def test_updating_unknown_item_returns_400(self):
+        response = self.client.patch(
+            self.delta_url(), {"items": {"updated": [{"id": 99999, "x": 1}]}}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["status"], "error")
+
+    def test_other_user_project_returns_404(self):
+        other_proj = make_project(make_user("other"), "OtherProj")
+        response = self.client.patch(self.delta_url(other_proj.id), {}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+# ---------------------------------------------------------------------------
+# Projects – Graph validation
+# ---------------------------------------------------------------------------
+
+class ProjectValidateViewTests(APITestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client.force_authenticate(user=self.user)
+        self.project = make_project(self.user)
+        self.inlet = make_component(None, s_no="IN", name="Inflow")
+        self.outlet = make_component(None, s_no="OUT", name="Outflow")
+        self.pump = make_component(None, s_no="P", name="Pump")
+        Component.objects.filter(id=self.inlet.id).update(object="Inflow")
+        Component.objects.filter(id=self.outlet.id).update(object="Outflow")
+
+    def connect(self, source, target):
+        return Connection.objects.create(
+            project=self.project, sourceItemId=source, targetItemId=target,
+            sourceGripIndex=0, targetGripIndex=0, waypoints=[],
+        )
+
+    def test_valid_line_from_inlet_to_outlet(self):
+        a = make_canvas_item(self.project, self.inlet)
+        b = make_canvas_item(self.project, self.pump)
+        c = make_canvas_item(self.project, self.outlet)
+        self.connect(a, b)
+        self.connect(b, c)
+
+        with self.assertNumQueries(3):   # project, items, connections
+            response = self.client.get(f"/api/project/{self.project.id}/validate/")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data["valid"])
+
+    def test_reports_isolated_loops_and_unreachable_items(self):
+        a = make_canvas_item(self.project, self.inlet)
+        b = make_canvas_item(self.project, self.pump)
+        c = make_canvas_item(self.project, self.pump)
+        lone = make_canvas_item(self.project, self.pump)
+        self.connect(a, b)
+        self.connect(b, c)
+        self.connect(c, b)
+
+        data = self.client.get(f"/api/project/{self.project.id}/validate/").data
+
+        self.assertEqual(data["isolated"], [lone.id])
+        self.assertEqual(data["cycles"], [sorted([b.id, c.id])])
+        self.assertTrue(data["missing_outlet"])
+        self.assertEqual(data["not_fed_from_inlet"], [])
+        self.assertFalse(data["valid"])
+
+    def test_other_users_project_returns_404(self):
+        other = make_project(make_user("other"))
+        response = self.client.get(f"/api/project/{other.id}/validate/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_canvas_patch_can_validate_in_the_same_request(self):
+        item = make_canvas_item(self.project, self.pump)
+        response = self.client.patch(
+            f"/api/project/{self.project.id}/canvas/?validate=1", {}, format="json"
+        )
+        self.assertEqual(response.data["validation"]["isolated"], [item.id])
+
+    def test_long_chain_and_large_cycle_need_no_recursion(self):
+        from api.graph_validation import validate_graph
+        n = 50000
+        nodes = [(i, "Inflow" if i == 0 else "") for i in range(n)]
+        edges = [(i, i + 1) for i in range(n - 1)] + [(n - 1, 1)]
+
+        result = validate_graph(nodes, edges)
+
+        self.assertEqual(result["cycles"], [list(range(1, n))])
+        self.assertEqual(result["not_fed_from_inlet"], [])
+        self.assertTrue(result["missing_outlet"])
+
+
+# ---------------------------------------------------------------------------
+# Projects – Snapshot storage
+# ---------------------------------------------------------------------------
+
+@override_settings(PROJECT_SNAPSHOTS=True)
+class ProjectSnapshotTests(APITestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.client.force_authenticate(user=self.user)
+        self.project = make_project(self.user, "SnapProject")
+        self.comp = make_component(self.user, s_no="C001", name="Comp1")
+        self.item = make_canvas_item(self.project, self.comp)
+
+    def url(self):
+        return f"/api/project/{self.project.id}/"
+
+    def get(self, **headers):
+        return self.client.get(self.url(), **headers)
+
+    def test_retrieve_serves_stored_gzip_document(self):
+        response = self.get(HTTP_ACCEPT_ENCODING="gzip, deflate")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertTrue(response.has_header("ETag"))
+
+        data = json.loads(gzip.decompress(response.content))
+        self.assertEqual(data["canvas_state"]["items"][0]["id"], self.item.id)
+        self.assertTrue(ProjectSnapshot.objects.filter(project=self.project).exists())
+
+    def test_retrieve_without_gzip_matches_row_serialization(self):
+        with self.settings(PROJECT_SNAPSHOTS=False):
+            expected = self.get().json()
+        response = self.get()
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(response.json(), expected)
+
+    def test_matching_etag_returns_304(self):
+        etag = self.get()["ETag"]
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b"")
+
+    def test_gzip_and_identity_bodies_have_different_etags(self):
+        gzipped = self.get(HTTP_ACCEPT_ENCODING="gzip")
+        plain = self.get()
+        self.assertNotEqual(gzipped["ETag"], plain["ETag"])
+        self.assertIn("Accept-Encoding", gzipped["Vary"])
+
+        # A validator for one encoding doesn't revalidate the other
+        response = self.get(HTTP_IF_NONE_MATCH=gzipped["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.get(HTTP_IF_NONE_MATCH=gzipped["ETag"], HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertIn("Accept-Encoding", response["Vary"])
+
+    def test_normalized_retrieve_is_served_from_snapshot(self):
+        with self.settings(PROJECT_SNAPSHOTS=False):
+            expected = self.client.get(self.url(), {"normalized": 1}).json()
+
+        response = self.client.get(self.url(), {"normalized": 1}, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(json.loads(gzip.decompress(response.content)), expected)
+        self.assertNotEqual(response["ETag"], self.get(HTTP_ACCEPT_ENCODING="gzip")["ETag"])
+
+        response = self.client.get(self.url(), {"normalized": 1}, HTTP_IF_NONE_MATCH=response["ETag"],
+                                   HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_snapshot_without_normalized_form_is_rebuilt(self):
+        self.get()
+        ProjectSnapshot.objects.filter(project=self.project).update(normalized_body=None)
+
+        data = self.client.get(self.url(), {"normalized": 1}).json()
+        self.assertIn(str(self.comp.id), data["components"])
+        self.assertIsNotNone(ProjectSnapshot.objects.get(project=self.project).normalized_body)
+
+    def test_canvas_save_rebuilds_snapshot(self):
+        etag = self.get()["ETag"]
+        response = self.client.patch(
+            f"/api/project/{self.project.id}/canvas/",
+            {"items": {"updated": [{"uid": str(self.item.uid), "x": 321}]}},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["canvas_state"]["items"][0]["x"], 321)
+
+    def test_component_change_drops_snapshot(self):
+        self.get()
+        self.comp.name = "Renamed"
+        self.comp.save()
+        self.assertFalse(ProjectSnapshot.objects.filter(project=self.project).exists())
+        self.assertEqual(self.get().json()["canvas_state"]["items"][0]["name"], "Renamed")
+
+
+# ---------------------------------------------------------------------------
+# Conditional GET (ETag / Last-Modified)
+# ---------------------------------------------------------------------------
+
+class ConditionalGetTests(APITestCase):
+    components_url = "/api/components/"
+
+    def setUp(self):
+        self.user = make_user()
+        self.client.force_authenticate(user=self.user)
+        self.comp = make_component(None, s_no="C001", name="Comp1")
+        self.project = make_project(self.user, "CondProject")
+        self.item = make_canvas_item(self.project, self.comp)
+
+    def project_url(self):
+        return f"/api/project/{self.project.id}/"
+
+    def test_component_list_returns_304_until_a_component_changes(self):
+        etag = self.client.get(self.components_url)["ETag"]
+        response = self.client.get(self.components_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        make_component(self.user, s_no="C002", name="Comp2")
+        response = self.client.get(self.components_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["components"]), 2)
+
+    def test_component_list_etag_changes_on_delete(self):
+        own = make_component(self.user, s_no="C002", name="Comp2")
+        etag = self.client.get(self.components_url)["ETag"]
+        own.delete()
+        response = self.client.get(self.components_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_component_list_honours_if_modified_since(self):
+        last_modified = self.client.get(self.components_url)["Last-Modified"]
+        response = self.client.get(self.components_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_project_returns_304_until_its_canvas_changes(self):
+        etag = self.client.get(self.project_url())["ETag"]
+        response = self.client.get(self.project_url(), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+        self.client.patch(
+            f"/api/project/{self.project.id}/canvas/",
+            {"items": {"updated": [{"id": self.item.id, "x": 99}]}},
+            format="json",
+        )
+        response = self.client.get(self.project_url(), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["canvas_state"]["items"][0]["x"], 99)
+
+    def test_project_etag_changes_when_a_used_component_changes(self):
+        etag = self.client.get(self.project_url())["ETag"]
+        self.comp.name = "Renamed"
+        self.comp.save()
+        response = self.client.get(self.project_url(), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_project_update_returns_new_etag(self):
+        etag = self.client.get(self.project_url())["ETag"]
+        response = self.client.put(self.project_url(), {"name": "Renamed"}, format="json")
+        self.assertNotEqual(response["ETag"], etag)
+
+
 # ---------------------------------------------------------------------------
 # Token Refresh
 # ---------------------------------------------------------------------------
@@ -521,4 +1516,431 @@ class TokenRefreshViewTests(APITestCase):
             "DEFAULT_THROTTLE_CLASSES": [],
         }):
             response = self.client.post(self.refresh_url, {"refresh": "bad.token.here"})
-            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
\ No newline at end of file
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+# ---------------------------------------------------------------------------
+# AI generation
+# ---------------------------------------------------------------------------
+
+class TempAICacheMixin:
+    """Point the "ai" cache at a temporary directory, not backend/cache/ai."""
+
+    @classmethod
+    def setUpClass(cls):
+        directory = tempfile.TemporaryDirectory(prefix="pfd-ai-cache-")
+        cls.addClassCleanup(directory.cleanup)
+        caches = dict(settings.CACHES, ai=dict(settings.CACHES["ai"], LOCATION=directory.name))
+        override = override_settings(CACHES=caches)
+        override.enable()
+        cls.addClassCleanup(override.disable)
+        super().setUpClass()
+
+
+@override_settings(LLM_BACKEND="core.llm_backends.StubBackend", LLM_TIMEOUT=5, LLM_QUEUE_TIMEOUT=5)
+class AIGenerateViewTests(TempAICacheMixin, APITestCase):
+    url = "/api/ai-generate/"
+
+    def setUp(self):
+        from core import prompt_cache
+        prompt_cache.clear()
+        self.addCleanup(prompt_cache.clear)
+
+    def test_stub_backend_returns_connected_diagram(self):
+        response = self.client.post(self.url, {"prompt": "Pump to heater to storage tank"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual([c["type"] for c in data["components"]], ["pump", "heat_exchanger", "tank"])
+        self.assertEqual(data["connections"], [{"from": "c1", "to": "c2"}, {"from": "c2", "to": "c3"}])
+
+    def test_missing_prompt_returns_400(self):
+        response = self.client.post(self.url, {}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json()["error"], "Prompt string is required.")
+
+    def test_unrelated_prompt_is_rejected(self):
+        response = self.client.post(self.url, {"prompt": "write me a poem"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("Invalid input", response.json()["error"])
+
+    @override_settings(LLM_TIMEOUT=0.01)
+    def test_slow_backend_times_out_with_504(self):
+        import asyncio
+
+        async def slow(self, prompt, system_prompt):
+            await asyncio.sleep(1)
+
+        with patch("core.llm_backends.StubBackend.generate", slow):
+            response = self.client.post(self.url, {"prompt": "pump"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_504_GATEWAY_TIMEOUT)
+
+    @override_settings(LLM_MAX_CONCURRENCY=1, LLM_QUEUE_TIMEOUT=0.01)
+    def test_calls_over_the_concurrency_limit_get_busy_error(self):
+        import asyncio
+        from concurrent.futures import ThreadPoolExecutor
+        from core.gemini_service import LLMBusyError, agenerate_diagram
+
+        async def slow(self, prompt, system_prompt):
+            await asyncio.sleep(0.1)
+            return '{"components": [], "connections": []}'
+
+        def call(prompt):
+            # One event loop per call, like async views under WSGI
+            try:
+                return asyncio.run(agenerate_diagram(prompt))
+            except LLMBusyError as e:
+                return e
+
+        with patch("core.llm_backends.StubBackend.generate", slow):
+            with ThreadPoolExecutor(2) as pool:
+                results = list(pool.map(call, ["pump", "valve"]))
+        self.assertEqual(sum(isinstance(r, LLMBusyError) for r in results), 1)
+
+    def test_backend_failure_returns_500(self):
+        async def broken(self, prompt, system_prompt):
+            raise ConnectionError("upstream reset")
+
+        with patch("core.llm_backends.StubBackend.generate", broken):
+            response = self.client.post(self.url, {"prompt": "pump"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def test_jwt_users_are_throttled_per_user(self):
+        from rest_framework_simplejwt.tokens import RefreshToken
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+        def post(user=None, token=None):
+            if user is not None:
+                token = RefreshToken.for_user(user).access_token
+            return self.client.post(
+                self.url, {"prompt": "pump"}, format="json", HTTP_AUTHORIZATION=f"Bearer {token}"
+            )
+
+        alice, bob = make_user("alice"), make_user("bob")
+        with self.settings(REST_FRAMEWORK={
+            "DEFAULT_AUTHENTICATION_CLASSES": (
+                "rest_framework_simplejwt.authentication.JWTAuthentication",
+            ),
+            "DEFAULT_THROTTLE_CLASSES": ["rest_framework.throttling.UserRateThrottle"],
+            "DEFAULT_THROTTLE_RATES": {"user": "1/minute"},
+        }):
+            self.assertEqual(post(alice).status_code, status.HTTP_200_OK)
+            # Same IP, different user: a bucket of its own
+            self.assertEqual(post(bob).status_code, status.HTTP_200_OK)
+            self.assertEqual(post(alice).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+            self.assertEqual(post(token="bad.token.here").status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(GEMINI_API_KEY="key")
+    def test_gemini_client_is_reused_between_requests(self):
+        import asyncio
+        from core.llm_backends import GeminiBackend
+
+        backend = GeminiBackend()
+        client = MagicMock()
+        client.models.generate_content.return_value = MagicMock(text="{}")
+
+        with patch("google.genai.Client", return_value=client) as factory:
+            # Separate event loops, like two async requests under WSGI
+            asyncio.run(backend.generate("a", "system"))
+            asyncio.run(backend.generate("b", "system"))
+        factory.assert_called_once()
+        self.assertEqual(client.models.generate_content.call_count, 2)
+
+    def count_backend_calls(self, delay=0):
+        import asyncio
+        from core.llm_backends import StubBackend
+        calls = []
+        original = StubBackend.generate
+
+        async def counting(backend, prompt, system_prompt):
+            calls.append(prompt)
+            await asyncio.sleep(delay)
+            return await original(backend, prompt, system_prompt)
+
+        patcher = patch.object(StubBackend, "generate", counting)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return calls
+
+    def test_near_identical_prompts_are_served_from_cache(self):
+        calls = self.count_backend_calls()
+        first = self.client.post(self.url, {"prompt": "Pump to tank."}, format="json").json()
+        second = self.client.post(self.url, {"prompt": "  pump   TO tank"}, format="json").json()
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(calls), 1)
+
+        from core import prompt_cache
+        metrics = prompt_cache.metrics()
+        self.assertEqual((metrics["hits"], metrics["misses"]), (1, 1))
+        self.assertEqual(metrics["hit_rate"], 0.5)
+
+    def test_rejections_are_not_cached(self):
+        calls = self.count_backend_calls()
+        self.client.post(self.url, {"prompt": "write me a poem"}, format="json")
+        self.client.post(self.url, {"prompt": "write me a poem"}, format="json")
+        self.assertEqual(len(calls), 2)
+
+    def test_system_prompt_change_invalidates_entries(self):
+        from core.prompt_cache import cache_key
+        self.assertNotEqual(cache_key("pump", "v1"), cache_key("pump", "v2"))
+        self.assertEqual(cache_key("Pump!", "v1"), cache_key("pump", "v1"))
+
+    def test_concurrent_identical_prompts_share_one_call(self):
+        import asyncio
+        from concurrent.futures import ThreadPoolExecutor
+        from core.gemini_service import agenerate_diagram
+        calls = self.count_backend_calls(delay=0.2)
+
+        # One event loop per request, like async views under WSGI
+        with ThreadPoolExecutor(3) as pool:
+            results = list(pool.map(lambda _: asyncio.run(agenerate_diagram("pump and valve")), range(3)))
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results[0], results[2])
+        from core import prompt_cache
+        self.assertEqual(prompt_cache.metrics()["coalesced"], 2)
+
+    def test_waiter_takes_over_when_the_leader_is_cancelled(self):
+        import asyncio
+        from core.gemini_service import agenerate_diagram
+        calls = self.count_backend_calls(delay=0.2)
+
+        async def run():
+            leader = asyncio.create_task(agenerate_diagram("pump and valve"))
+            await asyncio.sleep(0.05)
+            waiter = asyncio.create_task(agenerate_diagram("pump and valve"))
+            await asyncio.sleep(0.05)
+            # The leader's client disconnects
+            leader.cancel()
+            return await waiter
+
+        result = asyncio.run(run())
+
+        self.assertNotIn("error", result)
+        self.assertEqual(len(calls), 2)
+
+    def test_waits_for_another_worker_generating_the_same_prompt(self):
+        import asyncio
+        import threading
+        from django.core.cache import caches
+        from core import prompt_cache
+        from core.gemini_service import SYSTEM_PROMPT, agenerate_diagram
+        calls = self.count_backend_calls()
+
+        key = prompt_cache.cache_key("pump", SYSTEM_PROMPT)
+        diagram = {"components": [], "connections": [], "from": "other worker"}
+        cache.set(f"{key}:lock", 1)
+        self.addCleanup(cache.delete, f"{key}:lock")
+        # The other worker finishes a moment later
+        timer = threading.Timer(0.3, caches["ai"].set, (key, diagram))
+        timer.start()
+        self.addCleanup(timer.cancel)
+
+        self.assertEqual(asyncio.run(agenerate_diagram("pump")), diagram)
+        self.assertEqual(calls, [])
+        self.assertEqual(prompt_cache.metrics()["coalesced"], 1)
+
+    def test_metrics_survive_clearing_the_result_cache(self):
+        from django.core.cache import caches
+        from core import prompt_cache
+        self.client.post(self.url, {"prompt": "pump"}, format="json")
+
+        caches["ai"].clear()
+        self.assertEqual(prompt_cache.metrics()["misses"], 1)
+
+    def test_metrics_endpoint_is_staff_only(self):
+        user = make_user()
+        self.client.force_authenticate(user=user)
+        self.assertEqual(self.client.get(f"{self.url}metrics/").status_code, status.HTTP_403_FORBIDDEN)
+
+        user.is_staff = True
+        user.save()
+        response = self.client.get(f"{self.url}metrics/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["hit_rate"], 0.0)
+
+
+@override_settings(LLM_BACKEND="core.llm_backends.StubBackend", AI_JOB_POLL_INTERVAL=0.01)
+class AIGenerationJobTests(TempAICacheMixin, APITestCase):
+    url = "/api/ai-generate/"
+
+    def setUp(self):
+        from core import prompt_cache
+        prompt_cache.clear()
+        self.addCleanup(prompt_cache.clear)
+
+    def run_worker(self):
+        from asgiref.sync import async_to_sync
+        from api.ai_jobs import arun_pending
+        return async_to_sync(arun_pending)(concurrency=2)
+
+    def enqueue(self, prompt):
+        response = self.client.post(self.url, {"prompt": prompt, "async": True}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        return response.json()
+
+    def test_async_request_is_queued_and_run_by_worker(self):
+        from api.models import GenerationJob
+        queued = self.enqueue("pump to heater to tank")
+        self.assertEqual(GenerationJob.objects.get(pk=queued["job_id"]).state, GenerationJob.QUEUED)
+
+        self.assertEqual(self.run_worker(), 1)
+
+        job = self.client.get(queued["status_url"]).data["job"]
+        self.assertEqual(job["state"], "done")
+        self.assertEqual(len(job["result"]["components"]), 3)
+        self.assertEqual(job["partial"]["connections"], job["result"]["connections"])
+
+    def test_rejected_prompt_fails_the_job(self):
+        queued = self.enqueue("write me a poem")
+        self.run_worker()
+        job = self.client.get(queued["status_url"]).data["job"]
+        self.assertEqual(job["state"], "failed")
+        self.assertIn("Invalid input", job["error"])
+
+    def sse_events(self, body):
+        return [line[len("event: "):] for line in body.decode().splitlines() if line.startswith("event: ")]
+
+    def test_events_under_wsgi_are_a_single_response(self):
+        queued = self.enqueue("pump then valve")
+        self.run_worker()
+
+        response = self.client.get(queued["events_url"])
+
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        # WSGI: no stream holding a worker thread
+        self.assertFalse(response.streaming)
+        self.assertEqual(self.sse_events(response.content), ["state", "component", "component", "connection", "done"])
+
+    def test_events_under_wsgi_point_an_unfinished_job_to_polling(self):
+        queued = self.enqueue("pump then valve")
+
+        response = self.client.get(queued["events_url"])
+
+        self.assertEqual(self.sse_events(response.content), ["state", "poll"])
+        poll = response.content.decode().rstrip().splitlines()[-1]
+        self.assertEqual(json.loads(poll[len("data: "):]), {"state": "queued", "status_url": queued["status_url"]})
+
+    def test_events_stream_is_async_under_asgi(self):
+        from asgiref.sync import async_to_sync
+        from django.test import AsyncClient
+        queued = self.enqueue("pump then valve")
+        self.run_worker()
+
+        async def read():
+            response = await AsyncClient().get(queued["events_url"])
+            self.assertTrue(response.is_async)
+            return b"".join([chunk async for chunk in response.streaming_content])
+
+        body = async_to_sync(read)()
+        self.assertEqual(self.sse_events(body), ["state", "component", "component", "connection", "done"])
+
+    def test_unknown_job_returns_404(self):
+        import uuid
+        response = self.client.get(f"{self.url}jobs/{uuid.uuid4()}/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_a_job_is_claimed_once_and_stale_runs_are_requeued(self):
+        from datetime import timedelta
+        from api import ai_jobs
+        from api.models import GenerationJob
+        job = ai_jobs.enqueue("pump")
+
+        self.assertEqual(ai_jobs.claim_next().pk, job.pk)
+        self.assertIsNone(ai_jobs.claim_next())
+
+        GenerationJob.objects.filter(pk=job.pk).update(started_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(ai_jobs.requeue_stale(), 1)
+        self.assertEqual(ai_jobs.claim_next().pk, job.pk)
+
+    def test_partial_parser_emits_items_as_they_complete(self):
+        from core.diagram_parser import PartialDiagramParser
+        text = '{"components": [{"id": "c1", "label": "a {b}"}, {"id": "c2"}], "connections": [{"from": "c1", "to": "c2"}]}'
+        parser = PartialDiagramParser()
+        seen = []
+        for i in range(0, len(text), 7):
+            seen.extend(parser.feed(text[i:i + 7]))
+        self.assertEqual(seen, [
+            ("components", {"id": "c1", "label": "a {b}"}),
+            ("components", {"id": "c2"}),
+            ("connections", {"from": "c1", "to": "c2"}),
+        ])
+
+
+@override_settings(LLM_BACKEND="core.llm_backends.StubBackend")
+class ComponentMatcherTests(TempAICacheMixin, APITestCase):
+    GRIPS = [{"x": 0, "y": 50, "side": "left"}, {"x": 100, "y": 50, "side": "right"}]
+
+    def setUp(self):
+        from core import prompt_cache
+        prompt_cache.clear()
+        self.addCleanup(prompt_cache.clear)
+        self.pump = self.make("PUM-001", "Centrifugal Pump", "CentrifugalPump", "Pumps", "P")
+        self.other_pump = self.make("PUM-002", "Reciprocating Pump", "ReciprocatingPump", "Pumps", "P")
+        self.exchanger = self.make("EXC-001", "Heat Exchanger", "HeatExchanger", "Heating or Cooling Arrangements", "E")
+        self.tank = self.make("TAN-001", "Fixed Roof Tank", "FixedRoofTank", "Storage Vessels Tanks", "T")
+
+    def make(self, s_no, name, object_name, parent, legend):
+        return Component.objects.create(
+            s_no=s_no, name=name, object=object_name, parent=parent, legend=legend,
+            grips=self.GRIPS, svg=make_svg_file(), png=make_png_file(),
+        )
+
+    def test_variants_resolve_to_catalog_components(self):
+        from api.component_matcher import get_index
+        index = get_index()
+        self.assertEqual(index.match({"variant": "centrifugal pumps"})[0], self.pump.id)
+        self.assertEqual(index.match({"variant": "reciprocating pump"})[0], self.other_pump.id)
+        self.assertEqual(index.match({"variant": "shell and tube heat exchanger"})[0], self.exchanger.id)
+        self.assertEqual(index.match({"variant": "storage tank"})[0], self.tank.id)
+        # Unknown variant falls back to the type
+        self.assertEqual(index.match({"variant": "magic", "type": "heat_exchanger"})[0], self.exchanger.id)
+        self.assertEqual(index.match({"variant": "distillation column", "type": "column"}), (None, 0.0))
+
+    def test_index_is_rebuilt_only_when_the_catalog_changes(self):
+        from api.component_matcher import get_index
+        index = get_index()
+        self.assertIs(get_index(), index)
+        dryer = self.make("DRY-001", "Rotary Dryer", "RotaryDryer", "Dryers", "D")
+        rebuilt = get_index()
+        self.assertIsNot(rebuilt, index)
+        self.assertEqual(rebuilt.match({"variant": "rotary dryer"})[0], dryer.id)
+
+    def test_layout_puts_each_item_one_layer_after_its_feeds(self):
+        from api.component_matcher import layered_layout
+        positions = layered_layout(["a", "b", "c", "d"], [("a", "b"), ("a", "c"), ("b", "d"), ("c", "d"), ("d", "b")])
+        # d -> b closes a cycle; it is broken at b, the earliest item waiting
+        self.assertEqual(positions, {"a": (0, 0), "b": (1, 0), "c": (1, 1), "d": (2, 0)})
+
+    def test_ai_generate_returns_a_placeable_canvas_delta(self):
+        response = self.client.post("/api/ai-generate/", {"prompt": "Pump to exchanger to tank"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        canvas = response.json()["canvas_state"]
+        items = canvas["items"]["added"]
+        self.assertEqual([i["component_id"] for i in items], [self.pump.id, self.exchanger.id, self.tank.id])
+        self.assertEqual([i["x"] for i in items], [40, 190, 340])
+        self.assertEqual(canvas["unmatched"], [])
+        self.assertEqual(canvas["connections"]["added"][0]["sourceGripIndex"], 1)
+        self.assertEqual(canvas["connections"]["added"][0]["targetGripIndex"], 0)
+
+        # The editor can apply it as is
+        user = make_user()
+        project = make_project(user)
+        self.client.force_authenticate(user=user)
+        response = self.client.patch(f"/api/project/{project.id}/canvas/", canvas, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(CanvasState.objects.filter(project=project).count(), 3)
+        self.assertEqual(Connection.objects.filter(project=project).count(), 2)
+
+    def test_connections_to_unmatched_components_are_dropped(self):
+        from api.component_matcher import match_diagram
+        canvas = match_diagram({
+            "components": [
+                {"id": "c1", "type": "pump", "variant": "centrifugal pump", "label": "Feed"},
+                {"id": "c2", "type": "reactor", "variant": "stirred reactor", "label": "R-1"},
+            ],
+            "connections": [{"from": "c1", "to": "c2"}],
+        })
+        self.assertEqual([i["label"] for i in canvas["items"]["added"]], ["Feed"])
+        self.assertEqual([c["id"] for c in canvas["unmatched"]], ["c2"])
+        self.assertEqual(canvas["connections"]["added"], [])
@@ -14,6 +14,8 @@ from src.api_client import (
     create_project,
     update_project,
     delete_project,
+    get_project,
+    clear_project_cache,
 )
 
 
@@ -25,6 +27,7 @@ class ApiClientTests(unittest.TestCase):
         self.token_patch.start()
         self.addCleanup(self.base_url_patch.stop)
         self.addCleanup(self.token_patch.stop)
+        self.addCleanup(clear_project_cache)
 
     @patch("src.api_client.requests.post")
     def test_login_success_returns_tokens(self, mock_post):
@@ -107,6 +110,31 @@ class ApiClientTests(unittest.TestCase):
 
         self.assertEqual(get_components(), [])
 
+    @patch("src.api_client.requests.get")
+    def test_get_project_reuses_cached_copy_on_304(self, mock_get):
+        first = Mock(status_code=200, headers={"ETag": '"p-5-1"'})
+        first.json.return_value = {"id": 5, "canvas_state": {"items": []}}
+        mock_get.side_effect = [first, Mock(status_code=304)]
+
+        self.assertEqual(get_project(5)["id"], 5)
+        project = get_project(5)
+
+        self.assertEqual(project, {"id": 5, "canvas_state": {"items": []}})
+        sent = mock_get.call_args_list[1].kwargs["headers"]
+        self.assertEqual(sent["If-None-Match"], '"p-5-1"')
+        self.assertEqual(mock_get.call_args_list[0].kwargs["params"], {"normalized": 1})
+
+    @patch("src.api_client.requests.get")
+    def test_get_project_cached_copy_is_not_shared(self, mock_get):
+        first = Mock(status_code=200, headers={"ETag": '"p-5-1"'})
+        first.json.return_value = {"id": 5, "canvas_state": {"items": []}}
+        mock_get.side_effect = [first, Mock(status_code=304), Mock(status_code=304)]
+
+        get_project(5)
+        get_project(5)["canvas_state"]["items"].append({"id": 1})
+
+        self.assertEqual(get_project(5)["canvas_state"]["items"], [])
+
     @patch("src.api_client.requests.post")
     def test_create_project_success_returns_project(self, mock_post):
         mock_response = Mock(status_code=201)
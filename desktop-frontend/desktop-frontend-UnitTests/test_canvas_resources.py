@@ -9,6 +9,10 @@ from src.canvas.resources import (
     find_svg_path,
     find_svg_file,
     get_component_config_by_name,
+    ComponentConfigIndex,
+    get_config_index,
+    clear_config_index,
+    get_svg_index,
 )
 
 
@@ -39,6 +43,31 @@ class CanvasResourcesTests(unittest.TestCase):
         self.assertEqual(get_component_config_by_name("centrifugalpump", component_config)["grips"], [1, 2, 3])
         self.assertEqual(get_component_config_by_name("missing", component_config), {})
 
+    def test_component_config_index_exact_clean_and_grips_lookup(self):
+        index = ComponentConfigIndex({
+            "Centrifugal Pump": {"component": "Centrifugal Pump", "grips": [{"x": 0, "y": 50}]},
+            "Gate Valve": {"component": "Gate Valve", "grips": []},
+        })
+        self.assertEqual(get_component_config_by_name("centrifugal_pump", index)["component"], "Centrifugal Pump")
+        self.assertEqual(get_component_config_by_name("missing", index), {})
+        self.assertEqual(index.get_grips("Centrifugal Pump"), [{"x": 0, "y": 50}])
+        self.assertIsNone(index.get_grips("Gate Valve"))
+
+    def test_get_config_index_reads_grips_json_once_per_base_dir(self):
+        with TemporaryDirectory() as tmpdir:
+            assets = Path(tmpdir) / "ui" / "assets"
+            assets.mkdir(parents=True)
+            grips_file = assets / "grips.json"
+            grips_file.write_text('[{"component": "Pump A", "grips": [{"x": 1, "y": 2}]}]', encoding="utf-8")
+
+            clear_config_index()
+            self.addCleanup(clear_config_index)
+            first = get_config_index(tmpdir)
+            grips_file.unlink()
+
+            self.assertIs(get_config_index(tmpdir), first)
+            self.assertEqual(first.get_grips("pumpa"), [{"x": 1, "y": 2}])
+
     def test_find_svg_path_returns_match_and_none_for_missing(self):
         with TemporaryDirectory() as tmpdir:
             base_dir = Path(tmpdir)
@@ -71,6 +100,21 @@ class CanvasResourcesTests(unittest.TestCase):
             self.assertEqual(find_svg_file("Fallback.svg", "Unknown", str(base_dir)), str(fallback_file))
             self.assertIsNone(find_svg_file("Missing.svg", "Pumps", str(base_dir)))
 
+    def test_svg_index_picks_up_new_files_and_persists_to_disk(self):
+        with TemporaryDirectory() as tmpdir:
+            base_dir = Path(tmpdir)
+            svg_dir = base_dir / "ui" / "assets" / "svg" / "Pumps"
+            svg_dir.mkdir(parents=True)
+            (svg_dir / "Pump_A.svg").write_text("<svg></svg>", encoding="utf-8")
+
+            index = get_svg_index(str(base_dir))
+            self.assertEqual(index.find("pump a"), str(svg_dir / "Pump_A.svg"))
+            self.assertTrue((base_dir / "ui" / "assets" / "svg_index.json").exists())
+
+            late_file = svg_dir / "Pump_B.svg"
+            late_file.write_text("<svg></svg>", encoding="utf-8")
+            self.assertEqual(find_svg_file("Pump_B.svg", "Pumps", str(base_dir)), str(late_file))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+import uuid
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from PyQt5.QtCore import QPointF
+
+from src.canvas import sync
+
+
+class FakeComponent:
+    def __init__(self, s_no="101", x=0, y=0):
+        self.uid = str(uuid.uuid4())
+        self.config = {"s_no": s_no, "default_label": "P-01"}
+        self.x, self.y = x, y
+
+    def to_dict(self):
+        return {"x": self.x, "y": self.y, "width": 40, "height": 40, "rotation": 0}
+
+
+class FakeConnection:
+    def __init__(self, start, end):
+        self.uid = str(uuid.uuid4())
+        self.start_component, self.start_grip_index = start, 0
+        self.end_component, self.end_grip_index = end, 1
+        self.path = [QPointF(0, 0), QPointF(10, 0)]
+
+
+@patch("src.canvas.sync.component_catalog.sno_to_id", return_value={"101": 7, "102": 8})
+class CanvasSyncTests(unittest.TestCase):
+    def make_synced_canvas(self, count=3):
+        comps = [FakeComponent(x=i * 100) for i in range(count)]
+        conn = FakeConnection(comps[0], comps[1])
+        canvas = SimpleNamespace(components=comps, connections=[conn], sync_state=None)
+        sync.mark_synced(canvas, {comp: i for i, comp in enumerate(comps)})
+        return canvas
+
+    def test_unchanged_canvas_produces_empty_delta(self, _):
+        canvas = self.make_synced_canvas()
+        delta, _pending = sync.build_delta(canvas)
+        self.assertTrue(sync.is_empty(delta))
+
+    def test_moving_one_item_sends_only_its_changed_fields(self, _):
+        canvas = self.make_synced_canvas()
+        moved = canvas.components[2]
+        moved.x = 999
+
+        delta, _pending = sync.build_delta(canvas)
+
+        self.assertEqual(delta["items"]["updated"], [{"uid": moved.uid, "x": 999.0}])
+        self.assertEqual(delta["items"]["added"], [])
+        self.assertEqual(delta["connections"]["updated"], [])
+
+    def test_added_item_and_connection_are_keyed_by_uid(self, _):
+        canvas = self.make_synced_canvas()
+        new_comp = FakeComponent(x=500)
+        canvas.components.append(new_comp)
+        canvas.connections.append(FakeConnection(canvas.components[0], new_comp))
+
+        delta, pending = sync.build_delta(canvas)
+        added_item = delta["items"]["added"][0]
+        added_conn = delta["connections"]["added"][0]
+        self.assertEqual(added_item["uid"], new_comp.uid)
+        self.assertEqual(added_item["sequence"], 3)
+        self.assertEqual(added_conn["targetItemId"], new_comp.uid)
+
+        sync.apply_saved_delta(canvas, pending)
+        self.assertTrue(sync.is_empty(sync.build_delta(canvas)[0]))
+
+    def test_removed_item_and_connection_are_reported(self, _):
+        canvas = self.make_synced_canvas()
+        removed = canvas.components.pop(0)
+        removed_conn = canvas.connections.pop()
+
+        delta, _pending = sync.build_delta(canvas)
+
+        self.assertEqual(delta["items"]["removed"], [removed.uid])
+        self.assertEqual(delta["connections"]["removed"], [removed_conn.uid])
+
+    def test_swapping_component_recreates_item_and_its_connections(self, _):
+        canvas = self.make_synced_canvas()
+        swapped = canvas.components[0]
+        swapped.config["s_no"] = "102"
+
+        delta, _pending = sync.build_delta(canvas)
+
+        self.assertEqual(delta["items"]["removed"], [swapped.uid])
+        self.assertEqual(delta["items"]["added"][0]["uid"], swapped.uid)
+        self.assertEqual(len(delta["connections"]["added"]), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
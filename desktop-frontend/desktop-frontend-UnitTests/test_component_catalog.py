@@ -0,0 +1,185 @@
+import os
+import threading
+import time
+import unittest
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from src import api_client
+from src.component_catalog import ComponentCatalog
+
+
+COMPONENTS = [
+    {"id": 1, "s_no": "101", "name": "Pump", "parent": "Pumps"},
+    {"id": 2, "s_no": "102", "name": "Valve", "parent": "Valves"},
+]
+
+
+class ComponentCatalogTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "component_catalog.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    @patch("src.component_catalog.api_client.get_components_conditional")
+    def test_fresh_catalog_is_shared_without_refetching(self, fetch):
+        fetch.return_value = (COMPONENTS, '"v1"', None, None)
+        catalog = ComponentCatalog(self.path)
+
+        self.assertEqual(catalog.by_id()[2]["name"], "Valve")
+        self.assertEqual(catalog.sno_to_id(), {"101": 1, "102": 2})
+        catalog.get_components()
+
+        fetch.assert_called_once_with(None, None)
+
+    @patch("src.component_catalog.api_client.get_components_conditional")
+    def test_stale_catalog_revalidates_with_etag_and_keeps_data_on_304(self, fetch):
+        fetch.return_value = (COMPONENTS, '"v1"', None, None)
+        catalog = ComponentCatalog(self.path)
+        catalog.get_components()
+
+        fetch.return_value = (None, '"v1"', None, None)
+        result = catalog.get_components(force_refresh=True)
+
+        self.assertEqual(result, COMPONENTS)
+        fetch.assert_called_with('"v1"', None)
+
+    @patch("src.component_catalog.api_client.get_components_conditional")
+    def test_catalog_is_restored_from_disk(self, fetch):
+        fetch.return_value = (COMPONENTS, '"v1"', None, None)
+        ComponentCatalog(self.path).get_components()
+
+        fetch.reset_mock()
+        fetch.return_value = (None, '"v1"', None, None)
+        restored = ComponentCatalog(self.path)
+
+        self.assertEqual(restored.get_components(), COMPONENTS)
+        fetch.assert_called_once_with('"v1"', None)
+
+    @patch("src.component_catalog.api_client.get_components_conditional")
+    def test_network_failure_falls_back_to_last_known_catalog(self, fetch):
+        fetch.return_value = (COMPONENTS, '"v1"', None, None)
+        catalog = ComponentCatalog(self.path)
+        catalog.get_components()
+
+        fetch.side_effect = api_client.ApiError("offline")
+        self.assertEqual(catalog.get_components(force_refresh=True), COMPONENTS)
+
+    @patch("src.component_catalog.api_client.get_components_conditional")
+    def test_invalidate_drops_memory_and_disk_copy(self, fetch):
+        fetch.return_value = (COMPONENTS, '"v1"', None, None)
+        catalog = ComponentCatalog(self.path)
+        catalog.get_components()
+
+        catalog.invalidate()
+
+        self.assertFalse(os.path.exists(self.path))
+        catalog.get_components()
+        fetch.assert_called_with(None, None)
+
+
+    @patch("src.component_catalog.api_client.get_components_conditional")
+    def test_another_user_does_not_get_the_cached_catalog(self, fetch):
+        fetch.return_value = (COMPONENTS, '"v1"', None, None)
+        with patch("src.app_state.current_user", "alice"):
+            ComponentCatalog(self.path).get_components()
+            catalog = ComponentCatalog(self.path)
+            catalog.get_components()
+            # Restored from alice's disk copy: only revalidated
+            fetch.assert_called_with('"v1"', None)
+
+        fetch.return_value = (COMPONENTS[:1], '"v2"', None, None)
+        with patch("src.app_state.current_user", "bob"):
+            # Neither the memory nor the disk copy is bob's: a full download
+            self.assertEqual(catalog.get_components(), COMPONENTS[:1])
+            fetch.assert_called_with(None, None)
+            self.assertEqual(ComponentCatalog(self.path).get_components(), COMPONENTS[:1])
+
+    @patch("src.component_catalog.api_client.get_components_conditional")
+    def test_readers_are_not_blocked_by_a_revalidation(self, fetch):
+        fetch.return_value = (COMPONENTS, '"v1"', None, None)
+        catalog = ComponentCatalog(self.path)
+        catalog.get_components()
+
+        started, release = threading.Event(), threading.Event()
+
+        def slow(etag, last_modified):
+            started.set()
+            release.wait(5)
+            return None, '"v1"', None, None
+        fetch.side_effect = slow
+
+        syncing = threading.Thread(target=catalog.sync)
+        syncing.start()
+        try:
+            self.assertTrue(started.wait(5))
+            # Stale copy while the request is in flight, without waiting for it
+            begun = time.monotonic()
+            self.assertEqual(catalog.sno_to_id(), {"101": 1, "102": 2})
+            self.assertEqual(catalog.get_components(force_refresh=False), COMPONENTS)
+            catalog._checked_at = 0.0
+            self.assertEqual(catalog.get_components(), COMPONENTS)
+            self.assertLess(time.monotonic() - begun, 1)
+        finally:
+            release.set()
+            syncing.join()
+
+
+@patch("src.component_catalog.api_client.get_component_changes")
+@patch("src.component_catalog.api_client.get_components_conditional")
+class ComponentCatalogDeltaSyncTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "component_catalog.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def synced_catalog(self, fetch):
+        fetch.return_value = (COMPONENTS, '"v1"', None, "t1")
+        catalog = ComponentCatalog(self.path)
+        self.assertTrue(catalog.sync()["full"])
+        return catalog
+
+    def test_sync_applies_only_the_delta(self, fetch, changes):
+        catalog = self.synced_catalog(fetch)
+        changes.return_value = {
+            "token": "t2", "full": False,
+            "created": [{"id": 3, "s_no": "100", "name": "Tank"}],
+            "updated": [{"id": 2, "s_no": "102", "name": "Valve2"}],
+            "deleted": [1],
+        }
+
+        result = catalog.sync()
+
+        changes.assert_called_once_with("t1")
+        fetch.assert_called_once()
+        self.assertFalse(result["full"])
+        self.assertEqual([c["name"] for c in catalog.get_components()], ["Tank", "Valve2"])
+        self.assertEqual(catalog.sno_to_id(), {"100": 3, "102": 2})
+
+    def test_token_survives_restart(self, fetch, changes):
+        self.synced_catalog(fetch)
+        changes.return_value = {"token": "t2", "full": False, "created": [], "updated": [], "deleted": []}
+
+        restored = ComponentCatalog(self.path)
+        restored.sync()
+        restored.sync()
+
+        self.assertEqual([c.args[0] for c in changes.call_args_list], ["t1", "t2"])
+        self.assertEqual(restored.get_components(), COMPONENTS)
+
+    def test_missing_changes_feed_falls_back_to_full_revalidation(self, fetch, changes):
+        catalog = self.synced_catalog(fetch)
+        changes.side_effect = api_client.ApiError("404")
+        fetch.return_value = (None, '"v1"', None, None)
+
+        self.assertEqual(catalog.sync()["created"], [])
+        fetch.assert_called_with('"v1"', None)
+        self.assertEqual(catalog.get_components(), COMPONENTS)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -72,6 +72,39 @@ class ComponentLibraryTests(unittest.TestCase):
         self.lib._open_edit_component_dialog(self.component)
         mock_warn.assert_called()
 
+    @patch("src.component_library.component_catalog.sync")
+    def test_delta_sync_only_touches_changed_components(self, mock_sync):
+        self.lib._synced_from_api = True
+        self.lib.component_data = [
+            {"id": 1, "s_no": "1", "name": "PUMP"},
+            {"id": 2, "s_no": "2", "name": "VALVE"},
+            {"id": 3, "s_no": "3", "name": "TANK"},
+        ]
+        mock_sync.return_value = {
+            "full": False,
+            "created": [{"id": 4, "s_no": "4", "name": "MIXER", "parent": "Mixers", "svg": "/media/m.svg"}],
+            "updated": [{"id": 2, "s_no": "2", "name": "VALVE2", "parent": "Valves", "svg": "/media/v.svg"}],
+            "deleted": [3],
+        }
+
+        with patch.object(self.lib, "_download_asset", return_value=False) as download, \
+                patch.object(self.lib, "_rebuild_from_catalog") as rebuild:
+            self.lib._load_components_from_api()
+
+        rebuild.assert_not_called()
+        self.assertEqual([c["name"] for c in self.lib.component_data], ["PUMP", "VALVE2", "MIXER"])
+        self.assertEqual(self.lib.new_snos, {"4"})
+        # Only the changed components' assets are checked on disk
+        self.assertEqual(download.call_count, 2)
+
+    def test_content_addressed_assets_are_saved_under_the_component_name(self):
+        url = "http://host/media/components/ab/" + "c" * 62 + ".svg"
+        self.assertEqual(comp_lib.ComponentLibrary._asset_filename(url, self.component), "PUMP.svg")
+        # Older names keep their own file name
+        self.assertEqual(
+            comp_lib.ComponentLibrary._asset_filename("/media/components/Pump.png", self.component), "Pump.png"
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
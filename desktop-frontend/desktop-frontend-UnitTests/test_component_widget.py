@@ -63,6 +63,13 @@ class ComponentWidgetTests(unittest.TestCase):
             self.assertEqual(d["width"], 30)
             self.assertEqual(d["height"], 40)
 
+    def test_shared_renderer_skips_svg_parsing(self):
+        with patch("src.component_widget.QSvgRenderer") as MockRenderer:
+            shared = self.make_renderer_mock(120, 60)
+            widget = cw.ComponentWidget(svg_path="dummy.svg", config={}, renderer=shared)
+            MockRenderer.assert_not_called()
+            self.assertIs(widget.renderer, shared)
+
 
 if __name__ == "__main__":
     unittest.main()
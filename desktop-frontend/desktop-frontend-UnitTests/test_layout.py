@@ -0,0 +1,118 @@
+import random
+import time
+
+import pytest
+from PyQt5.QtCore import QRectF
+
+from src.canvas.layout import MIN_SPACING, LayeredLayout, _count_crossings, layered_positions
+
+
+class DummyComponent:
+    def __init__(self, width=50, height=40):
+        self.logical_rect = QRectF(0, 0, width, height)
+
+
+class DummyConnection:
+    def __init__(self, start_component, end_component):
+        self.start_component = start_component
+        self.end_component = end_component
+
+
+def rects(positions, sizes):
+    return {node: QRectF(x, y, *sizes[node]) for node, (x, y) in positions.items()}
+
+
+def assert_spaced(positions, sizes):
+    placed = list(rects(positions, sizes).items())
+    for i, (a, ra) in enumerate(placed):
+        for b, rb in placed[i + 1:]:
+            # Same check ComponentWidget.mouseReleaseEvent uses to reject a move
+            assert not ra.adjusted(-MIN_SPACING, -MIN_SPACING, MIN_SPACING, MIN_SPACING).intersects(rb), (a, b)
+
+
+def test_chain_flows_left_to_right():
+    sizes = {n: (50, 40) for n in "abcd"}
+    positions = layered_positions(list("abcd"), [("a", "b"), ("b", "c"), ("c", "d")], sizes)
+
+    xs = [positions[n][0] for n in "abcd"]
+    assert xs == sorted(xs) and len(set(xs)) == 4
+    # Straight chain: everything on one row
+    assert len({positions[n][1] for n in "abcd"}) == 1
+
+
+def test_cycles_and_self_loops_still_get_layers():
+    sizes = {n: (50, 40) for n in "abc"}
+    edges = [("a", "b"), ("b", "c"), ("c", "a"), ("b", "b")]
+    positions = layered_positions(list("abc"), edges, sizes)
+
+    assert positions["a"][0] < positions["b"][0] < positions["c"][0]
+
+
+def test_late_feed_sits_next_to_its_consumer():
+    sizes = {n: (50, 40) for n in "abcdf"}
+    edges = [("a", "b"), ("b", "c"), ("c", "d"), ("f", "d")]
+    positions = layered_positions(list("abcdf"), edges, sizes)
+
+    assert positions["f"][0] == positions["c"][0]
+
+
+def test_ordering_removes_avoidable_crossings():
+    # a1 -> b2, a2 -> b1 in input order crosses; the sweep should untangle it
+    sizes = {n: (50, 40) for n in ["a1", "a2", "b1", "b2"]}
+    positions = layered_positions(["a1", "a2", "b1", "b2"], [("a1", "b2"), ("a2", "b1")], sizes)
+
+    assert (positions["a1"][1] < positions["a2"][1]) == (positions["b2"][1] < positions["b1"][1])
+
+
+def test_crossing_count():
+    down = {"a": ["y"], "b": ["x"]}
+    assert _count_crossings(["a", "b"], ["x", "y"], down) == 1
+    assert _count_crossings(["b", "a"], ["x", "y"], down) == 0
+
+
+def test_uses_component_sizes_and_spacing_rule():
+    comps = [DummyComponent(120, 80), DummyComponent(40, 30), DummyComponent(60, 200), DummyComponent(50, 50)]
+    conns = [DummyConnection(comps[0], comps[1]), DummyConnection(comps[0], comps[2]),
+             DummyConnection(comps[1], comps[3]), DummyConnection(comps[2], comps[3])]
+    # Connection to a component that is not on the canvas is ignored
+    conns.append(DummyConnection(comps[3], DummyComponent()))
+
+    positions = LayeredLayout(comps, conns, node_gap=10, layer_gap=10).compute()
+
+    sizes = {c: (c.logical_rect.width(), c.logical_rect.height()) for c in comps}
+    assert_spaced({c: (p.x(), p.y()) for c, p in positions.items()}, sizes)
+
+
+def test_thousand_nodes_lay_out_quickly():
+    # 25 process trains of 40 units, with recycles and cross-links between trains
+    rng = random.Random(7)
+    nodes = list(range(1000))
+    edges = []
+    for start in range(0, 1000, 40):
+        edges += [(start + i, start + i + 1) for i in range(39)]
+        edges += [(start + rng.randrange(40), start + rng.randrange(40)) for _ in range(6)]
+        if start + 40 < 1000:
+            edges += [(start + rng.randrange(40), start + 40 + rng.randrange(40)) for _ in range(4)]
+    sizes = {n: (rng.randint(30, 90), rng.randint(30, 90)) for n in nodes}
+
+    started = time.perf_counter()
+    positions = layered_positions(nodes, edges, sizes)
+    elapsed = time.perf_counter() - started
+
+    assert len(positions) == 1000
+    assert elapsed < 2.0
+
+    # Spacing holds within each column (columns themselves are LAYER_GAP apart)
+    by_column = {}
+    for node, (x, y) in positions.items():
+        by_column.setdefault(x + sizes[node][0] / 2, []).append((y, node))
+    for column in by_column.values():
+        column.sort()
+        for (y1, a), (y2, _) in zip(column, column[1:]):
+            assert y2 - (y1 + sizes[a][1]) > MIN_SPACING
+
+
+@pytest.mark.parametrize("nodes", [[], ["solo"]])
+def test_trivial_graphs(nodes):
+    positions = layered_positions(nodes, [], {n: (50, 40) for n in nodes})
+    assert list(positions) == nodes
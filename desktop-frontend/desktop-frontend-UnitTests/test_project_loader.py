@@ -0,0 +1,87 @@
+import unittest
+
+from PyQt5.QtWidgets import QApplication, QWidget
+
+from src.canvas.loader import ProjectLoader
+
+
+class ProjectLoaderTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        if not QApplication.instance():
+            cls._app = QApplication([])
+
+    def make_canvas(self, w=400, h=300):
+        canvas = QWidget()
+        canvas.resize(w, h)
+        canvas.zoom_level = 1.0
+        return canvas
+
+    def test_order_by_visibility_puts_visible_items_first(self):
+        loader = ProjectLoader(self.make_canvas())
+        items = [
+            {"id": 1, "x": 2000, "y": 2000, "width": 50, "height": 50},
+            {"id": 2, "x": 100, "y": 100, "width": 50, "height": 50},
+            {"id": 3, "x": 600, "y": 100, "width": 50, "height": 50},
+        ]
+
+        ordered = loader._order_by_visibility(list(enumerate(items)))
+
+        self.assertEqual([d["id"] for _, d in ordered], [2, 3, 1])
+        # Original indexes are kept so the saved order can be restored
+        self.assertEqual([i for i, _ in ordered], [1, 2, 0])
+
+    def test_order_by_visibility_respects_zoom(self):
+        canvas = self.make_canvas()
+        canvas.zoom_level = 0.25
+        loader = ProjectLoader(canvas)
+        items = [
+            {"id": 1, "x": 3000, "y": 3000, "width": 50, "height": 50},
+            {"id": 2, "x": 1500, "y": 1000, "width": 50, "height": 50},
+        ]
+
+        ordered = loader._order_by_visibility(list(enumerate(items)))
+
+        self.assertEqual(ordered[0][1]["id"], 2)
+
+    def test_normalized_components_are_attached_to_their_items(self):
+        from src.canvas.export import attach_components
+        pump = {"name": "Pump", "grips": [{"x": 0, "y": 50, "side": "left"}]}
+        project = {
+            "canvas_state": {"items": [
+                {"id": 1, "component_id": 3},
+                {"id": 2, "component_id": 3},
+                {"id": 3, "component_id": 9},
+            ]},
+            "components": {"3": pump},
+        }
+
+        items = attach_components(project)
+
+        self.assertIs(items[0]["component"], pump)
+        self.assertIs(items[1]["component"], pump)
+        self.assertNotIn("component", items[2])
+
+    def test_failed_load_blocks_saving_the_partial_canvas(self):
+        from unittest import mock
+        from src.canvas import export
+        canvas = self.make_canvas()
+        canvas.project_id = 7
+        loader = ProjectLoader(canvas)
+        loader._items = [(0, {"id": 1})]
+        results = []
+        loader.finished.connect(results.append)
+
+        with mock.patch.object(loader, "_materialize_chunk", side_effect=ValueError("bad item")), \
+                mock.patch.object(export, "update_project") as update:
+            loader._step()
+            saved = export.save_canvas_state(canvas)
+
+        self.assertEqual(results, [False])
+        self.assertTrue(canvas._load_failed)
+        self.assertIsNone(saved)
+        update.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
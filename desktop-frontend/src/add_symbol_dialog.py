@@ -8,7 +8,8 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import Qt
 
-from src.api_client import post_component, get_components
+from src.api_client import post_component
+from src.component_catalog import component_catalog
 from src.grip_editor_dialog import GripEditorDialog
 
 class AddSymbolDialog(QDialog):
@@ -290,7 +291,7 @@ class AddSymbolDialog(QDialog):
     def _load_categories(self):
         categories = set()
         try:
-            components = get_components() or []
+            components = component_catalog.get_components() or []
             for item in components:
                 parent = (item.get("parent") or "").strip()
                 if parent:
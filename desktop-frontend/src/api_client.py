@@ -1,8 +1,14 @@
+import copy
+
 import requests
 import src.app_state as app_state
 
 DEFAULT_TIMEOUT = 5  # seconds
 
+# project_id -> {"etag", "last_modified", "data"}; revalidated on every
+# get_project() so reopening an unchanged project is a 304.
+_project_cache = {}
+
 
 class ApiError(Exception):
     pass
@@ -106,6 +112,77 @@ def get_components():
     return []
 
 
+def get_components_conditional(etag=None, last_modified=None):
+    """
+    Conditional GET /api/components/ for cache revalidation.
+    Returns (components, etag, last_modified, sync_token); components is None
+    when the server answered 304 Not Modified. sync_token (if the server sent
+    one) can be passed to get_component_changes(). Raises ApiError on failure.
+    """
+    url = f"{app_state.BACKEND_BASE_URL}/api/components/"
+    headers = {}
+    if app_state.access_token:
+        headers["Authorization"] = f"Bearer {app_state.access_token}"
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    try:
+        resp = requests.get(url, headers=headers, timeout=DEFAULT_TIMEOUT)
+    except requests.RequestException as e:
+        raise ApiError(f"Could not reach server: {e}")
+
+    sync_token = resp.headers.get("X-Sync-Token")
+    if resp.status_code == 304:
+        return None, etag, last_modified, sync_token
+
+    if resp.status_code != 200:
+        raise ApiError(f"Failed to fetch components: {resp.status_code}")
+
+    try:
+        data = resp.json()
+    except ValueError:
+        raise ApiError("Unexpected response from server.")
+
+    if isinstance(data, dict) and "components" in data:
+        components = data["components"]
+    elif isinstance(data, list):
+        components = data
+    else:
+        raise ApiError("Unexpected component format.")
+
+    return components, resp.headers.get("ETag"), resp.headers.get("Last-Modified"), sync_token
+
+
+def get_component_changes(since):
+    """
+    GET /api/components/changes/?since=<token>
+    Returns {"token", "full", "created", "updated", "deleted"}; see the
+    backend's api/component_changes.py. Raises ApiError on failure.
+    """
+    url = f"{app_state.BACKEND_BASE_URL}/api/components/changes/"
+    headers = {}
+    if app_state.access_token:
+        headers["Authorization"] = f"Bearer {app_state.access_token}"
+
+    try:
+        resp = requests.get(url, headers=headers, params={"since": since}, timeout=DEFAULT_TIMEOUT)
+    except requests.RequestException as e:
+        raise ApiError(f"Could not reach server: {e}")
+
+    if resp.status_code != 200:
+        raise ApiError(f"Failed to fetch component changes: {resp.status_code}")
+
+    try:
+        data = resp.json()
+    except ValueError:
+        raise ApiError("Unexpected response from server.")
+    if not isinstance(data, dict) or "token" not in data:
+        raise ApiError("Unexpected component changes format.")
+    return data
+
+
 def post_component(data, files):
     """
     Upload a new component (symbol) to backend.
@@ -200,19 +277,34 @@ def get_projects():
 def get_project(project_id):
     """
     Fetch a single project by ID
-    GET /api/project/<id>/
+    GET /api/project/<id>/?normalized=1
+    Items reference component_id; the component data comes once per
+    component in project["components"] (see export.attach_components).
+    Sends the cached ETag/Last-Modified and reuses the cached copy on 304.
     """
     url = f"{app_state.BACKEND_BASE_URL}/api/project/{project_id}/"
     headers = {}
     
     if app_state.access_token:
         headers["Authorization"] = f"Bearer {app_state.access_token}"
+
+    cached = _project_cache.get(project_id)
+    if cached:
+        if cached["etag"]:
+            headers["If-None-Match"] = cached["etag"]
+        if cached["last_modified"]:
+            headers["If-Modified-Since"] = cached["last_modified"]
     
     try:
-        resp = requests.get(url, headers=headers, timeout=DEFAULT_TIMEOUT)
+        resp = requests.get(url, params={"normalized": 1}, headers=headers, timeout=DEFAULT_TIMEOUT)
         
+        if resp.status_code == 304 and cached:
+            print(f"[API] Project {project_id} not modified, using cached copy")
+            return copy.deepcopy(cached["data"])
         if resp.status_code == 200:
-            return resp.json()
+            data = resp.json()
+            _cache_project(project_id, resp, data)
+            return data
         else:
             print(f"[API ERROR] Failed to fetch project: {resp.status_code}")
             
@@ -222,6 +314,24 @@ def get_project(project_id):
     return None
 
 
+def _cache_project(project_id, resp, data):
+    etag = resp.headers.get("ETag")
+    last_modified = resp.headers.get("Last-Modified")
+    if not (etag or last_modified) or not isinstance(data, dict):
+        _project_cache.pop(project_id, None)
+        return
+    _project_cache[project_id] = {
+        "etag": etag,
+        "last_modified": last_modified,
+        "data": copy.deepcopy(data),
+    }
+
+
+def clear_project_cache():
+    """Forget cached responses, e.g. on logout."""
+    _project_cache.clear()
+
+
 def create_project(name, description="", canvas_state=None):
     """
     Create a new project on the backend
@@ -283,7 +393,10 @@ def update_project(project_id, name=None, description=None, canvas_state=None):
         resp = requests.put(url, headers=headers, json=payload, timeout=DEFAULT_TIMEOUT)
         
         if resp.status_code == 200:
-            return resp.json()
+            data = resp.json()
+            # The response is the full project, so it seeds the cache
+            _cache_project(project_id, resp, data)
+            return data
         else:
             print(f"[API ERROR] Failed to update project: {resp.status_code}")
             print(f"[API ERROR] Response: {resp.text}")
@@ -294,6 +407,33 @@ def update_project(project_id, name=None, description=None, canvas_state=None):
     return None
 
 
+def patch_canvas(project_id, delta):
+    """
+    Send an incremental canvas save
+    PATCH /api/project/<id>/canvas/
+    Returns {"status": ..., "id_map": {...}} or None on failure.
+    """
+    url = f"{app_state.BACKEND_BASE_URL}/api/project/{project_id}/canvas/"
+    headers = {}
+
+    if app_state.access_token:
+        headers["Authorization"] = f"Bearer {app_state.access_token}"
+
+    try:
+        resp = requests.patch(url, headers=headers, json=delta, timeout=DEFAULT_TIMEOUT)
+
+        if resp.status_code == 200:
+            return resp.json()
+        else:
+            print(f"[API ERROR] Failed to save canvas delta: {resp.status_code}")
+            print(f"[API ERROR] Response: {resp.text}")
+
+    except Exception as e:
+        print(f"[API ERROR] Failed to save canvas delta: {e}")
+
+    return None
+
+
 def delete_project(project_id):
     """
     Delete a project
@@ -307,6 +447,7 @@ def delete_project(project_id):
     
     try:
         resp = requests.delete(url, headers=headers, timeout=DEFAULT_TIMEOUT)
+        _project_cache.pop(project_id, None)
         
         if resp.status_code == 200:
             return resp.json()
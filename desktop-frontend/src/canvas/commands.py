@@ -86,6 +86,23 @@ class DeleteCommand(QUndoCommand):
                 self.canvas.connections.append(conn)
         self.canvas.update()
 
+class LayoutCommand(QUndoCommand):
+    """Moves many components at once (auto layout); connections re-route once."""
+    def __init__(self, canvas, old_positions, new_positions):
+        super().__init__()
+        self.canvas = canvas
+        self.old_positions = old_positions  # component -> LOGICAL QPointF
+        self.new_positions = new_positions
+        self.setText("Auto Layout")
+
+    def redo(self):
+        from src.canvas.layout import place
+        place(self.canvas, self.new_positions)
+
+    def undo(self):
+        from src.canvas.layout import place
+        place(self.canvas, self.old_positions)
+
 class MoveCommand(QUndoCommand):
     def __init__(self, component, old_pos, new_pos):
         super().__init__()
@@ -13,41 +13,29 @@ from src.canvas import resources
 from src.component_widget import ComponentWidget
 from src.connection import Connection
 import src.app_state as app_state
-from src.api_client import update_project, get_components
+from src.api_client import update_project, patch_canvas
+from src.canvas import sync as canvas_sync
+from src.component_catalog import component_catalog
 
 # ---------------------- CANVAS STATE SERIALIZATION ----------------------
-# ✅ Module-level cache
-_component_cache = None
-_cache_timestamp = None
-
 def get_component_id_map():
-    """Get s_no → id mapping with caching (5 min TTL)"""
-    global _component_cache, _cache_timestamp
-    
-    import time
-    now = time.time()
-    
-    # Cache for 5 minutes
-    if _component_cache and _cache_timestamp and (now - _cache_timestamp < 300):
-        return _component_cache
-    
-    backend_components = get_components()
-    _component_cache = {str(c.get('s_no', '')): c.get('id') 
-                        for c in backend_components if c.get('s_no')}
-    _cache_timestamp = now
-    
-    return _component_cache
+    """Get s_no → id mapping from the shared component catalog."""
+    return component_catalog.sno_to_id()
 
 def serialize_canvas_state(canvas):
     """
     Convert canvas components and connections to backend-compatible format.
     Returns dict matching the canvas_state structure from API docs.
     """
+    return _serialize_canvas_state(canvas)[0]
+
+def _serialize_canvas_state(canvas):
+    """serialize_canvas_state() plus the component -> sequence map it used."""
     # Use cached mapping
     sno_to_id = get_component_id_map()
 
     items = []
-    comp_map = {}  # Maps component object to its ID
+    sequences = {}  # Maps component object to its saved sequence
     
     missing_snos = set()
     
@@ -64,12 +52,11 @@ def serialize_canvas_state(canvas):
                 missing_snos.add(s_no)
             continue
         
-        # KEY CHANGE: Start ID from 1 instead of 0
-        # The backend rejects '0' because it evaluates to False/Empty.
-        safe_id = i + 1
-        
+        # Items are keyed by their persistent uid, so the backend updates
+        # the same row on every save instead of recreating it
         item = {
-            "id": safe_id,    # Sends 1, 2, 3... (Backend accepts this)
+            "id": comp.uid,
+            "uid": comp.uid,
             "component_id": component_backend_id,
             "component": {
                 "id": component_backend_id
@@ -82,26 +69,23 @@ def serialize_canvas_state(canvas):
             "rotation": float(c_dict["rotation"]),
             "scaleX": 1.0,
             "scaleY": 1.0,
-            "sequence": safe_id # Keep sequence matching ID for clarity
+            "sequence": i + 1
         }
         items.append(item)
-        comp_map[comp] = safe_id  # Store the 1-based ID for connection mapping
+        sequences[comp] = i + 1
     
     connections = []
-    for i, conn in enumerate(canvas.connections):
-        # Resolve component using the safe_id (1-based)
-        start_id = comp_map.get(conn.start_component, -1)
-        end_id = comp_map.get(conn.end_component, -1)
-        
+    for conn in canvas.connections:
         # Skip connections if the components attached were skipped
-        if start_id == -1 or end_id == -1:
+        if conn.start_component not in sequences or conn.end_component not in sequences:
             continue
         
         connection_data = {
-            "id": i + 1, # Good practice to make connection IDs 1-based too
-            "sourceItemId": start_id,
+            "id": conn.uid,
+            "uid": conn.uid,
+            "sourceItemId": conn.start_component.uid,
             "sourceGripIndex": conn.start_grip_index,
-            "targetItemId": end_id,
+            "targetItemId": conn.end_component.uid,
             "targetGripIndex": conn.end_grip_index,
             "waypoints": [
                 {"x": float(p.x()), "y": float(p.y())}
@@ -114,7 +98,7 @@ def serialize_canvas_state(canvas):
         "items": items,
         "connections": connections,
         "sequence_counter": len(items)
-    }
+    }, sequences
 
 def save_canvas_state(canvas):
     """
@@ -124,8 +108,24 @@ def save_canvas_state(canvas):
     if not canvas.project_id:
         print("[EXPORT ERROR] No project ID. Cannot save.")
         return None
+
+    if getattr(canvas, "_is_loading", False):
+        # A progressive load is still materializing items; saving now would drop them
+        print("[EXPORT ERROR] Project is still loading. Cannot save.")
+        return None
+
+    if getattr(canvas, "_load_failed", False):
+        # Saving a partially loaded canvas would overwrite the stored project
+        print("[EXPORT ERROR] Project did not load completely. Cannot save.")
+        return None
     
-    canvas_state = serialize_canvas_state(canvas)
+    if getattr(canvas, "sync_state", None) is not None:
+        result = _save_canvas_delta(canvas)
+        if result is not None:
+            return result
+        print("[EXPORT] Incremental save failed, falling back to full save")
+
+    canvas_state, sequences = _serialize_canvas_state(canvas)
     
     # Debug output
     print(f"[EXPORT] Saving {len(canvas_state['items'])} items and {len(canvas_state['connections'])} connections")
@@ -140,16 +140,43 @@ def save_canvas_state(canvas):
     
     if result:
         print(f"[EXPORT] Canvas saved successfully to project {canvas.project_id}")
+        # Rows are keyed by uid, so the canvas now matches the backend
+        canvas_sync.mark_synced(canvas, sequences)
     else:
         print(f"[EXPORT ERROR] Failed to save canvas state")
     
     return result
 
+def _save_canvas_delta(canvas):
+    """Send only what changed since the last successful save."""
+    delta, pending = canvas_sync.build_delta(canvas)
+    if canvas_sync.is_empty(delta):
+        print("[EXPORT] No changes since last save")
+        return {"status": "success", "id_map": {"items": {}, "connections": {}}}
+
+    counts = ", ".join(
+        f"{section} +{len(d['added'])}/~{len(d['updated'])}/-{len(d['removed'])}"
+        for section, d in delta.items()
+    )
+    print(f"[EXPORT] Saving delta: {counts}")
+
+    result = patch_canvas(canvas.project_id, delta)
+    if result:
+        canvas_sync.apply_saved_delta(canvas, pending)
+    return result
+
 def load_canvas_from_project(canvas, project_data):
     """
     Load canvas from backend project data.
     Expects project_data to have 'canvas_state' with items and connections.
+
+    Widgets are built in one pass with canvas updates suspended and SVG
+    renderers shared between identical components; a single repaint happens
+    at the end.
     """
+    import time
+    timings = {}
+    t0 = time.perf_counter()
     try:
         # Block auto-save during load
         canvas._is_loading = True
@@ -158,193 +185,43 @@ def load_canvas_from_project(canvas, project_data):
             print("[LOAD] No canvas_state in project data")
             return True # Empty project is valid
         
-        items_data = canvas_state.get("items", [])
+        items_data = attach_components(project_data)
         conns_data = canvas_state.get("connections", [])
         
         print(f"[LOAD] Loading {len(items_data)} items and {len(conns_data)} connections")
 
-        # Clear existing canvas
-        canvas.components = []
-        canvas.connections = []
-        for c in canvas.children():
-            if isinstance(c, (ComponentWidget, QLabel)):
-                c.deleteLater()
-        
-        # Reset label counters to prevent sequence collisions
-        canvas.label_data = resources.load_label_data(canvas.base_dir)
+        canvas.setUpdatesEnabled(False)
+        _reset_canvas_for_load(canvas)
         
+        id_to_comp = _fetch_component_map()
+        t1 = time.perf_counter()
+        timings["catalog"] = t1 - t0
+
         # Load Components
         id_map = {}
-        
-        try:
-            # Fetch latest component map for ID resolution
-            backend_components = get_components()
-            # Create ID -> Component Data map
-            # backend_components is a list of dicts
-            id_to_comp = {c.get("id"): c for c in backend_components if c.get("id")}
-        except Exception as e:
-            print(f"[LOAD] Failed to fetch components for ID lookup: {e}")
-            id_to_comp = {}
-
+        sequences = {}
+        renderers = {}  # svg_path -> QSvgRenderer, shared by identical components
         for d in items_data:
-            # Get component data from nested structure
-            component_data = d.get("component", {})
-            
-            # --- RESOLUTION STRATEGY ---
-            # 1. Try to resolve by Component ID (Best for Web Projects & Consistency)
-            # 2. Key matching fallback
-            
-            comp_id = d.get("component_id") or component_data.get("id")
-            resolved_from_id = False
-            
-            s_no = ""
-            name = ""
-            svg_path = ""
-            
-            # Strategy 1: Look up by ID
-            if comp_id and comp_id in id_to_comp:
-                api_data = id_to_comp[comp_id]
-                name = api_data.get("name", "")
-                s_no = str(api_data.get("s_no", ""))
-                # Find local SVG for this name
-                svg_path = resources.find_svg_path(name, canvas.base_dir)
-                if svg_path:
-                    resolved_from_id = True
-                    # print(f"[LOAD] Resolved component {comp_id} ('{name}') from Library")
-            
-            # Strategy 2: Fallback to Project Data (with intelligent path fix)
-            if not resolved_from_id:
-                s_no = d.get("s_no") or component_data.get("s_no", "") or s_no
-                name = d.get("name") or component_data.get("name", "") or name
-                
-                raw_svg = d.get("svg") or component_data.get("svg")
-                if raw_svg:
-                    # Check if it's a URL or absolute path from another machine
-                    if "http" in raw_svg or "/" in raw_svg or "\\" in raw_svg:
-                        # Extract just the filename/basename
-                        base_name = os.path.basename(raw_svg)
-                        # Remove extension for fuzzy search
-                        search_name = os.path.splitext(base_name)[0]
-                        # Try to find local match
-                        found_path = resources.find_svg_path(search_name, canvas.base_dir)
-                        if found_path:
-                            svg_path = found_path
-                        elif os.path.exists(raw_svg):
-                            svg_path = raw_svg
-                    else:
-                         svg_path = raw_svg
-
-                # Last ditch: Try finding by name if SVG still missing
-                if not svg_path and name:
-                    svg_path = resources.find_svg_path(name, canvas.base_dir)
-            
-            if not svg_path:
-                print(f"[LOAD] No SVG path found for component: {name} (ID: {comp_id})")
+            comp = _build_component(canvas, d, id_to_comp, renderers)
+            if comp is None:
                 continue
-            
-            # Validate existence
-            if not os.path.exists(svg_path):
-                # Clean name search
-                found = resources.find_svg_path(name or os.path.basename(svg_path), canvas.base_dir)
-                if found:
-                    svg_path = found
-                else:
-                    print(f"[LOAD] SVG file missing: {svg_path}")
-                    continue
-            
-            # Build config from item data
-            # Include grips from best available source (critical for web-desktop sync)
-            grips_data = d.get("grips")                            # 1. Item data (web project)
-            if not grips_data and resolved_from_id:
-                grips_data = api_data.get("grips")                 # 2. API library
-            if not grips_data:
-                grips_data = component_data.get("grips")           # 3. Nested component data
-            
-            config = {
-                "s_no": s_no,
-                "parent": d.get("parent") or component_data.get("parent", ""),
-                "name": name,
-                "object": d.get("object") or component_data.get("object", "") or name,
-                "legend": d.get("legend") or component_data.get("legend", ""),
-                "suffix": d.get("suffix") or component_data.get("suffix", ""),
-                "default_label": resources.normalize_component_label(
-                    d.get("label", ""),
-                    d.get("legend") or component_data.get("legend", ""),
-                    d.get("suffix") or component_data.get("suffix", ""),
-                ),
-                "grips": grips_data,
-            }
-            
-            comp = ComponentWidget(svg_path, canvas, config=config)
-            
-            # Calculate the mathematical Desktop default size
-            svg_dims = comp.get_svg_dimensions()
-            native_w, native_h = comp.calculate_logical_size(svg_dims)
-
-            # Set position and size from backend data
-            x = float(d.get("x", 0))
-            y = float(d.get("y", 0))
-            w = float(d.get("width", native_w))
-            h = float(d.get("height", native_h))
-            
-            # Enforce minimum size: if Web saved a tiny component, forcibly 
-            # scale it up to the Desktop's default native dimensions.
-            if w < native_w or h < native_h:
-                w = native_w
-                h = native_h
-            
-            comp.logical_rect = QRectF(x, y, w, h)
-            comp.rotation_angle = float(d.get("rotation", 0))
-            
-            # Apply visuals
-            comp.update_visuals(canvas.zoom_level)
-            comp.show()
-            
             canvas.components.append(comp)
             id_map[d.get("id")] = comp
+            sequences[comp] = d.get("sequence", 0)
+        t2 = time.perf_counter()
+        timings["widgets"] = t2 - t1
 
-            # --- UPDATE LABEL COUNTERS ---
-            # Ensure future drops continue the sequence correctly
-            key_text = comp.config.get("object") or comp.config.get("name")
-            if key_text:
-                key = resources.clean_string(key_text)
-                legend = comp.config.get("legend", "")
-                suffix = comp.config.get("suffix", "")
-                
-                # Auto-initialize if missing (Sync with widget.py logic)
-                if key not in canvas.label_data and legend:
-                    canvas.label_data[key] = {
-                        "legend": legend,
-                        "suffix": suffix,
-                        "count": 0
-                    }
-                
-                if key in canvas.label_data:
-                    canvas.label_data[key]["count"] += 1
-        
         # Load Connections
         for d in conns_data:
-            sid = d.get("sourceItemId")
-            eid = d.get("targetItemId")
-            
-            start_comp = id_map.get(sid)
-            end_comp = id_map.get(eid)
-            
-            if start_comp:
-                sg = d.get("sourceGripIndex", 0)
-                eg = d.get("targetGripIndex", 0)
-                
-                # Derive side from grip position (matches web's getClosestSide)
-                start_side = _get_grip_side(start_comp, sg)
-                conn = Connection(start_comp, sg, start_side)
-                if end_comp:
-                    end_side = _get_grip_side(end_comp, eg)
-                    conn.set_end_grip(end_comp, eg, end_side)
-                
-                conn.update_path(canvas.components, canvas.connections)
+            conn = _build_connection(canvas, d, id_map)
+            if conn is not None:
                 canvas.connections.append(conn)
-        
-        canvas.update()
+        t3 = time.perf_counter()
+        timings["connections"] = t3 - t2
+
+        # Baseline for incremental saves
+        canvas_sync.mark_synced(canvas, sequences)
+
         return True
         
     except Exception as e:
@@ -354,8 +231,232 @@ def load_canvas_from_project(canvas, project_data):
         return False
     
     finally:
+        # Single layout/paint for the whole batch
+        t_paint = time.perf_counter()
+        canvas.setUpdatesEnabled(True)
+        canvas.update()
+        if timings:
+            timings["paint"] = time.perf_counter() - t_paint
+            breakdown = ", ".join(f"{k} {v * 1000:.1f}ms" for k, v in timings.items())
+            print(f"[LOAD] Timing: {breakdown} (total {(time.perf_counter() - t0) * 1000:.1f}ms)")
         # Re-enable auto-save
         canvas._is_loading = False
+
+
+def attach_components(project_data):
+    """
+    Canvas items of `project_data`. A normalized payload (top-level
+    "components" keyed by component id) gets each entry attached to its
+    items as the nested "component" _build_component already reads; the
+    dicts are shared, not copied.
+    """
+    items = (project_data.get("canvas_state") or {}).get("items", [])
+    components = project_data.get("components")
+    if components:
+        for d in items:
+            component_data = components.get(str(d.get("component_id")))
+            if component_data is not None and "component" not in d:
+                d["component"] = component_data
+    return items
+
+
+def _fetch_component_map():
+    """Fetch the component library as an ID -> component data map."""
+    try:
+        return component_catalog.by_id()
+    except Exception as e:
+        print(f"[LOAD] Failed to fetch components for ID lookup: {e}")
+        return {}
+
+
+def _reset_canvas_for_load(canvas):
+    """Clear existing widgets and label counters before loading a project."""
+    canvas.components = []
+    canvas.connections = []
+    canvas_sync.clear(canvas)
+    for c in canvas.children():
+        if isinstance(c, (ComponentWidget, QLabel)):
+            c.deleteLater()
+    
+    # Reset label counters to prevent sequence collisions
+    canvas.label_data = resources.load_label_data(canvas.base_dir)
+
+
+def _build_component(canvas, d, id_to_comp, renderers=None):
+    """
+    Create and place a ComponentWidget for one backend canvas item.
+    Returns None if no SVG could be resolved.
+    """
+    # Get component data from nested structure
+    component_data = d.get("component", {})
+    
+    # --- RESOLUTION STRATEGY ---
+    # 1. Try to resolve by Component ID (Best for Web Projects & Consistency)
+    # 2. Key matching fallback
+    
+    comp_id = d.get("component_id") or component_data.get("id")
+    resolved_from_id = False
+    
+    s_no = ""
+    name = ""
+    svg_path = ""
+    
+    # Strategy 1: Look up by ID
+    if comp_id and comp_id in id_to_comp:
+        api_data = id_to_comp[comp_id]
+        name = api_data.get("name", "")
+        s_no = str(api_data.get("s_no", ""))
+        # Find local SVG for this name
+        svg_path = resources.find_svg_path(name, canvas.base_dir)
+        if svg_path:
+            resolved_from_id = True
+            # print(f"[LOAD] Resolved component {comp_id} ('{name}') from Library")
+    
+    # Strategy 2: Fallback to Project Data (with intelligent path fix)
+    if not resolved_from_id:
+        s_no = d.get("s_no") or component_data.get("s_no", "") or s_no
+        name = d.get("name") or component_data.get("name", "") or name
+        
+        raw_svg = d.get("svg") or component_data.get("svg")
+        if raw_svg:
+            # Check if it's a URL or absolute path from another machine
+            if "http" in raw_svg or "/" in raw_svg or "\\" in raw_svg:
+                # Extract just the filename/basename
+                base_name = os.path.basename(raw_svg)
+                # Remove extension for fuzzy search
+                search_name = os.path.splitext(base_name)[0]
+                # Try to find local match
+                found_path = resources.find_svg_path(search_name, canvas.base_dir)
+                if found_path:
+                    svg_path = found_path
+                elif os.path.exists(raw_svg):
+                    svg_path = raw_svg
+            else:
+                 svg_path = raw_svg
+
+        # Last ditch: Try finding by name if SVG still missing
+        if not svg_path and name:
+            svg_path = resources.find_svg_path(name, canvas.base_dir)
+    
+    if not svg_path:
+        print(f"[LOAD] No SVG path found for component: {name} (ID: {comp_id})")
+        return None
+    
+    # Validate existence
+    if not os.path.exists(svg_path):
+        # Clean name search
+        found = resources.find_svg_path(name or os.path.basename(svg_path), canvas.base_dir)
+        if found:
+            svg_path = found
+        else:
+            print(f"[LOAD] SVG file missing: {svg_path}")
+            return None
+    
+    # Build config from item data
+    # Include grips from best available source (critical for web-desktop sync)
+    grips_data = d.get("grips")                            # 1. Item data (web project)
+    if not grips_data and resolved_from_id:
+        grips_data = api_data.get("grips")                 # 2. API library
+    if not grips_data:
+        grips_data = component_data.get("grips")           # 3. Nested component data
+    
+    config = {
+        "s_no": s_no,
+        "parent": d.get("parent") or component_data.get("parent", ""),
+        "name": name,
+        "object": d.get("object") or component_data.get("object", "") or name,
+        "legend": d.get("legend") or component_data.get("legend", ""),
+        "suffix": d.get("suffix") or component_data.get("suffix", ""),
+        "default_label": resources.normalize_component_label(
+            d.get("label", ""),
+            d.get("legend") or component_data.get("legend", ""),
+            d.get("suffix") or component_data.get("suffix", ""),
+        ),
+        "grips": grips_data,
+    }
+    
+    # Parse each distinct SVG once per load
+    renderer = None
+    if renderers is not None:
+        renderer = renderers.get(svg_path)
+    comp = ComponentWidget(svg_path, canvas, config=config, renderer=renderer)
+    if renderers is not None:
+        renderers[svg_path] = comp.renderer
+    if d.get("uid"):
+        comp.uid = str(d["uid"])
+    
+    # Calculate the mathematical Desktop default size
+    svg_dims = comp.get_svg_dimensions()
+    native_w, native_h = comp.calculate_logical_size(svg_dims)
+
+    # Set position and size from backend data
+    x = float(d.get("x", 0))
+    y = float(d.get("y", 0))
+    w = float(d.get("width", native_w))
+    h = float(d.get("height", native_h))
+    
+    # Enforce minimum size: if Web saved a tiny component, forcibly 
+    # scale it up to the Desktop's default native dimensions.
+    if w < native_w or h < native_h:
+        w = native_w
+        h = native_h
+    
+    comp.logical_rect = QRectF(x, y, w, h)
+    comp.rotation_angle = float(d.get("rotation", 0))
+    
+    # Apply visuals
+    comp.update_visuals(canvas.zoom_level)
+    comp.show()
+
+    _register_label(canvas, comp)
+    return comp
+
+
+def _register_label(canvas, comp):
+    """Bump label counters so future drops continue the sequence correctly."""
+    key_text = comp.config.get("object") or comp.config.get("name")
+    if key_text:
+        key = resources.clean_string(key_text)
+        legend = comp.config.get("legend", "")
+        suffix = comp.config.get("suffix", "")
+        
+        # Auto-initialize if missing (Sync with widget.py logic)
+        if key not in canvas.label_data and legend:
+            canvas.label_data[key] = {
+                "legend": legend,
+                "suffix": suffix,
+                "count": 0
+            }
+        
+        if key in canvas.label_data:
+            canvas.label_data[key]["count"] += 1
+
+
+def _build_connection(canvas, d, id_map):
+    """Create and route a Connection for one backend connection entry."""
+    sid = d.get("sourceItemId")
+    eid = d.get("targetItemId")
+    
+    start_comp = id_map.get(sid)
+    end_comp = id_map.get(eid)
+    
+    if not start_comp:
+        return None
+
+    sg = d.get("sourceGripIndex", 0)
+    eg = d.get("targetGripIndex", 0)
+    
+    # Derive side from grip position (matches web's getClosestSide)
+    start_side = _get_grip_side(start_comp, sg)
+    conn = Connection(start_comp, sg, start_side)
+    if d.get("uid"):
+        conn.uid = str(d["uid"])
+    if end_comp:
+        end_side = _get_grip_side(end_comp, eg)
+        conn.set_end_grip(end_comp, eg, end_side)
+    
+    conn.update_path(canvas.components, canvas.connections)
+    return conn
     
 # ---------------------- HELPERS ----------------------
 
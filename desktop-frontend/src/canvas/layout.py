@@ -0,0 +1,320 @@
+"""
+Automatic layered (Sugiyama-style) layout.
+
+Places components left to right along the flow, for AI-generated diagrams
+and imported diagrams that come without coordinates. Works on the same graph
+GraphValidator builds: the canvas components as nodes and every connection
+whose two ends are on the canvas as a directed edge.
+
+Phases:
+1. Cycle breaking   - depth-first search from the sources; edges that close
+                      a cycle (recycle streams) are reversed for layout only.
+2. Layering         - longest path from the sources, then each source is
+                      pulled next to its first consumer.
+3. Dummy nodes      - edges spanning several layers get one placeholder per
+                      layer they cross, so they take part in ordering.
+4. Ordering         - barycenter sweeps (down and up) between neighbouring
+                      layers, keeping the order with the fewest crossings.
+5. Coordinates      - one column per layer, as wide as its widest component;
+                      inside a column components are pulled towards their
+                      neighbours' centres without breaking the order or the
+                      spacing rule.
+
+Everything is iterative and linear or O(E log V) per sweep over components
+plus dummy nodes: a 1000-component process diagram lays out in a fraction
+of a second. Many edges spanning many layers cost more (one dummy per layer
+crossed).
+"""
+from PyQt5.QtCore import QPointF
+
+# Same minimum gap ComponentWidget.mouseReleaseEvent enforces between components
+MIN_SPACING = 35
+NODE_GAP = 2 * MIN_SPACING
+LAYER_GAP = 3 * MIN_SPACING
+MARGIN = 50
+SWEEPS = 8
+
+
+def _break_cycles(n, succ):
+    """DAG edges [(u, v)]: edges closing a cycle are reversed."""
+    indegree = [0] * n
+    for u in range(n):
+        for v in succ[u]:
+            indegree[v] += 1
+    roots = [i for i in range(n) if indegree[i] == 0] + [i for i in range(n) if indegree[i]]
+
+    state = [0] * n   # 0 new, 1 on the DFS stack, 2 done
+    dag = set()
+    for root in roots:
+        if state[root]:
+            continue
+        state[root] = 1
+        stack = [(root, 0)]
+        while stack:
+            v, i = stack[-1]
+            if i < len(succ[v]):
+                stack[-1] = (v, i + 1)
+                w = succ[v][i]
+                if state[w] == 1:
+                    dag.add((w, v))
+                else:
+                    dag.add((v, w))
+                    if state[w] == 0:
+                        state[w] = 1
+                        stack.append((w, 0))
+            else:
+                state[v] = 2
+                stack.pop()
+    return sorted(dag)
+
+
+def _assign_layers(n, dag):
+    succ = [[] for _ in range(n)]
+    pred = [[] for _ in range(n)]
+    for u, v in dag:
+        succ[u].append(v)
+        pred[v].append(u)
+
+    waiting = [len(pred[v]) for v in range(n)]
+    order = [v for v in range(n) if not waiting[v]]
+    layer = [0] * n
+    for v in order:   # grows while iterating: a topological order
+        for w in succ[v]:
+            layer[w] = max(layer[w], layer[v] + 1)
+            waiting[w] -= 1
+            if not waiting[w]:
+                order.append(w)
+
+    # A feed that only joins late in the flow sits right before its consumer
+    for v in reversed(order):
+        if not pred[v] and succ[v]:
+            layer[v] = min(layer[w] for w in succ[v]) - 1
+    return layer
+
+
+def _count_crossings(upper, lower, down):
+    """Crossings between two neighbouring layers (inversion count, Fenwick tree)."""
+    position = {v: i for i, v in enumerate(lower)}
+    targets = []
+    for v in upper:
+        linked = down[v]
+        if len(linked) == 1:
+            targets.append(position[linked[0]])
+        elif linked:
+            targets.extend(sorted(position[w] for w in linked))
+    size = len(lower)
+    tree = [0] * (size + 1)
+    crossings = 0
+    for seen, target in enumerate(targets):
+        i = target + 1
+        while i:
+            crossings -= tree[i]
+            i -= i & -i
+        crossings += seen
+        i = target + 1
+        while i <= size:
+            tree[i] += 1
+            i += i & -i
+    return crossings
+
+
+def _reorder(layers, neighbours, fixed_index, order_range):
+    for l in order_range:
+        position = {v: i for i, v in enumerate(layers[fixed_index(l)])}
+        keys = {}
+        for i, v in enumerate(layers[l]):
+            linked = neighbours[v]
+            if len(linked) == 1:
+                # Every dummy node, and most components: skip the sum
+                keys[v] = position[linked[0]]
+            elif linked:
+                keys[v] = sum(position[w] for w in linked) / len(linked)
+            else:
+                keys[v] = i
+        layers[l].sort(key=keys.__getitem__)
+
+
+def _place_column(column, heights, real, desired, gap):
+    """Tops for `column` (in order) close to `desired` tops, at least `gap` apart."""
+    half = gap / 2
+    forward = []
+    bottom = None
+    prev_real = False
+    for v in column:
+        top = desired[v]
+        if bottom is not None:
+            top = max(top, bottom + (gap if prev_real and real[v] else half))
+        forward.append(top)
+        bottom = top + heights[v]
+        prev_real = real[v]
+
+    backward = [0.0] * len(column)
+    limit = None
+    next_real = False
+    for i in range(len(column) - 1, -1, -1):
+        v = column[i]
+        top = desired[v]
+        if limit is not None:
+            top = min(top, limit - (gap if next_real and real[v] else half) - heights[v])
+        backward[i] = top
+        limit = top
+        next_real = real[v]
+
+    # Both satisfy every spacing constraint, so their average does too
+    return [(a + b) / 2 for a, b in zip(forward, backward)]
+
+
+def layered_positions(nodes, edges, sizes, node_gap=NODE_GAP, layer_gap=LAYER_GAP, sweeps=SWEEPS):
+    """
+    Top-left (x, y) for every node in `nodes`, given `edges` [(source,
+    target), ...] and `sizes` {node: (width, height)}. Edges to unknown nodes
+    and self-loops are ignored. Gaps never go below MIN_SPACING.
+    """
+    node_gap = max(node_gap, MIN_SPACING + 1)
+    layer_gap = max(layer_gap, MIN_SPACING + 1)
+    n = len(nodes)
+    if not n:
+        return {}
+    index = {node: i for i, node in enumerate(nodes)}
+
+    succ = [[] for _ in range(n)]
+    seen = set()
+    for source, target in edges:
+        u, v = index.get(source), index.get(target)
+        if u is None or v is None or u == v or (u, v) in seen:
+            continue
+        seen.add((u, v))
+        succ[u].append(v)
+
+    dag = _break_cycles(n, succ)
+    layer = _assign_layers(n, dag)
+
+    # Dummy nodes: indexes from n up, zero-sized
+    node_sizes = [tuple(sizes[node]) for node in nodes]
+    up = [[] for _ in range(n)]
+    down = [[] for _ in range(n)]
+    for u, v in dag:
+        prev = u
+        for l in range(layer[u] + 1, layer[v]):
+            dummy = len(layer)
+            layer.append(l)
+            node_sizes.append((0, 0))
+            up.append([prev])
+            down.append([])
+            down[prev].append(dummy)
+            prev = dummy
+        down[prev].append(v)
+        up[v].append(prev)
+    real = [i < n for i in range(len(layer))]
+
+    depth = max(layer) + 1
+    layers = [[] for _ in range(depth)]
+    for v in range(len(layer)):
+        layers[layer[v]].append(v)
+
+    def crossings():
+        return sum(_count_crossings(layers[l], layers[l + 1], down) for l in range(depth - 1))
+
+    best = crossings()
+    best_layers = [list(column) for column in layers]
+    for _ in range(sweeps):
+        if not best:
+            break
+        _reorder(layers, up, lambda l: l - 1, range(1, depth))
+        _reorder(layers, down, lambda l: l + 1, range(depth - 2, -1, -1))
+        count = crossings()
+        if count < best:
+            best = count
+            best_layers = [list(column) for column in layers]
+        else:
+            break
+    layers = best_layers
+
+    # Columns
+    column_width = [max(node_sizes[v][0] for v in column) for column in layers]
+    column_x = []
+    x = 0.0
+    for width in column_width:
+        column_x.append(x)
+        x += width + layer_gap
+
+    # Rows: stacked first, then pulled towards neighbours down and up
+    heights = [size[1] for size in node_sizes]
+    top = [0.0] * len(layer)
+    for column in layers:
+        y = 0.0
+        for v in column:
+            top[v] = y
+            y += heights[v] + node_gap
+
+    for neighbours, order in ((up, range(1, depth)), (down, range(depth - 2, -1, -1))):
+        for l in order:
+            column = layers[l]
+            desired = {}
+            for v in column:
+                linked = neighbours[v]
+                if len(linked) == 1:
+                    w = linked[0]
+                    desired[v] = top[w] + (heights[w] - heights[v]) / 2
+                elif linked:
+                    centre = sum(top[w] + heights[w] / 2 for w in linked) / len(linked)
+                    desired[v] = centre - heights[v] / 2
+                else:
+                    desired[v] = top[v]
+            for v, y in zip(column, _place_column(column, heights, real, desired, node_gap)):
+                top[v] = y
+
+    min_top = min(top[v] for v in range(n))
+    positions = {}
+    for l, column in enumerate(layers):
+        for v in column:
+            if v < n:
+                width, _ = node_sizes[v]
+                positions[nodes[v]] = (
+                    round(MARGIN + column_x[l] + (column_width[l] - width) / 2),
+                    round(MARGIN + top[v] - min_top),
+                )
+    return positions
+
+
+class LayeredLayout:
+    """Layered layout of canvas components (the GraphValidator graph)."""
+
+    def __init__(self, components, connections, node_gap=NODE_GAP, layer_gap=LAYER_GAP):
+        self.components = components
+        self.connections = connections
+        self.node_gap = node_gap
+        self.layer_gap = layer_gap
+
+    def compute(self):
+        """{component: QPointF} logical top-left positions."""
+        on_canvas = set(self.components)
+        edges = [
+            (conn.start_component, conn.end_component)
+            for conn in self.connections
+            if conn.start_component in on_canvas and conn.end_component in on_canvas
+        ]
+        sizes = {
+            comp: (comp.logical_rect.width(), comp.logical_rect.height())
+            for comp in self.components
+        }
+        positions = layered_positions(self.components, edges, sizes, self.node_gap, self.layer_gap)
+        return {comp: QPointF(x, y) for comp, (x, y) in positions.items()}
+
+
+def place(canvas, positions):
+    """Move components to `positions` {component: QPointF}, then re-route once."""
+    z = getattr(canvas, "zoom_level", 1.0)
+    for comp, pos in positions.items():
+        comp.logical_rect.moveTo(pos.x(), pos.y())
+        comp.update_visuals(z)
+        if hasattr(canvas, "expand_to_contain"):
+            canvas.expand_to_contain(comp.logical_rect)
+
+    if hasattr(canvas, "clear_routing_cache"):
+        canvas.clear_routing_cache()
+    for conn in canvas.connections:
+        conn.update_path(canvas.components, canvas.connections)
+    for conn in canvas.connections:
+        conn._generate_jump_path(canvas.connections)
+    canvas.update()
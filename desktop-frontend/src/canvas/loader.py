@@ -0,0 +1,212 @@
+"""
+Progressive project loading.
+
+The canvas window is shown immediately; project data is fetched on a worker
+thread, then items are materialized in visible-area-first chunks on the event
+loop, followed by connection routing in chunks. Progress is reported through
+signals so the screen can show an indicator.
+"""
+import threading
+import time
+
+from PyQt5.QtCore import QObject, QTimer, QRectF, pyqtSignal
+
+from src.canvas import export
+from src.canvas import layout
+from src.canvas import sync as canvas_sync
+
+
+class ProjectLoader(QObject):
+    # (done, total) over items + connections
+    progress = pyqtSignal(int, int)
+    # Emitted on the main thread once project data has arrived (None on failure)
+    data_ready = pyqtSignal(object)
+    # True when every phase completed
+    finished = pyqtSignal(bool)
+
+    # Worker thread -> main thread relay
+    _fetched = pyqtSignal(object, object)
+
+    ITEM_CHUNK = 40
+    CONNECTION_CHUNK = 15
+
+    def __init__(self, canvas, scroll_area=None):
+        # Parented to the canvas so closing the window cancels the load
+        super().__init__(canvas)
+        self.canvas = canvas
+        self.scroll_area = scroll_area
+
+        self._items = []
+        self._conns = []
+        self._needs_layout = False
+        self._id_to_comp = {}
+        self._id_map = {}
+        self._order = {}  # component -> original index in canvas_state
+        self._sequences = {}  # component -> saved sequence
+        self._renderers = {}
+        self._item_pos = 0
+        self._conn_pos = 0
+        self._started_at = 0.0
+        self._first_paint_at = None
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self._step)
+        self._fetched.connect(self._on_fetched)
+
+    # ---------------------- ENTRY POINTS ----------------------
+    def load_from_backend(self, project_id):
+        """Fetch project + component catalog off the UI thread, then load."""
+        self.canvas._is_loading = True
+        self._started_at = time.perf_counter()
+
+        def _worker():
+            from src.api_client import get_project
+            project_data = get_project(project_id)
+            id_to_comp = export._fetch_component_map() if project_data else {}
+            try:
+                self._fetched.emit(project_data, id_to_comp)
+            except RuntimeError:
+                # Loader (and its canvas) was destroyed while fetching
+                pass
+
+        threading.Thread(target=_worker, daemon=True).start()
+
+    def load(self, project_data, id_to_comp=None):
+        """Start chunked materialization of already-fetched project data."""
+        if not self._started_at:
+            self._started_at = time.perf_counter()
+        if id_to_comp is None:
+            id_to_comp = export._fetch_component_map()
+        self._on_fetched(project_data, id_to_comp)
+
+    def cancel(self):
+        self._timer.stop()
+        self.canvas._is_loading = False
+
+    # ---------------------- PHASES ----------------------
+    def _on_fetched(self, project_data, id_to_comp):
+        self.data_ready.emit(project_data)
+        if not project_data:
+            self.cancel()
+            self.finished.emit(False)
+            return
+
+        canvas_state = project_data.get("canvas_state") or {}
+        self._id_to_comp = id_to_comp or {}
+        self._items = self._order_by_visibility(list(enumerate(export.attach_components(project_data))))
+        self._conns = canvas_state.get("connections", [])
+        # AI output and some imports come without coordinates: lay them out
+        self._needs_layout = bool(self._items) and not any(
+            "x" in d or "y" in d for _, d in self._items
+        )
+        print(f"[LOAD] Progressive load of {len(self._items)} items and {len(self._conns)} connections")
+
+        self.canvas._is_loading = True
+        export._reset_canvas_for_load(self.canvas)
+        self.progress.emit(0, self._total())
+        self._timer.start()
+
+    def _step(self):
+        try:
+            if self._item_pos < len(self._items):
+                self._materialize_chunk()
+            elif self._conn_pos < len(self._conns):
+                self._route_chunk()
+            else:
+                self._finish()
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            print(f"[LOAD ERROR] Failed to load project: {e}")
+            self.cancel()
+            # The canvas only holds part of the project; a full save would
+            # delete every row that was never built (see save_canvas_state)
+            self.canvas._load_failed = True
+            self.finished.emit(False)
+
+    def _materialize_chunk(self):
+        canvas = self.canvas
+        chunk = self._items[self._item_pos:self._item_pos + self.ITEM_CHUNK]
+        self._item_pos += len(chunk)
+
+        canvas.setUpdatesEnabled(False)
+        try:
+            for index, d in chunk:
+                comp = export._build_component(canvas, d, self._id_to_comp, self._renderers)
+                if comp is None:
+                    continue
+                canvas.components.append(comp)
+                self._order[comp] = index
+                self._id_map[d.get("id")] = comp
+                self._sequences[comp] = d.get("sequence", 0)
+        finally:
+            canvas.setUpdatesEnabled(True)
+        canvas.update()
+
+        if self._item_pos >= len(self._items):
+            # Restore saved order so sequences survive the next save
+            canvas.components.sort(key=self._order.get)
+
+        if self._first_paint_at is None:
+            self._first_paint_at = time.perf_counter()
+        self.progress.emit(self._item_pos, self._total())
+
+    def _route_chunk(self):
+        canvas = self.canvas
+        chunk = self._conns[self._conn_pos:self._conn_pos + self.CONNECTION_CHUNK]
+        self._conn_pos += len(chunk)
+
+        for d in chunk:
+            conn = export._build_connection(canvas, d, self._id_map)
+            if conn is not None:
+                canvas.connections.append(conn)
+        canvas.update()
+        self.progress.emit(len(self._items) + self._conn_pos, self._total())
+
+    def _finish(self):
+        self._timer.stop()
+        canvas = self.canvas
+        canvas_sync.mark_synced(canvas, self._sequences)
+        if self._needs_layout:
+            # After mark_synced, so the next save sends the new positions
+            layout.place(canvas, layout.LayeredLayout(canvas.components, canvas.connections).compute())
+        canvas.run_validation()
+        canvas.undo_stack.setClean()
+        canvas.is_modified = self._needs_layout
+        canvas._is_loading = False
+
+        now = time.perf_counter()
+        first = (self._first_paint_at or now) - self._started_at
+        print(f"[LOAD] Timing: first paint {first * 1000:.1f}ms, complete {(now - self._started_at) * 1000:.1f}ms")
+        self.finished.emit(True)
+
+    # ---------------------- HELPERS ----------------------
+    def _total(self):
+        return len(self._items) + len(self._conns)
+
+    def _visible_rect(self):
+        """Currently visible canvas area in logical coordinates."""
+        zoom = getattr(self.canvas, "zoom_level", 1.0) or 1.0
+        if self.scroll_area is not None:
+            vp = self.scroll_area.viewport()
+            x = self.scroll_area.horizontalScrollBar().value()
+            y = self.scroll_area.verticalScrollBar().value()
+            return QRectF(x / zoom, y / zoom, vp.width() / zoom, vp.height() / zoom)
+        return QRectF(0, 0, self.canvas.width() / zoom, self.canvas.height() / zoom)
+
+    def _order_by_visibility(self, indexed_items):
+        """Items intersecting the viewport first, the rest by distance to it."""
+        visible = self._visible_rect()
+        center = visible.center()
+
+        def key(entry):
+            d = entry[1]
+            x = float(d.get("x", 0))
+            y = float(d.get("y", 0))
+            rect = QRectF(x, y, float(d.get("width", 0) or 1), float(d.get("height", 0) or 1))
+            dx = rect.center().x() - center.x()
+            dy = rect.center().y() - center.y()
+            return (0 if visible.intersects(rect) else 1, dx * dx + dy * dy)
+
+        return sorted(indexed_items, key=key)
@@ -2,6 +2,11 @@ import os
 import json
 import csv
 import re
+import time
+import threading
+
+# desktop-frontend/ (this file lives in src/canvas/)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 def clean_string(s):
     return s.lower().translate(str.maketrans("", "", " ,_/-()"))
@@ -101,29 +106,240 @@ def load_config(base_dir):
         print("Failed to load grips.json:", e)
     return component_config
 
+class ComponentConfigIndex:
+    """
+    grips.json entries keyed by exact and cleaned component name.
+    Replaces the linear clean_string scan in get_component_config_by_name.
+    """
+
+    def __init__(self, component_config):
+        self.exact = dict(component_config)
+        self.cleaned = {}
+        for key, cfg in self.exact.items():
+            # First entry wins, matching the old linear scan order
+            self.cleaned.setdefault(clean_string(key), cfg)
+
+    def get(self, name, default=None):
+        if not name:
+            return default
+        if name in self.exact:
+            return self.exact[name]
+        return self.cleaned.get(clean_string(name), default)
+
+    def get_grips(self, name):
+        """Return non-empty grips list for a component, or None."""
+        grips = (self.get(name) or {}).get("grips")
+        if isinstance(grips, list) and len(grips) > 0:
+            return grips
+        return None
+
+
+_config_indexes = {}
+_config_lock = threading.Lock()
+
+def get_config_index(base_dir=BASE_DIR):
+    """
+    Lazily load grips.json once per process and base_dir.
+    Shared by CanvasWidget, ComponentWidget and the ComponentLibrary.
+    """
+    key = os.path.abspath(base_dir)
+    index = _config_indexes.get(key)
+    if index is None:
+        with _config_lock:
+            index = _config_indexes.get(key)
+            if index is None:
+                index = ComponentConfigIndex(load_config(base_dir))
+                _config_indexes[key] = index
+    return index
+
+def clear_config_index():
+    """Drop cached indexes (e.g. after grips.json changes on disk)."""
+    with _config_lock:
+        _config_indexes.clear()
+
+SVG_INDEX_FILE = "svg_index.json"
+SVG_INDEX_VERSION = 1
+
+class SvgAssetIndex:
+    """
+    In-memory map of ui/assets/svg built with a single directory walk:
+    exact stem, cleaned stem, filename and (category folder, filename) -> path.
+
+    The index is refreshed when any indexed directory mtime changes and is
+    persisted next to the assets so cold starts can skip the walk.
+    """
+    STALE_CHECK_INTERVAL = 2.0  # seconds between mtime checks on hits
+
+    def __init__(self, base_dir):
+        self.svg_dir = os.path.join(base_dir, "ui", "assets", "svg")
+        self.cache_path = os.path.join(base_dir, "ui", "assets", SVG_INDEX_FILE)
+        self._lock = threading.Lock()
+        self._dir_mtimes = None
+        self._checked_at = 0.0
+        self._by_stem = {}
+        self._by_clean = {}
+        self._by_file = {}
+        self._by_folder = {}
+
+    # ---------------------- BUILD ----------------------
+    def _current_mtimes(self, rel_dirs):
+        mtimes = {}
+        for rel in rel_dirs:
+            try:
+                mtimes[rel] = os.stat(os.path.join(self.svg_dir, rel)).st_mtime_ns
+            except OSError:
+                return None
+        return mtimes
+
+    def _walk(self):
+        dir_mtimes = {}
+        files = []
+        for root, _, names in os.walk(self.svg_dir):
+            rel = os.path.relpath(root, self.svg_dir)
+            rel = "" if rel == "." else rel
+            try:
+                dir_mtimes[rel] = os.stat(root).st_mtime_ns
+            except OSError:
+                continue
+            for f in names:
+                files.append((rel, f))
+        return dir_mtimes, files
+
+    def _apply(self, dir_mtimes, files):
+        by_stem, by_clean, by_file, by_folder = {}, {}, {}, {}
+        for rel, f in files:
+            path = os.path.join(self.svg_dir, rel, f)
+            # First occurrence wins, matching the old os.walk order
+            by_file.setdefault(f, path)
+            by_folder.setdefault((rel, f), path)
+            if f.lower().endswith(".svg"):
+                stem = f[:-4]
+                by_stem.setdefault(stem, path)
+                by_clean.setdefault(clean_string(stem), path)
+
+        self._by_stem, self._by_clean = by_stem, by_clean
+        self._by_file, self._by_folder = by_file, by_folder
+        self._dir_mtimes = dir_mtimes
+        self._checked_at = time.monotonic()
+
+    def _load_persisted(self):
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != SVG_INDEX_VERSION:
+                return False
+            dir_mtimes = data.get("dirs") or {}
+            if not dir_mtimes or self._current_mtimes(dir_mtimes) != dir_mtimes:
+                return False
+            self._apply(dir_mtimes, [tuple(entry) for entry in data.get("files", [])])
+            return True
+        except (OSError, ValueError, TypeError):
+            return False
+
+    def _persist(self, dir_mtimes, files):
+        try:
+            with open(self.cache_path, "w", encoding="utf-8") as f:
+                json.dump({"version": SVG_INDEX_VERSION, "dirs": dir_mtimes, "files": files}, f)
+        except OSError as e:
+            print("Failed to write svg_index.json:", e)
+
+    def rebuild(self):
+        """Rescan the SVG directory and persist the result."""
+        with self._lock:
+            if not os.path.isdir(self.svg_dir):
+                self._apply({}, [])
+                return
+            dir_mtimes, files = self._walk()
+            self._apply(dir_mtimes, files)
+            self._persist(dir_mtimes, files)
+
+    def refresh_if_stale(self, force=False):
+        """
+        Rebuild if the directory tree changed since the last build.
+        Returns True if a rebuild happened.
+        """
+        if self._dir_mtimes is None:
+            with self._lock:
+                loaded = self._dir_mtimes is None and self._load_persisted()
+            if not loaded and self._dir_mtimes is None:
+                self.rebuild()
+            return True
+
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.STALE_CHECK_INTERVAL:
+            return False
+        self._checked_at = now
+
+        if not self._dir_mtimes:
+            stale = os.path.isdir(self.svg_dir)
+        else:
+            stale = self._current_mtimes(self._dir_mtimes) != self._dir_mtimes
+        if stale:
+            self.rebuild()
+        return stale
+
+    # ---------------------- LOOKUP ----------------------
+    def exists(self):
+        return bool(self._dir_mtimes)
+
+    def _lookup(self, fn):
+        path = fn()
+        # A miss may mean new assets were synced; recheck mtimes once
+        if path is None and self.refresh_if_stale(force=True):
+            path = fn()
+        return path
+
+    def find(self, name):
+        """Fuzzy lookup by component name (exact stem, then cleaned stem)."""
+        if not name:
+            return None
+        target = clean_string(name)
+        return self._lookup(lambda: self._by_stem.get(name) or self._by_clean.get(target))
+
+    def find_file(self, filename, folder=None):
+        """Exact filename lookup, preferring the given category folder."""
+        if not filename:
+            return None
+        return self._lookup(
+            lambda: (self._by_folder.get((folder, filename)) if folder else None)
+            or self._by_file.get(filename)
+        )
+
+
+_svg_indexes = {}
+_svg_lock = threading.Lock()
+
+def get_svg_index(base_dir=BASE_DIR):
+    """Return the shared SvgAssetIndex for base_dir, building it on first use."""
+    key = os.path.abspath(base_dir)
+    index = _svg_indexes.get(key)
+    if index is None:
+        with _svg_lock:
+            index = _svg_indexes.get(key)
+            if index is None:
+                index = SvgAssetIndex(base_dir)
+                _svg_indexes[key] = index
+    index.refresh_if_stale()
+    return index
+
+def refresh_svg_index(base_dir=BASE_DIR):
+    """Force a rescan, e.g. after the library downloaded new assets."""
+    index = get_svg_index(base_dir)
+    index.rebuild()
+    return index
+
 def find_svg_path(name, base_dir):
     # ID_MAP removed (Legacy)
     # name = ID_MAP.get(name, name)
-    
-    svg_dir = os.path.join(base_dir, "ui", "assets", "svg")
-    target = clean_string(name)
 
-    if not os.path.exists(svg_dir):
-        print(f"SVG directory missing: {svg_dir}")
+    index = get_svg_index(base_dir)
+    if not index.exists():
+        print(f"SVG directory missing: {index.svg_dir}")
         return None
 
-    for root, _, files in os.walk(svg_dir):
-        for f in files:
-            if not f.lower().endswith(".svg"):
-                continue
-
-            fname = f[:-4]
-            # Direct match
-            if fname == name:
-                return os.path.join(root, f)
-            # Clean match
-            if clean_string(fname) == target:
-                return os.path.join(root, f)
+    path = index.find(name)
+    if path:
+        return path
 
     print(f"No SVG found for: {name}")
     return None
@@ -132,6 +348,9 @@ def get_component_config_by_name(name, component_config):
     # ID_MAP removed (Legacy)
     # name = ID_MAP.get(name, name)
 
+    if isinstance(component_config, ComponentConfigIndex):
+        return component_config.get(name, {})
+
     if name in component_config:
         return component_config[name]
 
@@ -158,16 +377,6 @@ def find_svg_file(filename, parent, base_dir):
         return None
         
     folder = FOLDER_MAP.get(parent, parent)
-    
-    # Try specific path first
-    path = os.path.join(base_dir, "ui", "assets", "svg", folder, filename)
-    if os.path.exists(path):
-        return path
-        
-    # Fallback: Search in all svg subdirectories
-    svg_root = os.path.join(base_dir, "ui", "assets", "svg")
-    for root, _, files in os.walk(svg_root):
-        if filename in files:
-            return os.path.join(root, filename)
-            
-    return None
+
+    # Specific category folder first, then any svg subdirectory
+    return get_svg_index(base_dir).find_file(filename, folder)
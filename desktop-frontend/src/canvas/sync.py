@@ -0,0 +1,156 @@
+"""
+Dirty tracking for incremental project saves.
+
+Every widget and connection carries a stable `uid` that the backend stores
+with its row. After a project is loaded or saved, the canvas remembers the
+state last written for each uid; the next save then only sends what differs
+(PATCH /api/project/<id>/canvas/) instead of the whole diagram.
+"""
+from src.component_catalog import component_catalog
+
+CONNECTION_FIELDS = ("sourceGripIndex", "targetGripIndex", "waypoints")
+
+
+class CanvasSyncState:
+    """What the backend holds for a canvas as of the last successful save."""
+
+    def __init__(self):
+        self.sequences = {}     # item uid -> saved sequence
+        self.items = {}         # item uid -> saved item state
+        self.connections = {}   # connection uid -> saved connection state
+
+
+def item_state(comp, component_id, sequence):
+    c_dict = comp.to_dict()
+    return {
+        "component_id": component_id,
+        "label": comp.config.get("default_label", ""),
+        "x": float(c_dict["x"]),
+        "y": float(c_dict["y"]),
+        "width": float(c_dict["width"]),
+        "height": float(c_dict["height"]),
+        "rotation": float(c_dict["rotation"]),
+        "scaleX": 1.0,
+        "scaleY": 1.0,
+        "sequence": sequence,
+    }
+
+
+def connection_state(conn):
+    return {
+        "sourceItemId": conn.start_component.uid,
+        "sourceGripIndex": conn.start_grip_index,
+        "targetItemId": conn.end_component.uid,
+        "targetGripIndex": conn.end_grip_index,
+        "waypoints": [{"x": float(p.x()), "y": float(p.y())} for p in conn.path],
+    }
+
+
+def mark_synced(canvas, sequences):
+    """
+    Record that the canvas matches the backend.
+    `sequences` maps each widget the backend has a row for to its sequence.
+    """
+    sno_to_id = component_catalog.sno_to_id()
+    state = CanvasSyncState()
+
+    for comp, sequence in sequences.items():
+        component_id = sno_to_id.get(str(comp.config.get("s_no", "")))
+        if not component_id:
+            continue
+        state.sequences[comp.uid] = sequence
+        state.items[comp.uid] = item_state(comp, component_id, sequence)
+
+    for conn in canvas.connections:
+        if conn.end_component is None:
+            continue
+        if conn.start_component.uid in state.items and conn.end_component.uid in state.items:
+            state.connections[conn.uid] = connection_state(conn)
+
+    canvas.sync_state = state
+
+
+def clear(canvas):
+    """Forget the backend baseline; the next save sends the full canvas."""
+    canvas.sync_state = None
+
+
+def build_delta(canvas):
+    """
+    Diff the canvas against its sync state.
+    Returns (delta, pending); pending becomes the new baseline through
+    apply_saved_delta() once the backend has accepted the delta.
+    """
+    state = canvas.sync_state
+    sno_to_id = component_catalog.sno_to_id()
+
+    items = {"added": [], "updated": [], "removed": []}
+    connections = {"added": [], "updated": [], "removed": []}
+    pending = CanvasSyncState()
+
+    recreated = set()  # item uids whose rows (and connections) are rebuilt
+    next_sequence = max(state.sequences.values(), default=0) + 1
+    for comp in canvas.components:
+        component_id = sno_to_id.get(str(comp.config.get("s_no", "")))
+        if not component_id:
+            continue
+
+        saved = state.items.get(comp.uid)
+        if saved is not None and saved["component_id"] == component_id:
+            sequence = state.sequences[comp.uid]
+            current = item_state(comp, component_id, sequence)
+            changes = {k: v for k, v in current.items() if saved.get(k) != v}
+            if changes:
+                items["updated"].append({"uid": comp.uid, **changes})
+        else:
+            if saved is not None:
+                # Swapped to a different component: recreate the row
+                items["removed"].append(comp.uid)
+                recreated.add(comp.uid)
+            sequence = next_sequence
+            next_sequence += 1
+            current = item_state(comp, component_id, sequence)
+            items["added"].append({"id": comp.uid, "uid": comp.uid, **current})
+
+        pending.sequences[comp.uid] = sequence
+        pending.items[comp.uid] = current
+
+    items["removed"] += [uid for uid in state.items if uid not in pending.items]
+
+    for conn in canvas.connections:
+        if conn.end_component is None:
+            continue
+        if conn.start_component.uid not in pending.items or conn.end_component.uid not in pending.items:
+            continue
+
+        current = connection_state(conn)
+        saved = state.connections.get(conn.uid)
+        if (saved is not None
+                and saved["sourceItemId"] == current["sourceItemId"]
+                and saved["targetItemId"] == current["targetItemId"]
+                and not recreated & {current["sourceItemId"], current["targetItemId"]}):
+            changes = {k: current[k] for k in CONNECTION_FIELDS if saved.get(k) != current[k]}
+            if changes:
+                connections["updated"].append({"uid": conn.uid, **changes})
+        else:
+            if saved is not None:
+                # Re-attached, or its item was recreated: recreate it too
+                connections["removed"].append(conn.uid)
+            connections["added"].append({"id": conn.uid, "uid": conn.uid, **current})
+
+        pending.connections[conn.uid] = current
+
+    connections["removed"] += [uid for uid in state.connections if uid not in pending.connections]
+
+    return {"items": items, "connections": connections}, pending
+
+
+def is_empty(delta):
+    return not any(
+        entries for section in delta.values() for entries in section.values()
+    )
+
+
+def apply_saved_delta(canvas, pending):
+    """Make the state that was just saved the new baseline."""
+    canvas.sync_state = pending
@@ -9,8 +9,9 @@ from src.connection import Connection
 from src.component_widget import ComponentWidget
 import src.app_state as app_state
 from src.canvas import resources, painter
-from src.canvas.commands import AddCommand, DeleteCommand, MoveCommand, AddConnectionCommand
+from src.canvas.commands import AddCommand, DeleteCommand, MoveCommand, AddConnectionCommand, LayoutCommand
 from src.canvas.validation import GraphValidator
+from src.canvas.layout import LayeredLayout
 
 
 class ConnectionOverlay(QWidget):
@@ -68,12 +69,14 @@ class CanvasWidget(QWidget):
         
         self.file_path = None
         self.is_modified = False
+        # Backend baseline for incremental saves (see canvas/sync.py)
+        self.sync_state = None
         self.undo_stack.cleanChanged.connect(self.on_undo_stack_changed)
         self.undo_stack.indexChanged.connect(self.run_validation)
 
         # Configs
         base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-        self.component_config = resources.load_config(base_dir)
+        self.component_config = resources.get_config_index(base_dir)
         self.label_data = resources.load_label_data(base_dir)
         self.base_dir = base_dir
         
@@ -124,6 +127,15 @@ class CanvasWidget(QWidget):
         # Trigger re-paint on the main canvas (e.g. for global warning indicators)
         self.update()
 
+    def auto_layout(self):
+        """Arrange all components in flow layers (undoable)."""
+        if not self.components:
+            return
+        new_positions = LayeredLayout(self.components, self.connections).compute()
+        old_positions = {comp: QPointF(comp.logical_rect.topLeft()) for comp in new_positions}
+        self.undo_stack.push(LayoutCommand(self, old_positions, new_positions))
+        self.run_validation()
+
     def expand_to_contain(self, rect):
         """Expand logical size if rect is outside current bounds."""
         margin = 500 # Expansion chunk
@@ -10,6 +10,7 @@ from src.theme import apply_theme_to_screen
 from src.navigation import slide_to_index
 import src.app_state as app_state
 from src.theme_manager import theme_manager
+from src.component_catalog import component_catalog
 
 class OverlayContainer(QWidget):
     def __init__(self, canvas, scroll_area, parent=None):
@@ -35,6 +36,11 @@ class OverlayContainer(QWidget):
         self.zoom_fit_btn.setFixedSize(40, 30)
         self.zoom_fit_btn.clicked.connect(self.canvas.zoom_fit)
         
+        self.layout_btn = QtWidgets.QPushButton("Layout")
+        self.layout_btn.setFixedSize(60, 30)
+        self.layout_btn.setToolTip("Arrange components along the flow")
+        self.layout_btn.clicked.connect(self.canvas.auto_layout)
+        
         self.zoom_in_btn = QtWidgets.QPushButton("+")
         self.zoom_in_btn.setFixedSize(30, 30)
         self.zoom_in_btn.clicked.connect(self.canvas.zoom_in)
@@ -42,12 +48,33 @@ class OverlayContainer(QWidget):
         btn_layout.addWidget(self.zoom_out_btn)
         btn_layout.addWidget(self.zoom_fit_btn)
         btn_layout.addWidget(self.zoom_in_btn)
+        btn_layout.addWidget(self.layout_btn)
         
         layout.addWidget(self.toolbar_frame, 0, 0, Qt.AlignBottom | Qt.AlignRight)
         layout.setContentsMargins(0, 0, 20, 20)
         
+        # Progress indicator for progressive project loading (hidden by default)
+        self.progress_bar = QtWidgets.QProgressBar()
+        self.progress_bar.setFixedSize(240, 14)
+        self.progress_bar.setTextVisible(False)
+        self.progress_bar.setVisible(False)
+        layout.addWidget(self.progress_bar, 0, 0, Qt.AlignTop | Qt.AlignHCenter)
+        
         layout.setContentsMargins(0, 0, 20, 20)
 
+    def show_busy(self):
+        """Indeterminate progress while project data is being fetched."""
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.setVisible(True)
+
+    def set_progress(self, done, total):
+        if total <= 0 or done >= total:
+            self.progress_bar.setVisible(False)
+            return
+        self.progress_bar.setRange(0, total)
+        self.progress_bar.setValue(done)
+        self.progress_bar.setVisible(True)
+
 
 class ImageSubWindow(QMdiSubWindow):
     def __init__(self, image_path, parent=None):
@@ -434,7 +461,13 @@ class CanvasScreen(QMainWindow):
         canvas.undo_stack.setClean()
         canvas.is_modified = False
         
-        # Setup UI
+        self._add_canvas_window(canvas, f"{app_state.current_project_name}")
+
+        if is_freshly_created:
+            QTimer.singleShot(0, self._apply_default_library_size)
+
+    def _add_canvas_window(self, canvas, title):
+        """Wrap a canvas in scroll/overlay containers and show it as a new tab."""
         scroll = QtWidgets.QScrollArea()
         scroll.setWidget(canvas)
         scroll.setWidgetResizable(False)
@@ -447,11 +480,9 @@ class CanvasScreen(QMainWindow):
         sub.setWidget(overlay)
         sub.setAttribute(Qt.WA_DeleteOnClose)
         self.mdi_area.addSubWindow(sub)
-        sub.setWindowTitle(f"{app_state.current_project_name}")
+        sub.setWindowTitle(title)
         sub.showMaximized()
-
-        if is_freshly_created:
-            QTimer.singleShot(0, self._apply_default_library_size)
+        return sub, overlay
 
     def _apply_default_library_size(self):
         target_width = 360
@@ -462,22 +493,55 @@ class CanvasScreen(QMainWindow):
         self.splitter.setSizes([target_width, right_width])
         
     def open_project_from_backend(self, project_id):
-        """Load and open a project from backend by ID."""
-        from src.api_client import get_project
-        
-        # Fetch project data
-        project_data = get_project(project_id)
-        
+        """
+        Load and open a project from backend by ID.
+        The tab opens immediately; data is fetched in the background and
+        components appear in visible-area-first chunks (see ProjectLoader).
+        """
+        from src.canvas.loader import ProjectLoader
+
+        canvas = CanvasWidget(self)
+        canvas.update_canvas_theme()
+        canvas.project_id = project_id
+        # Existing project -> not freshly created
+        canvas.is_new_project = False
+
+        sub, overlay = self._add_canvas_window(canvas, "Loading project...")
+        overlay.show_busy()
+
+        loader = ProjectLoader(canvas, scroll_area=overlay.scroll_area)
+        loader.data_ready.connect(lambda data: self._on_project_data_ready(sub, canvas, project_id, data))
+        loader.progress.connect(overlay.set_progress)
+        loader.finished.connect(lambda ok: self._on_project_load_finished(canvas, overlay, ok))
+        loader.load_from_backend(project_id)
+
+    def _on_project_load_finished(self, canvas, overlay, ok):
+        overlay.set_progress(0, 0)
+        if not ok and getattr(canvas, "_load_failed", False):
+            QtWidgets.QMessageBox.warning(
+                self,
+                "Warning",
+                "Project loaded but some components may be missing.\n"
+                "Changes to this project will not be saved to the server."
+            )
+
+    def _on_project_data_ready(self, sub, canvas, project_id, project_data):
         if not project_data:
+            sub.close()
             QtWidgets.QMessageBox.critical(
                 self,
                 "Error",
                 f"Failed to load project (ID: {project_id})"
             )
             return
-        
-        # Existing project -> is_freshly_created=False
-        self._create_canvas_for_project(project_data, is_freshly_created=False)
+
+        # Store project info in app state
+        app_state.current_project_id = project_data.get("id")
+        app_state.current_project_name = project_data.get("name")
+        canvas.project_name = app_state.current_project_name
+        sub.setWindowTitle(f"{app_state.current_project_name}")
+
+        print(f"[PROJECT] Opening project: ID={app_state.current_project_id}, Name={app_state.current_project_name}")
 
     def showEvent(self, event):
         """Handle show event - check if there's a pending project to load."""
@@ -799,4 +863,7 @@ class CanvasScreen(QMainWindow):
         app_state.access_token = None
         app_state.refresh_token = None
         app_state.current_user = None
+        component_catalog.invalidate()
+        from src.api_client import clear_project_cache
+        clear_project_cache()
         slide_to_index(0, direction=-1)
\ No newline at end of file
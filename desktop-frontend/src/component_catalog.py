@@ -0,0 +1,280 @@
+"""
+Shared component catalog for the desktop client.
+
+The library, project load and project save all read the component list from
+here instead of calling api_client.get_components() themselves. The catalog is
+kept in memory, persisted to ui/assets/component_catalog.json, and kept up to
+date through /api/components/changes/: once a full list has been downloaded,
+each revalidation only fetches the components created, updated or deleted
+since the last sync token. Backends without the changes feed are revalidated
+with If-None-Match / If-Modified-Since instead.
+
+The list includes the logged-in user's own components, so both copies belong
+to one backend and user; logging in as someone else starts over.
+
+Network calls run outside the state lock: while one thread revalidates,
+others keep reading the last known list instead of waiting on the request.
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime
+
+import src.app_state as app_state
+from src import api_client
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CATALOG_FILE = os.path.join(BASE_DIR, "ui", "assets", "component_catalog.json")
+CATALOG_VERSION = 2
+
+
+def _owner():
+    return app_state.BACKEND_BASE_URL, app_state.current_user
+
+
+class ComponentCatalog:
+    # Within this window the in-memory copy is used without asking the server
+    FRESH_FOR = 300  # seconds
+
+    def __init__(self, cache_path=CATALOG_FILE):
+        self.cache_path = cache_path
+        self._lock = threading.RLock()          # state below; never held over the network
+        self._fetch_lock = threading.Lock()     # one revalidation at a time
+        self._generation = 0                    # bumped when the state is thrown away
+        self._owner = None
+        self._components = None
+        self._etag = None
+        self._last_modified = None
+        self._sync_token = None
+        self._checked_at = 0.0
+        self._by_id = {}
+        self._sno_to_id = {}
+        self._disk_loaded = False
+
+    # ---------------------- PUBLIC API ----------------------
+    def get_components(self, force_refresh=False):
+        """
+        Return the component list, revalidating with the backend when the
+        in-memory copy is older than FRESH_FOR (or force_refresh is set).
+        Falls back to the last known list if the server can't be reached.
+        """
+        with self._lock:
+            self._prepare()
+            if self._fresh() and not force_refresh:
+                return self._components
+            # With a list to fall back on, don't queue behind another thread's request
+            wait = force_refresh or self._components is None
+        self._revalidate(wait)
+        with self._lock:
+            return self._components or []
+
+    def sync(self):
+        """
+        Revalidate now and return what changed:
+        {"full": bool, "created": [...], "updated": [...], "deleted": [ids]}.
+        "full" means the whole list was replaced (first download, or the
+        server couldn't produce a delta); otherwise only the listed
+        components differ from before.
+        """
+        with self._lock:
+            self._prepare()
+        return self._revalidate(wait=True)
+
+    def by_id(self):
+        """Component ID -> component data."""
+        self.get_components()
+        with self._lock:
+            return self._by_id
+
+    def sno_to_id(self):
+        """s_no -> component ID (used when serializing the canvas)."""
+        self.get_components()
+        with self._lock:
+            return self._sno_to_id
+
+    def invalidate(self):
+        """Forget everything, e.g. on logout."""
+        with self._lock:
+            self._reset()
+            try:
+                os.remove(self.cache_path)
+            except OSError:
+                pass
+
+    # ---------------------- INTERNALS ----------------------
+    def _prepare(self):
+        """Start over if the backend or user changed, then load the disk copy once."""
+        if self._owner != _owner():
+            self._reset()
+            self._owner = _owner()
+        self._load_from_disk()
+
+    def _reset(self):
+        self._generation += 1
+        self._set({"components": None, "etag": None, "last_modified": None, "sync_token": None})
+        self._checked_at = 0.0
+        self._disk_loaded = False
+
+    def _fresh(self):
+        return self._components is not None and time.monotonic() - self._checked_at < self.FRESH_FOR
+
+    def _revalidate(self, wait):
+        """Fetch changes (or the full list) and apply them; returns what changed."""
+        if not self._fetch_lock.acquire(blocking=wait):
+            return _no_changes()
+        try:
+            with self._lock:
+                generation = self._generation
+                have_list = self._components is not None
+                token = self._sync_token if have_list else None
+                etag = self._etag if have_list else None
+                last_modified = self._last_modified if have_list else None
+
+            changes = full = None
+            if token:
+                try:
+                    changes = api_client.get_component_changes(token)
+                except api_client.ApiError as e:
+                    print(f"[CATALOG] Changes feed unavailable, revalidating full list: {e}")
+            if changes is None:
+                try:
+                    full = api_client.get_components_conditional(etag, last_modified)
+                except api_client.ApiError as e:
+                    print(f"[CATALOG] Revalidation failed, using cached catalog: {e}")
+                    return _no_changes()
+
+            with self._lock:
+                if self._generation != generation:
+                    # Invalidated (logout, another user) while the request ran
+                    return _no_changes()
+                if changes is not None:
+                    return self._apply_changes(changes)
+                return self._apply_full(*full)
+        finally:
+            self._fetch_lock.release()
+
+    def _apply_full(self, components, etag, last_modified, sync_token):
+        self._checked_at = time.monotonic()
+        if components is None:
+            # 304 Not Modified
+            if sync_token and sync_token != self._sync_token:
+                self._sync_token = sync_token
+                self._save_to_disk()
+            return _no_changes()
+
+        self._set({
+            "components": components,
+            "etag": etag,
+            "last_modified": last_modified or _newest_updated_at(components),
+            "sync_token": sync_token,
+        })
+        self._save_to_disk()
+        print(f"[CATALOG] Downloaded {len(components)} components")
+        return {"full": True, "created": components, "updated": [], "deleted": []}
+
+    def _apply_changes(self, changes):
+        self._checked_at = time.monotonic()
+        created = changes.get("created") or []
+        updated = changes.get("updated") or []
+        deleted = changes.get("deleted") or []
+
+        if changes.get("full"):
+            components = sorted(created, key=_sno_key)
+        else:
+            if not (created or updated or deleted):
+                self._sync_token = changes["token"]
+                self._save_to_disk()
+                return _no_changes()
+            by_id = {c.get("id"): c for c in self._components}
+            for component_id in deleted:
+                by_id.pop(component_id, None)
+            for c in created + updated:
+                by_id[c.get("id")] = c
+            components = sorted(by_id.values(), key=_sno_key)
+
+        # The full-list validators no longer describe this list
+        self._set({"components": components, "sync_token": changes["token"]})
+        self._save_to_disk()
+        print(f"[CATALOG] Synced {len(created)} created, {len(updated)} updated, {len(deleted)} deleted components")
+        return {
+            "full": bool(changes.get("full")),
+            "created": created,
+            "updated": updated,
+            "deleted": deleted,
+        }
+
+    def _set(self, state):
+        components = state.get("components")
+        self._components = components
+        self._etag = state.get("etag")
+        self._last_modified = state.get("last_modified")
+        self._sync_token = state.get("sync_token")
+        self._by_id = {c.get("id"): c for c in components or [] if c.get("id")}
+        self._sno_to_id = {
+            str(c.get("s_no", "")): c.get("id") for c in components or [] if c.get("s_no")
+        }
+
+    def _load_from_disk(self):
+        if self._disk_loaded:
+            return
+        self._disk_loaded = True
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        # Only trust a cache written for the same backend and user
+        backend, user = self._owner
+        if (data.get("version") != CATALOG_VERSION or data.get("backend") != backend
+                or data.get("user") != user):
+            return
+        if isinstance(data.get("components"), list):
+            self._set(data)
+
+    def _save_to_disk(self):
+        backend, user = self._owner
+        try:
+            with open(self.cache_path, "w", encoding="utf-8") as f:
+                json.dump({
+                    "version": CATALOG_VERSION,
+                    "backend": backend,
+                    "user": user,
+                    "etag": self._etag,
+                    "last_modified": self._last_modified,
+                    "sync_token": self._sync_token,
+                    "components": self._components,
+                }, f)
+        except OSError as e:
+            print(f"[CATALOG] Failed to persist catalog: {e}")
+
+
+def _no_changes():
+    return {"full": False, "created": [], "updated": [], "deleted": []}
+
+
+def _sno_key(component):
+    return str(component.get("s_no", ""))
+
+
+def _newest_updated_at(components):
+    """HTTP date of the newest component updated_at, if the payload has it."""
+    newest = None
+    for c in components:
+        value = c.get("updated_at")
+        if not value:
+            continue
+        try:
+            ts = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            continue
+        if ts.tzinfo is None:
+            ts = ts.replace(tzinfo=timezone.utc)
+        if newest is None or ts > newest:
+            newest = ts
+    return format_datetime(newest.astimezone(timezone.utc), usegmt=True) if newest else None
+
+
+# Global singleton instance
+component_catalog = ComponentCatalog()
@@ -1,10 +1,13 @@
 import os
 import csv
 import json
+import re
 import requests
 import src.app_state as app_state
 from src.theme_manager import theme_manager
 from src import api_client
+from src.canvas import resources
+from src.component_catalog import component_catalog
 from src.flow_layout import FlowLayout
 from PyQt5.QtCore import Qt, QMimeData, QSize, QTimer, QPropertyAnimation, QEasingCurve, QEvent, pyqtSignal
 from PyQt5.QtGui import QIcon, QDrag, QMovie, QPixmap, QPalette
@@ -16,6 +19,9 @@ from PyQt5.QtWidgets import (
 import threading
 import time
 
+# Last path segment of a content-addressed asset (backend api/storage.py), sans extension
+CONTENT_HASH = re.compile(r"[0-9a-f]{62}")
+
 class FunctionEvent(QEvent):
     EVENT_TYPE = QEvent.Type(QEvent.registerEventType())
 
@@ -194,6 +200,7 @@ class ComponentLibrary(QWidget):
         # self.setMaximumWidth(260)  <-- Removed to allow resizing
         
         self.component_data = []
+        self._synced_from_api = False  # component_data was built from the backend catalog
         self.icon_buttons = []
         self.category_widgets = []
 
@@ -299,67 +306,137 @@ class ComponentLibrary(QWidget):
         self.loader_label.setVisible(False)
 
     def _load_components_from_api(self):
-        """Fetch components directly from backend API (network call — run on bg thread)."""
+        """
+        Sync the library with the backend (network call — run on bg thread).
+        The first sync builds the whole list; later ones only apply the
+        components the catalog reports as created, updated or deleted.
+        """
         try:
-            api_components = api_client.get_components()
-            if not api_components:
-                print("[SYNC] No components received or API failed.")
-                return
-
-            new_data = []
-            for comp in api_components:
-                s_no = str(comp.get("s_no", "")).strip()
-                if not s_no:
-                    continue
+            changes = component_catalog.sync()
+            if changes["full"] or not self._synced_from_api:
+                self._rebuild_from_catalog()
+            else:
+                self._apply_catalog_changes(changes)
+        except Exception as e:
+            print(f"[SYNC ERROR] {e}")
 
-                # Download assets if missing
-                png_url = comp.get("png_url") or comp.get("png")
-                svg_url = comp.get("svg_url") or comp.get("svg")
-                png_filename = os.path.basename(png_url) if png_url else ""
-                svg_filename = os.path.basename(svg_url) if svg_url else ""
-
-                parent = comp.get("parent", "").strip()
-                parent_folder = self.FOLDER_MAP.get(parent, parent)
-
-                if png_url:
-                    self._download_asset(png_url, png_filename, "png", parent_folder)
-                if svg_url:
-                    self._download_asset(svg_url, svg_filename, "svg", parent_folder)
-
-                new_data.append({
-                    "id": comp.get("id"),
-                    "s_no": s_no,
-                    "parent": parent,
-                    "name": comp.get("name", "").strip(),
-                    "legend": comp.get("legend", ""),
-                    "suffix": comp.get("suffix", ""),
-                    "object": comp.get("object", "").strip(),
-                    "svg": svg_filename,
-                    "png": png_filename,
-                    "grips": comp.get("grips", ""),
-                    "created_by": comp.get("created_by"),
-                })
+    def _rebuild_from_catalog(self):
+        api_components = component_catalog.get_components()
+        if not api_components:
+            print("[SYNC] No components received or API failed.")
+            return
 
-            # Sort by s_no
-            try:
-                new_data.sort(key=lambda x: int(x["s_no"]) if x["s_no"].isdigit() else x["s_no"])
-            except Exception:
-                pass
+        config_index = resources.get_config_index()
+        svg_downloaded = False
+        new_data = []
+        for comp in api_components:
+            entry, downloaded = self._library_entry(comp, config_index)
+            if entry is None:
+                continue
+            svg_downloaded |= downloaded
+            new_data.append(entry)
+
+        # New SVGs on disk: rescan once so canvas lookups see them
+        if svg_downloaded:
+            resources.refresh_svg_index()
+
+        # Replace component_data atomically
+        self.component_data = self._sorted(new_data)
+        self._synced_from_api = True
+        print(f"[SYNC] Loaded {len(new_data)} components from API.")
+
+    def _apply_catalog_changes(self, changes):
+        changed = changes["created"] + changes["updated"]
+        if not changed and not changes["deleted"]:
+            print("[SYNC] Component library is up to date.")
+            return
 
-            # Replace component_data atomically
-            self.component_data = new_data
-            print(f"[SYNC] Loaded {len(new_data)} components from API.")
+        config_index = resources.get_config_index()
+        replaced = set(changes["deleted"]) | {c.get("id") for c in changed}
+        new_data = [d for d in self.component_data if d.get("id") not in replaced]
 
-        except Exception as e:
-            print(f"[SYNC ERROR] {e}")
+        svg_downloaded = False
+        for comp in changed:
+            entry, downloaded = self._library_entry(comp, config_index)
+            if entry is None:
+                continue
+            svg_downloaded |= downloaded
+            new_data.append(entry)
 
-    # _sync_components_with_backend removed — replaced by _load_components_from_api above
+        if svg_downloaded:
+            resources.refresh_svg_index()
+
+        self.component_data = self._sorted(new_data)
+        self.new_snos = {str(c.get("s_no", "")).strip() for c in changes["created"]}
+        print(f"[SYNC] Applied {len(changed)} changed and {len(changes['deleted'])} deleted components.")
+
+    def _library_entry(self, comp, config_index):
+        """
+        Library entry for a catalog component, downloading its assets if
+        missing. Returns (entry, svg_downloaded); entry is None if unusable.
+        """
+        s_no = str(comp.get("s_no", "")).strip()
+        if not s_no:
+            return None, False
+
+        # Download assets if missing
+        png_url = comp.get("png_url") or comp.get("png")
+        svg_url = comp.get("svg_url") or comp.get("svg")
+        png_filename = self._asset_filename(png_url, comp)
+        svg_filename = self._asset_filename(svg_url, comp)
+
+        parent = comp.get("parent", "").strip()
+        parent_folder = self.FOLDER_MAP.get(parent, parent)
+
+        svg_downloaded = False
+        if png_url:
+            self._download_asset(png_url, png_filename, "png", parent_folder)
+        if svg_url and self._download_asset(svg_url, svg_filename, "svg", parent_folder):
+            svg_downloaded = True
+
+        return {
+            "id": comp.get("id"),
+            "s_no": s_no,
+            "parent": parent,
+            "name": comp.get("name", "").strip(),
+            "legend": comp.get("legend", ""),
+            "suffix": comp.get("suffix", ""),
+            "object": comp.get("object", "").strip(),
+            "svg": svg_filename,
+            "png": png_filename,
+            "grips": comp.get("grips") or config_index.get_grips(comp.get("name", "").strip()) or "",
+            "created_by": comp.get("created_by"),
+        }, svg_downloaded
+
+    @staticmethod
+    def _sorted(entries):
+        # Sort by s_no
+        try:
+            return sorted(entries, key=lambda x: int(x["s_no"]) if x["s_no"].isdigit() else x["s_no"])
+        except Exception:
+            return entries
+
+    @staticmethod
+    def _asset_filename(url, comp):
+        """
+        Local file name for an asset URL. The backend stores assets under the
+        sha256 of their content (components/ab/<hash>.svg), so those are saved
+        under the component's name instead: the SVG index finds them by name.
+        """
+        if not url:
+            return ""
+        filename = os.path.basename(url.split("?", 1)[0])
+        stem, extension = os.path.splitext(filename)
+        name = str(comp.get("name", "")).strip().replace("/", "-").replace("\\", "-")
+        if name and CONTENT_HASH.fullmatch(stem):
+            return f"{name}{extension}"
+        return filename
 
     def _download_asset(self, url, filename, asset_type, parent_folder):
-        """Helper to download assets if missing."""
+        """Helper to download assets if missing. Returns True if a file was written."""
         try:
             if not url:
-                return
+                return False
 
             if not url.startswith("http"):
                 url = f"{app_state.BACKEND_BASE_URL}{url}"
@@ -376,10 +453,12 @@ class ComponentLibrary(QWidget):
                     with open(target_path, "wb") as f:
                         f.write(res.content)
                     # print(f"[SYNC] Downloaded {asset_type}: {filename}")
+                    return True
                 else:
                     print(f"[SYNC WARNING] Failed to download {url} ({res.status_code})")
         except Exception as e:
             print(f"[SYNC ERROR] Failed to download asset {filename}: {e}")
+        return False
 
 
     def _populate_icons(self):
@@ -698,8 +777,7 @@ class ComponentLibrary(QWidget):
         start_time = time.time()
 
         def task():
-            # 1. Background work
-            self.component_data.clear()
+            # 1. Background work (replaces component_data when done)
             self._load_components_from_api()
 
             # 2. Ensure minimum loader time (1 second)
@@ -1,17 +1,21 @@
 import os
 
 import json
+import uuid
 from PyQt5.QtWidgets import QWidget
 from PyQt5.QtSvg import QSvgRenderer
 from PyQt5.QtCore import Qt, QRectF, QPoint, QPointF
 from PyQt5.QtGui import QPainter, QPen, QColor
 
 class ComponentWidget(QWidget):
-    def __init__(self, svg_path, parent=None, config=None):
+    def __init__(self, svg_path, parent=None, config=None, renderer=None):
         super().__init__(parent)
         self.svg_path = svg_path
         self.config = config or {}
-        self.renderer = QSvgRenderer(svg_path)
+        # Persistent identity; the backend keys the saved canvas item on it
+        self.uid = str(uuid.uuid4())
+        # Bulk loaders pass a shared renderer so identical SVGs are parsed once
+        self.renderer = renderer if renderer is not None else QSvgRenderer(svg_path)
 
         # Dynamic size based on SVG dimensions
         default_size = self.renderer.defaultSize()
@@ -162,34 +166,13 @@ class ComponentWidget(QWidget):
         """
         Load grips from grips.json.
         Used for standard components where CSV might be empty or missing grips.
+        Reads from the shared in-memory index (parsed once per process).
         """
-        json_path = os.path.join("ui", "assets", "grips.json")
-        
-        if not os.path.exists(json_path):
-            return None
+        from src.canvas import resources
 
-        try:
-            with open(json_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                
-            # Match current component name to 'component' field in JSON
-            current_name = self.config.get("name", "").strip()
-
-            for entry in data:
-                if entry.get("component") == current_name:
-                    grips = entry.get("grips")
-                    if isinstance(grips, list) and len(grips) > 0:
-                        print(f"[JSON] ✓ Loaded grips for {current_name} from grips.json")
-                        return grips
-                    else:
-                        print(f"[JSON] Empty grips for {current_name}")
-                        return None
-                        
-        except Exception as e:
-            print("[GRIPS JSON ERROR]", e)
-            return None
-        
-        return None
+        # Match current component name to 'component' field in JSON
+        current_name = self.config.get("name", "").strip()
+        return resources.get_config_index().get_grips(current_name)
 
     def get_grips(self):
         """
@@ -1,6 +1,7 @@
 from PyQt5.QtCore import QPoint, QPointF, QRectF, Qt, QLineF, QSizeF
 from PyQt5.QtGui import QPainterPath, QColor, QPen, QBrush, QPolygonF
 import math
+import uuid
 import src.auto_router as auto_router
 
 class Connection:
@@ -11,6 +12,8 @@ class Connection:
         self.start_component = start_component
         self.start_grip_index = start_grip_index
         self.start_side = start_side  # "top", "bottom", "left", "right"
+        # Persistent identity; the backend keys the saved connection on it
+        self.uid = str(uuid.uuid4())
         
         self.end_component = None
         self.end_grip_index = None
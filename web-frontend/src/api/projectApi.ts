@@ -14,6 +14,8 @@ export interface ApiProject {
     connections: any[];
     sequence_counter: number;
   };
+  // ?normalized=1: component data keyed by component_id, once per component
+  components?: Record<string, any>;
   // other backend fields...
 }
 
@@ -47,12 +49,38 @@ export const fetchProjects = async (): Promise<ApiProject[]> => {
   return res.data?.projects ?? [];
 };
 
-/** GET /project/:id/ */
+/**
+ * Merge a normalized payload back into flat canvas items: each item gets
+ * its component's fields (name, svg, png, grips, ...) from `components`.
+ * The component values are shared between items, not copied.
+ */
+export const expandCanvasItems = (project: ApiProject): ApiProject => {
+  const components = project.components;
+  const items = project.canvas_state?.items;
+
+  if (!components || !items) return project;
+
+  return {
+    ...project,
+    canvas_state: {
+      ...project.canvas_state!,
+      items: items.map((item) => ({
+        ...components[String(item.component_id)],
+        ...item,
+      })),
+    },
+  };
+};
+
+/** GET /project/:id/?normalized=1 */
 export const fetchProject = async (id: number): Promise<any> => {
-  const res = await client.get(`/project/${id}/`);
+  // Normalized: each component's data is sent once, not once per item
+  const res = await client.get(`/project/${id}/`, {
+    params: { normalized: 1 },
+  });
 
   // ProjectDetailView returns full project object (possibly wrapped)
-  return res.data;
+  return expandCanvasItems(res.data);
 };
 
 /** POST /project/ */